@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+from flow import MaxFlow
+from monitors import ERole, MONITOR_ROLES_AM
+
+_SOURCE = 0
+_SINK = 1
+
+
+def balance_am_roles(monitor_dict: dict, base_monitor_dict: dict, weekdays) -> int:
+    """
+    AM1とAM2を区別せずに割り当てたAMの2人を、AM1とAM2に振り分ける。
+    手動で入力された日はその役割のままとし、残りの日は最大流で各監視者のAM1とAM2の日数が上限以下になるように振り分ける。
+    監視者のAM1の日数には、下限(AMの日数 - AM2の上限)と上限(AM1の上限)がある。
+    まず下限まで流してから上限まで流すと、始点から終点への増加路は終点に入る辺のフローを減らさないため、下限を満たしたまま振り分けられる。
+
+    :param monitor_dict: AMの2人をAM1とAM2(順序は問わない)に割り当てた監視者の辞書(key:=name, item:=Monitor)
+    :param base_monitor_dict: あらかじめ入力された予定のみを持つ監視者の辞書(key:=name, item:=Monitor)
+    :param weekdays: 振り分ける営業日のIterable
+    :return: 振り分けられなかった日数(0の場合のみmonitor_dictを変更する)
+    """
+    # 振り分ける日(key:=day, item:=AMの2人の名前のlist)
+    free_days = {}
+    # 手動で入力された日(key:=day, item:=dict(key:=name, item:=ERole))
+    fixed_roles = {}
+    for day in weekdays:
+        am_names = [name for name, monitor in monitor_dict.items() if monitor.schedule.get(day) in MONITOR_ROLES_AM]
+        if len(am_names) != 2:
+            continue
+        manual_roles = {name: role for name in am_names
+                        if (role := base_monitor_dict[name].schedule.get(day)) in MONITOR_ROLES_AM}
+        if manual_roles:
+            manual_name, manual_role = next(iter(manual_roles.items()))
+            other_role = ERole.AM2 if manual_role == ERole.AM1 else ERole.AM1
+            fixed_roles[day] = {name: manual_role if name == manual_name else other_role for name in am_names}
+        else:
+            free_days[day] = am_names
+
+    # key:=name, item:=tuple(AM1の日数の下限, 上限)
+    bounds = {}
+    for name, monitor in monitor_dict.items():
+        num_of_free_days = len([day for day, am_names in free_days.items() if name in am_names])
+        if not num_of_free_days:
+            continue
+        counts = {role: 0 for role in MONITOR_ROLES_AM}
+        for day, role in monitor.schedule.items():
+            if day not in free_days and role in MONITOR_ROLES_AM:
+                counts[fixed_roles.get(day, {}).get(name, role)] += 1
+        am1_max, am2_max = monitor.role_max.get(ERole.AM1), monitor.role_max.get(ERole.AM2)
+        upper = min(am1_max - counts[ERole.AM1], num_of_free_days) if am1_max is not None else num_of_free_days
+        lower = max(num_of_free_days - (am2_max - counts[ERole.AM2]), 0) if am2_max is not None else 0
+        if lower > upper:
+            return len(free_days)
+        bounds[name] = (lower, upper)
+
+    names = list(bounds)
+    flow = MaxFlow(2 + len(free_days) + len(names))
+    monitor_nodes = {name: idx for idx, name in enumerate(names, 2 + len(free_days))}
+    monitor_edges = {name: flow.add_edge(monitor_nodes[name], _SINK, lower) for name, (lower, _) in bounds.items()}
+    # key:=day, item:=dict(key:=name, item:=AM1に割り当てる辺のインデックス)
+    day_edges = {}
+    for day_node, (day, am_names) in enumerate(free_days.items(), 2):
+        flow.add_edge(_SOURCE, day_node, 1)
+        day_edges[day] = {name: flow.add_edge(day_node, monitor_nodes[name], 1) for name in am_names}
+    num_of_balanced_days = flow.max_flow(_SOURCE, _SINK)
+    if any([flow.get_flow(monitor_edges[name]) < lower for name, (lower, _) in bounds.items()]):
+        return len(free_days)
+    for name, (_, upper) in bounds.items():
+        flow.set_capacity(monitor_edges[name], upper)
+    num_of_balanced_days += flow.max_flow(_SOURCE, _SINK)
+    if num_of_unbalanced_days := len(free_days) - num_of_balanced_days:
+        return num_of_unbalanced_days
+
+    for day, roles in fixed_roles.items():
+        for name, role in roles.items():
+            monitor_dict[name].schedule[day] = role
+    for day, edges in day_edges.items():
+        for name, edge in edges.items():
+            monitor_dict[name].schedule[day] = ERole.AM1 if flow.get_flow(edge) else ERole.AM2
+    return 0
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import functools
+
+from progress import PHASE_DONE, PHASE_LOAD, PHASE_SAVE, CancelToken, ProgressEvent
+from scheduler import Scenario, load_scenario, save_schedule, solve_schedule
+
+
+async def schedule_async(path_or_scenario, timeout: float = None, progress_queue: asyncio.Queue = None,
+                         executor=None, save: bool = True) -> dict:
+    """
+    スケジュール作成を非同期に行う。
+    Excelの読み込み、割り当て、保存の各処理はexecutor上で実行されるため、イベントループをブロックしない。
+    タイムアウトやタスクのキャンセル時には割り当ての試行の合間で処理が中断される。
+
+    :param path_or_scenario: Excelのパス、またはスケジュール作成の入力情報(Scenario)
+    :param timeout: タイムアウト秒数(Noneの場合は無制限)
+    :param progress_queue: 進捗イベント(ProgressEvent)を受け取るasyncio.Queue
+    :param executor: 処理を実行するconcurrent.futures.Executor(Noneの場合はイベントループの既定値)
+    :param save: Excelのパスが指定された場合に、作成したスケジュールを保存するならTrue
+    :return: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :raises: asyncio.TimeoutError: タイムアウトした場合
+    """
+    loop = asyncio.get_running_loop()
+    cancel_token = CancelToken()
+
+    def on_progress(event: ProgressEvent):
+        # タイムアウト後に実行中の処理から通知された場合は、既に閉じたイベントループには渡さない
+        if progress_queue is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(progress_queue.put_nowait, event)
+            except RuntimeError:
+                pass
+
+    async def run():
+        if isinstance(path_or_scenario, Scenario):
+            scenario = path_or_scenario
+        else:
+            on_progress(ProgressEvent(PHASE_LOAD))
+            scenario = await loop.run_in_executor(executor, load_scenario, path_or_scenario)
+
+        monitor_dict = await loop.run_in_executor(executor, functools.partial(
+            solve_schedule, scenario, cancel_token=cancel_token, on_progress=on_progress))
+
+        if save and not isinstance(path_or_scenario, Scenario):
+            on_progress(ProgressEvent(PHASE_SAVE))
+            await loop.run_in_executor(executor, save_schedule, scenario, monitor_dict)
+        on_progress(ProgressEvent(PHASE_DONE))
+        return monitor_dict
+
+    try:
+        return await asyncio.wait_for(run(), timeout)
+    except BaseException:
+        # executor上の処理は中断されないため、試行の合間で止まるようにキャンセルを伝える
+        cancel_token.cancel()
+        raise
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+import json
+
+DIAGNOSTICS_SHEET_NAME = 'diagnostics'
+# 最大流による在宅勤務の割り当て(remote_flow.py)の段階。候補は監視者→日の辺(その日に在宅勤務にできる監視者)
+PHASE_REMOTE_FLOW = 'REMOTE_FLOW'
+
+
+class SearchDiagnostics:
+    """
+    割り当ての探索空間の診断情報を集計するクラス。
+    日毎の候補数(監視の組み合わせ、在宅勤務者の組み合わせ)、その日で割り当てが失敗した回数、
+    フィルタ毎に除外された候補数を試行をまたいで集計する。
+    候補は除外したフィルタ毎に数えるため、複数のフィルタに除外された候補はそれぞれのフィルタで数えられる。
+    """
+
+    def __init__(self):
+        # key:=(phase, day), item:=候補数の合計
+        self.candidate_totals = Counter()
+        # key:=(phase, day), item:=候補数を集計した回数
+        self.num_of_samples = Counter()
+        # key:=(phase, day), item:=候補数の最小値
+        self.candidate_mins = {}
+        # key:=(phase, day), item:=候補が無く割り当てが失敗した回数
+        self.failure_counts = Counter()
+        # key:=(phase, filter name), item:=除外された候補数
+        self.pruned_counts = Counter()
+
+    def filter_candidates(self, phase: str, day, candidates, filters_by_enum: dict,
+                          is_static: bool = False) -> list:
+        """
+        候補にフィルタを適用し、フィルタ毎の除外数と残った候補数を記録する。
+        割り当て状況に依存しないフィルタの事前計算(is_static=True)では、除外数のみを記録する。
+
+        :param phase: 処理の段階(PHASE_*)
+        :param day: 日付
+        :param candidates: 候補のIterable
+        :param filters_by_enum: FilterManager.get_filters_by_enumの結果
+        :param is_static: 割り当て状況に依存しないフィルタの事前計算の場合はTrue
+        :return: 全フィルタを満たす候補のlist
+        """
+        passed = []
+        pruned_counts = Counter()
+        for candidate in candidates:
+            is_passed = True
+            for filter_enum, filters in filters_by_enum.items():
+                if not all([f(candidate) for f in filters]):
+                    pruned_counts[filter_enum.name] += 1
+                    is_passed = False
+            if is_passed:
+                passed.append(candidate)
+        for filter_name, count in pruned_counts.items():
+            self.record_pruned(phase, filter_name, count)
+        if not is_static:
+            self.record_candidates(phase, day, len(passed))
+        return passed
+
+    def record_pruned(self, phase: str, filter_name: str, num_of_pruned: int = 1) -> None:
+        self.pruned_counts[(phase, filter_name)] += num_of_pruned
+
+    def record_candidates(self, phase: str, day, num_of_candidates: int) -> None:
+        key = (phase, day)
+        self.candidate_totals[key] += num_of_candidates
+        self.num_of_samples[key] += 1
+        if key not in self.candidate_mins or num_of_candidates < self.candidate_mins[key]:
+            self.candidate_mins[key] = num_of_candidates
+        if num_of_candidates == 0:
+            self.failure_counts[key] += 1
+
+    def to_dict(self) -> dict:
+        """
+        :return: JSONに変換可能な集計結果の辞書
+        """
+        days = []
+        for key in sorted(self.num_of_samples, key=lambda k: (k[0], k[1])):
+            phase, day = key
+            days.append({
+                'phase': phase,
+                'day': day.strftime('%Y-%m-%d'),
+                'samples': self.num_of_samples[key],
+                'avg_candidates': self.candidate_totals[key] / self.num_of_samples[key],
+                'min_candidates': self.candidate_mins[key],
+                'failures': self.failure_counts[key],
+            })
+        filters = [{'phase': phase, 'filter': filter_name, 'pruned': count}
+                   for (phase, filter_name), count in sorted(self.pruned_counts.items())]
+        return {'days': days, 'filters': filters}
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def write_sheet(self, wb, title: str = DIAGNOSTICS_SHEET_NAME) -> None:
+        """
+        集計結果をworkbookのシートに書き込む。同名のシートが存在する場合は置き換える。
+
+        :param wb: 書き込み先のworkbook
+        :param title: シート名
+        """
+        if title in wb.sheetnames:
+            wb.remove(wb[title])
+        ws = wb.create_sheet(title)
+        diagnostics = self.to_dict()
+        ws.append(['Phase', 'Date', 'Samples', 'Avg candidates', 'Min candidates', 'Failures'])
+        for d in diagnostics['days']:
+            ws.append([d['phase'], d['day'], d['samples'], d['avg_candidates'], d['min_candidates'],
+                       d['failures']])
+        ws.append([])
+        ws.append(['Phase', 'Filter', 'Pruned candidates'])
+        for f in diagnostics['filters']:
+            ws.append([f['phase'], f['filter'], f['pruned']])
@@ -2,7 +2,7 @@
 
 from datetime import datetime, timedelta
 from enum import Enum
-from openpyxl.worksheet.worksheet import Worksheet
+from typing import TYPE_CHECKING
 
 from monitors import ERole, MONITOR_ROLES_ALL, MONITOR_ROLES_AM, NOT_AT_OFFICE_ROLES, Monitor
 
@@ -10,13 +10,26 @@ from monitors import ERole, MONITOR_ROLES_ALL, MONITOR_ROLES_AM, NOT_AT_OFFICE_R
 FILTER_PRIORITY1 = 1
 FILTER_PRIORITY2 = 2
 
+if TYPE_CHECKING:
+    from openpyxl.worksheet.worksheet import Worksheet
+
 
 class FilterManager:
     _FILTER_DATA_ST_ROW_IDX = 7
 
-    def __init__(self, filter_cls, ws: Worksheet, name_col_idx: int, disable_col_idx: int):
+    def __init__(self, filter_cls, ws: 'Worksheet', name_col_idx: int, disable_col_idx: int, filters=None):
+        """
+        :param filter_cls: フィルタのEnumクラス
+        :param ws: filtersシート(Noneの場合はfiltersを使用する)
+        :param name_col_idx: フィルタ名の列インデックス
+        :param disable_col_idx: 無効フラグの列インデックス
+        :param filters: 有効なフィルタのEnumのIterable(wsがNoneの場合のみ使用する)
+        """
         self.filter_cls = filter_cls
         self.filters = set()
+        if ws is None:
+            self.filters.update(filters or ())
+            return
         for row in ws.iter_rows(min_row=FilterManager._FILTER_DATA_ST_ROW_IDX,
                                 min_col=name_col_idx, max_col=disable_col_idx):
             filter_name = row[0].value
@@ -31,9 +44,43 @@ class FilterManager:
                 if row[disable_col_idx - name_col_idx].value != 'Y':
                     self.filters.add(filter_enum)
 
-    def get_filters(self, monitors, day: datetime, filter_priority=FILTER_PRIORITY2):
+    def get_filters(self, monitors, day: datetime, filter_priority=FILTER_PRIORITY2, static=None):
+        """
+        指定日のフィルタ関数のlistを返す。
+
+        :param monitors: MonitorのIterable
+        :param day: 日付
+        :param filter_priority: フィルタ優先度(この値以下の優先度のフィルタを使用する)
+        :param static: Trueの場合は割り当て状況に依存しないフィルタのみ、Falseの場合は依存するフィルタのみを返す。
+                       Noneの場合は全てのフィルタを返す。
+        :return: フィルタ関数のlist
+        """
+        raise NotImplementedError
+
+    def get_filters_by_enum(self, monitors, day: datetime, filter_priority=FILTER_PRIORITY2, static=None):
+        """
+        指定日のフィルタ関数をフィルタ毎に分けて返す。
+        どのフィルタが何件の候補を除外したかを集計する場合に使用する。
+
+        :param monitors: MonitorのIterable
+        :param day: 日付
+        :param filter_priority: フィルタ優先度(この値以下の優先度のフィルタを使用する)
+        :param static: get_filtersと同じ
+        :return: フィルタ関数のlistの辞書(key:=フィルタのEnum, item:=フィルタ関数のlist)
+        """
         raise NotImplementedError
 
+    def get_filter_enums(self, filter_priority=FILTER_PRIORITY2, static=None) -> list:
+        """
+        有効なフィルタのうち、指定の条件を満たすフィルタのEnumのlistを返す。
+
+        :param filter_priority: フィルタ優先度(この値以下の優先度のフィルタを返す)
+        :param static: get_filtersと同じ
+        :return: フィルタのEnumのlist
+        """
+        return [filter_enum for filter_enum in self.filters
+                if filter_enum.priority <= filter_priority and (static is None or filter_enum.is_static == static)]
+
 
 def convert_str_to_filter(filter_cls, name: str):
     for e in filter_cls:
@@ -46,36 +93,79 @@ class RemoteFilterManager(FilterManager):
     _NAME_COL_IDX = 9
     _DISABLE_COL_IDX = 11
 
-    def __init__(self, ws, must_work_at_office_groups: list):
+    def __init__(self, ws, must_work_at_office_groups: list, filters=None):
         super().__init__(ERemoteFilters, ws,
-                         RemoteFilterManager._NAME_COL_IDX, RemoteFilterManager._DISABLE_COL_IDX)
+                         RemoteFilterManager._NAME_COL_IDX, RemoteFilterManager._DISABLE_COL_IDX, filters)
         self.must_work_at_office_groups = must_work_at_office_groups
 
-    def get_filters(self, monitors, day: datetime, filter_priority=FILTER_PRIORITY2):
+    def get_filters(self, monitors, day: datetime, filter_priority=FILTER_PRIORITY2, static=None):
         filters = []
-        for filter_enum in self.filters:
-            if filter_enum.priority <= filter_priority:
-                filters.extend(
-                    filter_enum.get_filters(monitors, day, self.must_work_at_office_groups))
+        for filter_enum in self.get_filter_enums(filter_priority, static):
+            filters.extend(
+                filter_enum.get_filters(monitors, day, self.must_work_at_office_groups))
         return filters
 
+    def get_filters_by_enum(self, monitors, day: datetime, filter_priority=FILTER_PRIORITY2, static=None):
+        return {filter_enum: filter_enum.get_filters(monitors, day, self.must_work_at_office_groups)
+                for filter_enum in self.get_filter_enums(filter_priority, static)}
+
 
 class MonitorFilterManager(FilterManager):
     _NAME_COL_IDX = 3
     _DISABLE_COL_IDX = 5
 
-    def __init__(self, ws):
+    def __init__(self, ws, filters=None):
         super().__init__(EMonitorComboFilters, ws,
-                         MonitorFilterManager._NAME_COL_IDX, MonitorFilterManager._DISABLE_COL_IDX)
+                         MonitorFilterManager._NAME_COL_IDX, MonitorFilterManager._DISABLE_COL_IDX, filters)
 
-    def get_filters(self, monitors, day, filter_priority=FILTER_PRIORITY2):
+    def get_filters(self, monitors, day, filter_priority=FILTER_PRIORITY2, static=None):
         filters = []
-        for monitors in monitors:
-            for filter_enum in self.filters:
-                if filter_enum.priority <= filter_priority:
-                    filters.extend(filter_enum.get_filters(monitors, day))
+        filter_enums = self.get_filter_enums(filter_priority, static)
+        for monitor in monitors:
+            for filter_enum in filter_enums:
+                filters.extend(self.get_monitor_filters(monitor, day, filter_enum))
         return filters
 
+    def get_filters_by_enum(self, monitors, day, filter_priority=FILTER_PRIORITY2, static=None):
+        filters_by_enum = {}
+        for filter_enum in self.get_filter_enums(filter_priority, static):
+            filters = []
+            for monitor in monitors:
+                filters.extend(self.get_monitor_filters(monitor, day, filter_enum))
+            filters_by_enum[filter_enum] = filters
+        return filters_by_enum
+
+    def get_monitor_filters(self, monitor: Monitor, day: datetime, filter_enum) -> list:
+        """
+        指定日の、1人の監視者に関するフィルタ関数のlistを返す。
+
+        :param monitor: 監視者
+        :param day: 日付
+        :param filter_enum: フィルタのEnum
+        :return: フィルタ関数のlist
+        """
+        return filter_enum.get_filters(monitor, day)
+
+
+class AmPairFilterManager(MonitorFilterManager):
+    """
+    AM1とAM2を区別しない監視の組み合わせ(AMの組)に対するフィルタ管理クラス。
+    MONITORING_MAXはAM1とAM2の合計の日数が上限の合計に達した監視者をAMから除外する。
+    その他の割り当て状況に依存するフィルタは元々AM1とAM2を同様に扱うため、MonitorFilterManagerと同じフィルタを使用する。
+    AM1とAM2のどちらに割り当てるかは、割り当て後にbalance_am_roles(am_balance.py)で決める。
+    """
+
+    def __init__(self, filter_manager: MonitorFilterManager):
+        """
+        :param filter_manager: AM1とAM2を区別するフィルタ管理クラス(有効なフィルタを引き継ぐ)
+        """
+        super().__init__(None, filter_manager.filters)
+
+    def get_monitor_filters(self, monitor: Monitor, day: datetime, filter_enum) -> list:
+        if filter_enum == EMonitorComboFilters.MONITORING_MAX:
+            return filter_am_pair_monitoring_max(monitor, day)
+        return super().get_monitor_filters(monitor, day, filter_enum)
+
 
 # Filters for remotes
 
@@ -137,18 +227,28 @@ def _create_monitor_filter(monitor_name: str, include: bool):
 
 
 class ERemoteFilters(Enum):
+    """
+    在宅勤務の割り当てのフィルタ。
+    値は(フィルタ優先度, フィルタ関数の生成関数, 割り当て状況に依存しないフィルタであるか)。
+    """
     REMOTE_2DAYS_IN_A_ROW = (FILTER_PRIORITY2, filter_remote_2days_in_a_row)
-    MUST_WORK_AT_OFFICE_GROUP = (FILTER_PRIORITY1, filter_must_work_at_office)
+    # 出社しない監視者は在宅勤務の割り当て前に確定しているため、割り当て状況に依存しない
+    MUST_WORK_AT_OFFICE_GROUP = (FILTER_PRIORITY1, filter_must_work_at_office, True)
     REMOTE_MAX = (FILTER_PRIORITY1, filter_remote_max)
 
-    def __init__(self, priority: int, filter_func):
+    def __init__(self, priority: int, filter_func, is_static: bool = False):
         self.__priority: int = priority
         self.__filter_func = filter_func
+        self.__is_static: bool = is_static
 
     @property
     def priority(self) -> int:
         return self.__priority
 
+    @property
+    def is_static(self) -> bool:
+        return self.__is_static
+
     def get_filters(self, monitors: list, day: datetime, must_work_at_office_groups: list):
         return self.__filter_func(monitors, day, must_work_at_office_groups)
 
@@ -184,6 +284,21 @@ def filter_monitoring_max(monitor: Monitor, day: datetime):
     return filters
 
 
+def filter_am_pair_monitoring_max(monitor: Monitor, day: datetime):
+    filters = []
+    filter_roles = []
+    # AM1とAM2のどちらかの上限が設定されていない場合は、もう一方の役割に割り当てられるため除外しない
+    am_maxes = [monitor.role_max.get(r) for r in MONITOR_ROLES_AM]
+    if None not in am_maxes and monitor.get_role_count(*MONITOR_ROLES_AM) >= sum(am_maxes):
+        filter_roles.extend(MONITOR_ROLES_AM)
+    if monitor.is_role_max(ERole.PM):
+        filter_roles.append(ERole.PM)
+    if filter_roles:
+        filters.append(
+            _create_monitor_combo_filter(monitor.name, include=False, roles=filter_roles))
+    return filters
+
+
 def filter_am_am_in_a_row(monitor: Monitor, day: datetime):
     filters = []
     pre_day = day - timedelta(days=1)
@@ -202,7 +317,7 @@ def filter_pm_am_in_a_row(monitor: Monitor, day: datetime):
     if monitor.schedule.get(pre_day) == ERole.PM:
         filters.append(_create_monitor_combo_filter(
             monitor.name, include=False, roles=MONITOR_ROLES_AM))
-    if monitor.schedule.get(next_day) == ERole.PM:
+    if monitor.schedule.get(next_day) in MONITOR_ROLES_AM:
         filters.append(_create_monitor_combo_filter(
             monitor.name, include=False, roles=[ERole.PM]))
     return filters
@@ -233,20 +348,30 @@ def _create_monitor_combo_filter(monitor_name: str, include: bool = True, roles=
 
 
 class EMonitorComboFilters(Enum):
-    MANUAL_INPUT = (FILTER_PRIORITY1, filter_manual_input)
+    """
+    監視の組み合わせのフィルタ。
+    値は(フィルタ優先度, フィルタ関数の生成関数, 割り当て状況に依存しないフィルタであるか)。
+    """
+    # 割り当て対象日の手動入力は割り当て中に変化しないため、割り当て状況に依存しない
+    MANUAL_INPUT = (FILTER_PRIORITY1, filter_manual_input, True)
     MONITORING_MAX = (FILTER_PRIORITY1, filter_monitoring_max)
     AM_AM_IN_A_ROW = (FILTER_PRIORITY2, filter_am_am_in_a_row)
     PM_AM_IN_A_ROW = (FILTER_PRIORITY2, filter_pm_am_in_a_row)
     PM_PM_IN_A_ROW = (FILTER_PRIORITY2, filter_pm_pm_in_a_row)
 
-    def __init__(self, priority, filter_func):
+    def __init__(self, priority, filter_func, is_static=False):
         self.__priority = priority
         self.__filter_func = filter_func
+        self.__is_static = is_static
 
     @property
     def priority(self):
         return self.__priority
 
+    @property
+    def is_static(self):
+        return self.__is_static
+
     def get_filters(self, monitor: Monitor, day: datetime):
         return self.__filter_func(monitor, day)
 
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque
+
+
+class MaxFlow:
+    """
+    最大流(Dinic法)。
+    辺の容量やフローを変更してから再度max_flowを呼び出すと、現在のフローから増加路を探して追加で流す。
+    """
+
+    def __init__(self, num_of_nodes: int):
+        """
+        :param num_of_nodes: 頂点数(頂点は0からnum_of_nodes-1の整数で表す)
+        """
+        # 頂点毎の出る辺のインデックスのlist(逆辺を含む)
+        self._graph: list = [[] for _ in range(num_of_nodes)]
+        # 辺の行き先の頂点。インデックスeの辺の逆辺はe ^ 1
+        self._to: list = []
+        # 辺の残余容量
+        self._cap: list = []
+
+    def add_edge(self, frm: int, to: int, capacity: int) -> int:
+        """
+        辺を追加する。
+
+        :param frm: 始点
+        :param to: 終点
+        :param capacity: 容量
+        :return: 辺のインデックス
+        """
+        edge = len(self._to)
+        self._graph[frm].append(edge)
+        self._to.append(to)
+        self._cap.append(capacity)
+        self._graph[to].append(edge + 1)
+        self._to.append(frm)
+        self._cap.append(0)
+        return edge
+
+    def get_flow(self, edge: int) -> int:
+        """
+        :param edge: 辺のインデックス
+        :return: 辺に流れているフロー
+        """
+        return self._cap[edge ^ 1]
+
+    def get_capacity(self, edge: int) -> int:
+        """
+        :param edge: 辺のインデックス
+        :return: 辺の容量
+        """
+        return self._cap[edge] + self._cap[edge ^ 1]
+
+    def set_capacity(self, edge: int, capacity: int) -> None:
+        """
+        辺の容量を変更する。
+
+        :param edge: 辺のインデックス
+        :param capacity: 容量(辺に流れているフロー以上であること)
+        :raises: ValueError: 容量が辺に流れているフローより小さい場合
+        """
+        if capacity < self.get_flow(edge):
+            raise ValueError(f'capacity {capacity} is less than flow {self.get_flow(edge)}.')
+        self._cap[edge] = capacity - self.get_flow(edge)
+
+    def cancel_flow(self, edge: int, amount: int = 1) -> None:
+        """
+        辺のフローを減らす。フロー保存則を保つため、経路上の全ての辺に対して呼び出すこと。
+
+        :param edge: 辺のインデックス
+        :param amount: 減らすフロー
+        """
+        self._cap[edge] += amount
+        self._cap[edge ^ 1] -= amount
+
+    def max_flow(self, s: int, t: int) -> int:
+        """
+        現在のフローに対して増加路がなくなるまでフローを流す。
+
+        :param s: 始点
+        :param t: 終点
+        :return: 追加で流したフロー
+        """
+        total = 0
+        while (level := self._bfs(s, t)) is not None:
+            it = [0] * len(self._graph)
+            while f := self._dfs(s, t, float('inf'), level, it):
+                total += f
+        return total
+
+    def _bfs(self, s: int, t: int):
+        level = [-1] * len(self._graph)
+        level[s] = 0
+        queue = deque([s])
+        while queue:
+            v = queue.popleft()
+            for edge in self._graph[v]:
+                if self._cap[edge] > 0 and level[self._to[edge]] < 0:
+                    level[self._to[edge]] = level[v] + 1
+                    queue.append(self._to[edge])
+        return level if level[t] >= 0 else None
+
+    def _dfs(self, v: int, t: int, f, level: list, it: list):
+        # 再帰の深さは頂点数で抑えられる
+        if v == t:
+            return f
+        while it[v] < len(self._graph[v]):
+            edge = self._graph[v][it[v]]
+            to = self._to[edge]
+            if self._cap[edge] > 0 and level[v] < level[to]:
+                if d := self._dfs(to, t, min(f, self._cap[edge]), level, it):
+                    self._cap[edge] -= d
+                    self._cap[edge ^ 1] += d
+                    return d
+            it[v] += 1
+        return 0
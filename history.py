@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+from contextlib import contextmanager
+from datetime import date
+import json
+import mmap
+import os
+import sys
+
+from monitors import ERole
+
+HISTORY_VERSION = 1
+META_FILE_NAME = 'meta.json'
+MONITORS_FILE_NAME = 'monitors.txt'
+# key:=列名, item:=tuple(ファイル名, arrayの型コード)
+COLUMNS = {
+    'day': ('days.u32', 'I'),          # 日付(date.toordinal())
+    'monitor': ('monitors.u16', 'H'),  # 監視者ID(monitors.txtの行番号)
+    'role': ('roles.u8', 'B'),         # 役割コード(meta.jsonのrolesのインデックス)
+}
+
+
+class ScheduleHistory:
+    """
+    過去の割り当て結果を、監視者・日付毎に1行として列毎のファイルに追記して保存する履歴。
+    各列は固定長の数値の配列で、読み込み時はmmapで参照するためExcelを開かずに集計できる。
+    同じ監視者・日付の行が複数ある場合は後から追記した行を有効とする。
+    追記が途中で中断された場合は、最も短い列の行数までを有効とする。
+
+    ディレクトリ構成:
+        meta.json: バージョン、バイトオーダー、役割コードと役割名の対応
+        monitors.txt: 監視者名(1行1名、行番号が監視者ID)
+        days.u32, monitors.u16, roles.u8: 列毎の配列
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: 履歴を保存するディレクトリ(存在しない場合は作成する)
+        :raises: ValueError: 対応していないバージョンやバイトオーダーの履歴の場合
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, META_FILE_NAME)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != HISTORY_VERSION:
+                raise ValueError(f'Unsupported history version: {meta.get("version")}')
+            if meta.get('byteorder') != sys.byteorder:
+                raise ValueError(f'Unsupported history byteorder: {meta.get("byteorder")}')
+        else:
+            meta = {'version': HISTORY_VERSION, 'byteorder': sys.byteorder, 'roles': [r.name for r in ERole]}
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        # 役割コードのlist(インデックス:=役割コード, item:=ERole。現在のERoleに無い役割はNone)
+        self._roles: list = [ERole.__members__.get(name) for name in meta['roles']]
+        # 監視者名のlist(インデックス:=監視者ID)
+        self._names: list = []
+        monitors_path = os.path.join(directory, MONITORS_FILE_NAME)
+        if os.path.exists(monitors_path):
+            with open(monitors_path, encoding='utf-8') as f:
+                self._names = [line.rstrip('\n') for line in f]
+
+    def __len__(self):
+        return min([self._get_column_size(column) for column in COLUMNS])
+
+    def append(self, monitor_dict: dict, days) -> int:
+        """
+        指定日の割り当て結果を履歴に追記する。役割が設定されていない日は追記しない。
+
+        :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+        :param days: 追記する日付のIterable
+        :return: 追記した行数
+        """
+        role_codes = {role: code for code, role in enumerate(self._roles) if role is not None}
+        monitor_ids = self._get_monitor_ids(monitor_dict)
+        columns = {column: array(type_code) for column, (_, type_code) in COLUMNS.items()}
+        for day in days:
+            for name, monitor in monitor_dict.items():
+                if (role := monitor.schedule.get(day)) is None:
+                    continue
+                columns['day'].append(day.toordinal())
+                columns['monitor'].append(monitor_ids[name])
+                columns['role'].append(role_codes[role])
+
+        # 中断された追記の続きに書き込まないよう、最も短い列の長さに揃えてから追記する
+        num_of_rows = len(self)
+        for column, (file_name, type_code) in COLUMNS.items():
+            with open(os.path.join(self.directory, file_name), 'ab') as f:
+                f.truncate(num_of_rows * array(type_code).itemsize)
+                columns[column].tofile(f)
+        return len(columns['day'])
+
+    def get_role_counts(self, start: date = None, end: date = None, roles=None) -> dict:
+        """
+        期間内の役割毎の割り当て日数を集計する。
+
+        :param start: 期間の開始日(この日を含む。Noneの場合は最初から)
+        :param end: 期間の終了日(この日を含まない。Noneの場合は最後まで)
+        :param roles: 集計する役割のIterable(Noneの場合は全ての役割)
+        :return: 役割毎の割り当て日数の辞書(key:=name, item:=dict(key:=ERole, item:=日数))
+        """
+        roles = tuple(ERole) if roles is None else tuple(roles)
+        start_ordinal = start.toordinal() if start else 0
+        end_ordinal = end.toordinal() if end else sys.maxsize
+        # key:=tuple(監視者ID, 日付), item:=役割コード
+        latest_roles = {}
+        num_of_rows = len(self)
+        with self._open_column('day') as day_col, self._open_column('monitor') as monitor_col, \
+                self._open_column('role') as role_col:
+            for idx in range(num_of_rows):
+                if start_ordinal <= (day := day_col[idx]) < end_ordinal:
+                    latest_roles[(monitor_col[idx], day)] = role_col[idx]
+
+        role_counts = {name: {role: 0 for role in roles} for name in self._names}
+        for (monitor_id, _), role_code in latest_roles.items():
+            if (role := self._roles[role_code]) in role_counts[self._names[monitor_id]]:
+                role_counts[self._names[monitor_id]][role] += 1
+        return role_counts
+
+    def get_recent_role_counts(self, before: date, months: int, roles=None) -> dict:
+        """
+        指定日の月の前のmonths月間の役割毎の割り当て日数を集計する。
+        例: beforeが2020/8/3、monthsが3の場合は2020/5/1から2020/7/31までを集計する。
+
+        :param before: この日の月より前を集計する
+        :param months: 集計する月数
+        :param roles: 集計する役割のIterable(Noneの場合は全ての役割)
+        :return: 役割毎の割り当て日数の辞書(key:=name, item:=dict(key:=ERole, item:=日数))
+        """
+        end = date(before.year, before.month, 1)
+        month_idx = end.year * 12 + end.month - 1 - months
+        start = date(month_idx // 12, month_idx % 12 + 1, 1)
+        return self.get_role_counts(start, end, roles)
+
+    def _get_monitor_ids(self, monitor_dict: dict) -> dict:
+        new_names = [name for name in monitor_dict if name not in self._names]
+        if new_names:
+            with open(os.path.join(self.directory, MONITORS_FILE_NAME), 'a', encoding='utf-8') as f:
+                f.writelines([f'{name}\n' for name in new_names])
+            self._names.extend(new_names)
+        return {name: self._names.index(name) for name in monitor_dict}
+
+    def _get_column_size(self, column: str) -> int:
+        file_name, type_code = COLUMNS[column]
+        path = os.path.join(self.directory, file_name)
+        if not os.path.exists(path):
+            return 0
+        return os.path.getsize(path) // array(type_code).itemsize
+
+    @contextmanager
+    def _open_column(self, column: str):
+        """
+        列のファイルをmmapで開き、数値のmemoryviewを返す。
+        """
+        file_name, type_code = COLUMNS[column]
+        if not self._get_column_size(column):
+            yield memoryview(array(type_code))
+            return
+        with open(os.path.join(self.directory, file_name), 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # 追記中の端数のバイトは除く
+            size = len(mm) // array(type_code).itemsize * array(type_code).itemsize
+            views = [memoryview(mm)]
+            views.append(views[-1][:size])
+            views.append(views[-1].cast(type_code))
+            try:
+                yield views[-1]
+            finally:
+                # mmapを閉じる前に全てのmemoryviewを解放する
+                for view in reversed(views):
+                    view.release()
@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 
 from enum import Enum, IntEnum, auto
-from openpyxl.workbook import Workbook
 import random
+from typing import TYPE_CHECKING
+
+from flow import MaxFlow
+
+if TYPE_CHECKING:
+    from openpyxl.workbook import Workbook
 
 
 class EMonitorsColIdx(IntEnum):
@@ -36,6 +41,10 @@ MONITOR_ROLES_AM = {ERole.AM1, ERole.AM2, }
 NOT_AT_OFFICE_ROLES = {ERole.R, ERole.OTHER, }
 OUTPUT_ROLES = {r for r in ERole if r != ERole.OTHER}
 
+# フローネットワークの始点と終点
+_SOURCE = 0
+_SINK = 1
+
 
 class Monitor:
     """監視者情報クラス"""
@@ -45,7 +54,7 @@ class Monitor:
         self.is_fix_specialist: bool = is_fix_specialist
         # 日付ごとの役割(key: datetime.datetime, item: ERole)
         self.schedule: dict = {}
-        # 役割毎の最大割り当て数(key: ERole, item: max)
+        # 役割毎の最大割り当て数(key: ERole, item: max。keyが無い役割は上限なし、0の役割は割り当てない)
         self.role_max: dict = {}
 
     @property
@@ -58,12 +67,12 @@ class Monitor:
     def is_role_max(self, role: ERole) -> bool:
         """
         この監視者に割り当てられた役割の日数が設定された上限値に達しているかを判定する。
-        役割に上限が設定されていなかった場合はFalseを返す。
+        役割に上限が設定されていなかった場合はFalseを返す。上限値が0の場合は常にTrueを返す。
 
         :param role: 役割
         :return: この監視者に割り当てられた役割の日数が設定された上限値に達している場合はTrue
         """
-        if max_count := self.role_max.get(role):
+        if (max_count := self.role_max.get(role)) is not None:
             return len([r for r in self.schedule.values() if r == role]) >= max_count
         return False
 
@@ -86,7 +95,7 @@ class Monitor:
         return cp
 
 
-def load_monitors_info(wb: Workbook, **config):
+def load_monitors_info(wb: 'Workbook', **config):
     """
     Excelから監視者情報をよみこむ
 
@@ -114,16 +123,25 @@ def load_monitors_info(wb: Workbook, **config):
     return monitor_dict, must_work_at_office_groups
 
 
-def assign_role_maxes(monitor_dict: dict, roles, days: int) -> None:
+def assign_role_maxes(monitor_dict: dict, roles, days: int, carried_counts: dict = None, weekdays=None) -> None:
     """
     各監視者に割り当てられた役割の日数の上限値の合計が等しくなるようにランダムに上限を設定する。
     合計値の差は最大1とする。
+    carried_countsが指定された場合、上限値が1多くなる監視者はこれまでの割り当て日数が少ない監視者から選ぶ。
+    weekdaysが指定された場合は、休暇等で割り当てられない日や手動で入力された役割を考慮して上限を設定する
+    (_assign_available_role_maxesを参照)。
 
     :param monitor_dict: 上限を設定するMonitorの辞書(key:=MonitorName, Item:=Monitor)
     :param roles: ERoleのIterable
     :param days: 割り当て日数
+    :param carried_counts: これまでの期間の役割毎の割り当て日数の辞書(key:=MonitorName, item:=dict(key:=ERole, item:=日数))
+    :param weekdays: 割り当てを行う営業日のIterable
     :return: None
     """
+    if weekdays is not None:
+        _assign_available_role_maxes(monitor_dict, roles, weekdays, carried_counts)
+        return
+
     num_of_monitors = len(monitor_dict)
     min_max_cnt = int(days / num_of_monitors)  # 最小の最大割り当て日数
     num_of_hi_freq_monitors = days % num_of_monitors
@@ -135,8 +153,11 @@ def assign_role_maxes(monitor_dict: dict, roles, days: int) -> None:
         return
 
     monitor_names = monitor_dict.keys()
-    hi_freq_monitor_names = set(random.sample(monitor_names, num_of_hi_freq_monitors))
+    hi_freq_monitor_names = set(random.sample(sorted(monitor_names), num_of_hi_freq_monitors))
     for role in roles:
+        if carried_counts:
+            hi_freq_monitor_names = _find_lower_carried_frequency(
+                monitors, num_of_hi_freq_monitors, carried_counts, role)
         for monitor_name in hi_freq_monitor_names:
             monitor_dict[monitor_name].role_max[role] = min_max_cnt + 1
 
@@ -176,7 +197,7 @@ def _find_lower_frequency(monitors, find_num):
     monitor_name_set -= tmp_monitor_name_set
     # returns tmp_monitor_set and selected monitors from monitor_set at random
     monitor_name_set = tmp_monitor_name_set | set(
-        random.sample(monitor_name_set, find_num - len(tmp_monitor_name_set)))
+        random.sample(sorted(monitor_name_set), find_num - len(tmp_monitor_name_set)))
     return monitor_name_set
 
 
@@ -184,14 +205,163 @@ def _monitor_sort_func(monitor: Monitor):
     return monitor.sum_max_monitor_count
 
 
-def assign_remote_max(monitor_dict: dict, days: int, max_num_of_remotes_per_day: int = 2) -> None:
+def _find_lower_carried_frequency(monitors, find_num, carried_counts: dict, role: ERole):
+    """
+    今回の期間の監視当番数の上限の合計が少ない監視者を優先し、
+    同値の場合はこれまでの期間の監視当番数の合計、指定役割の日数が少ない監視者の順に選ぶ。
+    それでも同値の場合はランダムに選ぶ。
+
+    :param monitors: MonitorのIterable
+    :param find_num: 検索する監視者数
+    :param carried_counts: これまでの期間の役割毎の割り当て日数の辞書(key:=MonitorName, item:=dict(key:=ERole, item:=日数))
+    :param role: 上限を設定する役割
+    :return: 監視当番数の合計が少ない監視者名のset
+    """
+    def sort_func(monitor: Monitor):
+        counts = carried_counts.get(monitor.name, {})
+        return (monitor.sum_max_monitor_count, sum([counts.get(r, 0) for r in MONITOR_ROLES_ALL]),
+                counts.get(role, 0), random.random())
+
+    return {monitor.name for monitor in sorted(monitors, key=sort_func)[:find_num]}
+
+
+def _assign_available_role_maxes(monitor_dict: dict, roles, weekdays, carried_counts: dict = None) -> None:
+    """
+    休暇等で割り当てられない日と手動で入力された役割を考慮して、役割毎の上限を設定する。
+    1. 監視者毎の監視当番の合計日数を、監視者→日のフロー(監視者は空いている日にのみ、1日1役割まで)で割り当て可能な
+       範囲で、割り当てられる日数に対する合計の割合が小さい監視者から1日ずつ増やして決める。
+       増やせない監視者はそれ以上増やさない。
+    2. 合計日数を監視者→役割のフローで役割毎に分配する。各役割の上限の合計は営業日数に等しくなり、
+       監視者毎の各役割の上限の差はなるべく1以内とする。
+    手動で入力された役割の日数は上限の下限とする。
+    carried_countsが指定された場合、同値の監視者はこれまでの割り当て日数が少ない監視者を優先する。
+
+    :param monitor_dict: 上限を設定するMonitorの辞書(key:=MonitorName, Item:=Monitor)
+    :param roles: ERoleのIterable
+    :param weekdays: 割り当てを行う営業日のIterable
+    :param carried_counts: これまでの期間の役割毎の割り当て日数の辞書(key:=MonitorName, item:=dict(key:=ERole, item:=日数))
+    :return: None
+    """
+    roles = sorted(roles, key=lambda r: r.value)
+    weekdays = list(weekdays)
+    carried_counts = carried_counts or {}
+    names = list(monitor_dict)
+    # key:=name, item:=dict(key:=ERole, item:=手動で入力された日数)
+    manual_counts = {name: {role: 0 for role in roles} for name in names}
+    for name, monitor in monitor_dict.items():
+        for day in weekdays:
+            if (role := monitor.schedule.get(day)) in manual_counts[name]:
+                manual_counts[name][role] += 1
+
+    total_counts = _find_available_total_counts(monitor_dict, roles, weekdays, manual_counts, carried_counts)
+    role_maxes = _distribute_role_counts(names, roles, len(weekdays), manual_counts, total_counts, carried_counts)
+    for name, role_max in role_maxes.items():
+        monitor_dict[name].role_max.update(role_max)
+
+
+def _find_available_total_counts(monitor_dict: dict, roles, weekdays, manual_counts: dict,
+                                 carried_counts: dict) -> dict:
+    """
+    source → 監視者(容量:手動入力以外の監視当番日数) → 日(容量1:空いている日のみ) → sink(容量:その日の残りの役割数)
+    のフローで、割り当てられる日数に対する合計の割合が小さい監視者の容量から1ずつ増やし、増加路がある場合のみ採用する。
+
+    :return: 監視当番の合計日数の辞書(key:=name, item:=日数)
+    """
+    names = list(monitor_dict)
+    random.shuffle(names)
+    flow = MaxFlow(2 + len(names) + len(weekdays))
+    monitor_edges = {name: flow.add_edge(_SOURCE, idx, 0) for idx, name in enumerate(names, 2)}
+    required_flow = 0
+    for day_node, day in enumerate(weekdays, 2 + len(names)):
+        roles_of_day = [m.schedule.get(day) for m in monitor_dict.values()]
+        if (num_of_roles := len(roles) - len([r for r in roles_of_day if r in roles])) <= 0:
+            continue
+        required_flow += num_of_roles
+        flow.add_edge(day_node, _SINK, num_of_roles)
+        for monitor_node, name in enumerate(names, 2):
+            if monitor_dict[name].schedule.get(day) is None:
+                flow.add_edge(monitor_node, day_node, 1)
+
+    total_counts = {name: sum(manual_counts[name].values()) for name in names}
+    # 監視当番を割り当てられる日数(空いている日と手動で監視当番が入力された日)
+    available_days = {}
+    for name in names:
+        free_days = [day for day in weekdays if monitor_dict[name].schedule.get(day) is None]
+        available_days[name] = total_counts[name] + len(free_days)
+    active_names = {name for name in names if available_days[name]}
+    current_flow = 0
+    while current_flow < required_flow and active_names:
+        name = min(active_names, key=lambda n: (
+            total_counts[n] / available_days[n], sum([carried_counts.get(n, {}).get(r, 0) for r in roles]),
+            random.random()))
+        edge = monitor_edges[name]
+        flow.set_capacity(edge, flow.get_capacity(edge) + 1)
+        if flow.max_flow(_SOURCE, _SINK):
+            current_flow += 1
+            total_counts[name] += 1
+        else:
+            # 増加路が無い場合、この監視者の日数はこれ以上増やせない
+            flow.set_capacity(edge, flow.get_capacity(edge) - 1)
+            active_names.remove(name)
+    return total_counts
+
+
+def _distribute_role_counts(names, roles, days: int, manual_counts: dict, total_counts: dict,
+                            carried_counts: dict) -> dict:
+    """
+    source → 監視者(容量:手動入力以外の合計日数) → 役割(容量:上限の候補) → sink(容量:手動入力以外の役割の日数)
+    のフローで合計日数を役割毎に分配する。上限の候補は合計日数を役割数で割った値(切り捨て)から始め、
+    これまでの役割の日数が少ない監視者から1ずつ増やす。
+
+    :return: 役割毎の上限の辞書(key:=name, item:=dict(key:=ERole, item:=上限))
+    """
+    flow = MaxFlow(2 + len(names) + len(roles))
+    role_nodes = {role: idx for idx, role in enumerate(roles, 2 + len(names))}
+    required_flow = 0
+    for role in roles:
+        num_of_days = max(days - sum([manual_counts[name][role] for name in names]), 0)
+        required_flow += num_of_days
+        flow.add_edge(role_nodes[role], _SINK, num_of_days)
+    # key:=(name, role), item:=監視者→役割の辺
+    role_edges = {}
+    for monitor_node, name in enumerate(names, 2):
+        flow.add_edge(_SOURCE, monitor_node, total_counts[name] - sum(manual_counts[name].values()))
+        base_count = total_counts[name] // len(roles)
+        for role in roles:
+            role_edges[(name, role)] = flow.add_edge(
+                monitor_node, role_nodes[role], max(base_count - manual_counts[name][role], 0))
+
+    current_flow = flow.max_flow(_SOURCE, _SINK)
+    while current_flow < required_flow:
+        sorted_keys = sorted(role_edges, key=lambda k: (
+            flow.get_capacity(role_edges[k]) + manual_counts[k[0]][k[1]], carried_counts.get(k[0], {}).get(k[1], 0),
+            random.random()))
+        for key in sorted_keys:
+            edge = role_edges[key]
+            flow.set_capacity(edge, flow.get_capacity(edge) + 1)
+            if added_flow := flow.max_flow(_SOURCE, _SINK):
+                current_flow += added_flow
+                break
+            flow.set_capacity(edge, flow.get_capacity(edge) - 1)
+        else:
+            # 合計日数が役割の日数に足りない(割り当てられない日がある)場合
+            break
+
+    return {name: {role: flow.get_flow(role_edges[(name, role)]) + manual_counts[name][role] for role in roles}
+            for name in names}
+
+
+def assign_remote_max(monitor_dict: dict, days: int, max_num_of_remotes_per_day: int = 2,
+                      carried_counts: dict = None) -> None:
     """
     在宅勤務日数の上限を均等に割り振る。
     手動での在宅勤務日数の最大値の読み取りや、休暇や不在の予定の読み取りは完了後に呼び出されることを前提としている。
+    carried_countsが指定された場合、上限値が1多くなる監視者はこれまでの在宅勤務日数が少ない監視者から選ぶ。
 
     :param monitor_dict: 在宅勤務日数の上限を設定するMonitorの辞書(key:=MonitorName, Item:=Monitor)
     :param days: 割り当て日数
     :param max_num_of_remotes_per_day: 1日の在宅勤務者の最大人数(default=2)
+    :param carried_counts: これまでの期間の役割毎の割り当て日数の辞書(key:=MonitorName, item:=dict(key:=ERole, item:=日数))
     :return: None
     """
     manually_assigned_monitors = []
@@ -199,7 +369,7 @@ def assign_remote_max(monitor_dict: dict, days: int, max_num_of_remotes_per_day:
     manual_remote_max = 0
     not_work_at_office_days = 0
     for monitor in monitor_dict.values():
-        if remote_max := monitor.role_max.get(ERole.R):
+        if (remote_max := monitor.role_max.get(ERole.R)) is not None:
             manually_assigned_monitors.append(monitor)
             manual_remote_max += remote_max
         else:
@@ -218,7 +388,12 @@ def assign_remote_max(monitor_dict: dict, days: int, max_num_of_remotes_per_day:
         _set_remote_max(not_manually_assigned_monitors, min_remote_max)
         return
 
-    hi_freq_ms_list = random.sample(not_manually_assigned_monitors, num_of_hi_freq_monitors)
+    if carried_counts:
+        hi_freq_ms_list = sorted(
+            not_manually_assigned_monitors,
+            key=lambda m: (carried_counts.get(m.name, {}).get(ERole.R, 0), random.random()))[:num_of_hi_freq_monitors]
+    else:
+        hi_freq_ms_list = random.sample(not_manually_assigned_monitors, num_of_hi_freq_monitors)
     _set_remote_max(hi_freq_ms_list, min_remote_max + 1)
     lo_freq_ms_list = [monitor for monitor in not_manually_assigned_monitors
                        if monitor not in hi_freq_ms_list]
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+from contextlib import nullcontext
+import os
+import sys
+import threading
+import time
+
+PROFILE_DETERMINISTIC = 'deterministic'
+PROFILE_SAMPLING = 'sampling'
+PROFILE_MODES = (PROFILE_DETERMINISTIC, PROFILE_SAMPLING, )
+PHASE_OUTPUT = 'OUTPUT'
+# 在宅勤務の上限の設定(進捗はPHASE_REMOTEとして通知する)
+PHASE_REMOTE_MAX = 'REMOTE_MAX'
+COLLAPSED_FILE_SUFFIX = '.collapsed'
+DEFAULT_SAMPLING_INTERVAL = 0.005
+
+
+class PhaseProfiler:
+    """
+    スケジュール作成の処理の段階(phase)毎にプロファイルを取るクラス。
+    同じ段階を複数回計測した場合は結果を合算する。
+    結果はflamegraph.pl等で使用できるcollapsed形式(呼び出し元から順に;で区切った関数名と値の行)で出力する。
+
+    deterministic: sys.setprofileで全ての呼び出しを記録する。値は関数自身の実行時間(マイクロ秒)。
+                   オーバーヘッドが大きいため、実行時間は実際より長くなる。
+    sampling: 別スレッドからinterval秒毎に計測中のスレッドの呼び出し履歴を取得する。値はサンプル数。
+    """
+
+    def __init__(self, mode: str = PROFILE_DETERMINISTIC, interval: float = DEFAULT_SAMPLING_INTERVAL):
+        """
+        :param mode: PROFILE_DETERMINISTIC or PROFILE_SAMPLING
+        :param interval: samplingの場合のサンプリング間隔(秒)
+        :raises: ValueError: 対応していないmodeの場合
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f'Unsupported profile mode: {mode}')
+        self.mode: str = mode
+        self.interval: float = interval
+        # key:=phase, item:=Counter(key:=呼び出し履歴の関数名のtuple, item:=値)
+        self.stacks: dict = {}
+        # key:=phase, item:=経過時間(秒)の合計
+        self.elapsed_times: Counter = Counter()
+
+    def phase(self, name: str):
+        """
+        with文で囲んだ処理を指定の段階として計測する。
+
+        :param name: 段階の名前(PHASE_*等)
+        :return: context manager
+        """
+        return _ProfiledPhase(self, name)
+
+    def write(self, directory) -> list:
+        """
+        段階毎にcollapsed形式のファイル(<phase>.collapsed)を書き込む。
+
+        :param directory: 出力先のディレクトリ(存在しない場合は作成する)
+        :return: 書き込んだファイルのパスのlist
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, stacks in self.stacks.items():
+            path = os.path.join(directory, f'{name}{COLLAPSED_FILE_SUFFIX}')
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, value in sorted(stacks.items()):
+                    if value > 0:
+                        f.write(f'{";".join((name, ) + stack)} {value}\n')
+            paths.append(path)
+        return paths
+
+    def print_summary(self, file=sys.stderr) -> None:
+        """
+        段階毎の経過時間を出力する。
+        """
+        for name, elapsed in self.elapsed_times.items():
+            print(f'{name}: {elapsed:.3f}s', file=file)
+
+
+def profile_phase(profiler: PhaseProfiler, name: str):
+    """
+    profilerが指定された場合は段階を計測し、Noneの場合は何もしないcontext managerを返す。
+
+    :param profiler: PhaseProfiler or None
+    :param name: 段階の名前
+    :return: context manager
+    """
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
+
+
+class _ProfiledPhase:
+    def __init__(self, profiler: PhaseProfiler, name: str):
+        self._profiler = profiler
+        self._name = name
+        self._stacks = profiler.stacks.setdefault(name, Counter())
+        self._st = 0.
+        # deterministic: 計測開始後に呼び出された関数名のlist
+        self._call_stack: list = []
+        self._last_ns = 0
+        # deterministic: 計測開始前に設定されていたプロファイル関数(終了時に戻す)
+        self._prev_profile = None
+        # sampling
+        self._stop_event = threading.Event()
+        self._sampler = None
+
+    def __enter__(self):
+        self._st = time.perf_counter()
+        if self._profiler.mode == PROFILE_DETERMINISTIC:
+            self._last_ns = time.perf_counter_ns()
+            self._prev_profile = sys.getprofile()
+            sys.setprofile(self._on_event)
+        else:
+            # with文を含む関数より呼び出し元はサンプルに含めない
+            base_frame = sys._getframe(1)
+            self._sampler = threading.Thread(
+                target=self._sample, args=(threading.get_ident(), base_frame), daemon=True)
+            self._sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._profiler.mode == PROFILE_DETERMINISTIC:
+            sys.setprofile(self._prev_profile)
+        else:
+            self._stop_event.set()
+            self._sampler.join()
+        self._profiler.elapsed_times[self._name] += time.perf_counter() - self._st
+        return False
+
+    def _on_event(self, frame, event, arg):
+        now_ns = time.perf_counter_ns()
+        if self._call_stack:
+            self._stacks[tuple(self._call_stack)] += (now_ns - self._last_ns) // 1000
+        if event == 'call':
+            self._call_stack.append(_get_frame_label(frame))
+        elif event == 'c_call':
+            self._call_stack.append(_get_c_function_label(arg))
+        elif self._call_stack:
+            # return, c_return, c_exception (計測開始前に呼び出された関数のreturnは無視する)
+            self._call_stack.pop()
+        # 記録の処理時間は含めない
+        self._last_ns = time.perf_counter_ns()
+
+    def _sample(self, thread_id: int, base_frame):
+        while not self._stop_event.wait(self._profiler.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None and frame is not base_frame:
+                stack.append(_get_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self._stacks[tuple(reversed(stack))] += 1
+
+
+def _get_frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{os.path.basename(code.co_filename)}:{getattr(code, "co_qualname", code.co_name)}'
+
+
+def _get_c_function_label(func) -> str:
+    if module := getattr(func, '__module__', None):
+        return f'{module}.{getattr(func, "__qualname__", func)}'
+    return str(getattr(func, '__qualname__', func))
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+import queue
+import threading
+import time
+
+PHASE_LOAD = 'LOAD'
+PHASE_ROLE_MAX = 'ROLE_MAX'
+PHASE_MONITOR = 'MONITOR'
+PHASE_REMOTE = 'REMOTE'
+PHASE_SAVE = 'SAVE'
+PHASE_DONE = 'DONE'
+
+STATUS_STARTED = 'STARTED'
+STATUS_ATTEMPT = 'ATTEMPT'
+STATUS_FOUND = 'FOUND'
+STATUS_NOT_FOUND = 'NOT_FOUND'
+STATUS_CANCELLED = 'CANCELLED'
+
+
+class ScheduleCancelledException(Exception):
+    """スケジュール作成がキャンセルされた場合に送出される例外"""
+    def __init__(self, message: str = 'Scheduling was cancelled.'):
+        super().__init__(message)
+        self.message = message
+
+
+class CancelToken:
+    """
+    スケジュール作成を協調的にキャンセルするためのトークン。
+    割り当て処理は試行の合間にトークンを確認し、キャンセルされていれば処理を中断する。
+    stopが要求された場合は例外を送出せず、それまでに得られた最良の結果で処理を終える。
+    別スレッドやprogressのcallbackからcancel, stopを呼び出すことができる。
+    """
+
+    def __init__(self):
+        self._cancel_event = threading.Event()
+        self._stop_event = threading.Event()
+
+    def cancel(self) -> None:
+        """キャンセルを要求する"""
+        self._cancel_event.set()
+
+    def stop(self) -> None:
+        """現時点で最良の結果での終了を要求する"""
+        self._stop_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        """
+        :return: キャンセルが要求されている場合はTrue
+        """
+        return self._cancel_event.is_set()
+
+    @property
+    def is_stop_requested(self) -> bool:
+        """
+        :return: 最良の結果での終了が要求されている場合はTrue
+        """
+        return self._stop_event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        """
+        :raises: ScheduleCancelledException: キャンセルが要求されている場合
+        """
+        if self._cancel_event.is_set():
+            raise ScheduleCancelledException()
+
+
+class ProgressEvent:
+    """スケジュール作成の進捗イベント"""
+
+    def __init__(self, phase: str, status: str = STATUS_STARTED, attempt: int = 0,
+                 best_num_of_unassigned_days: int = None, max_num_of_remotes_per_day: int = None,
+                 filter_priority: int = None, elapsed: float = 0.0):
+        # 処理の段階(PHASE_*)
+        self.phase: str = phase
+        # 状態(STATUS_*)
+        self.status: str = status
+        # 試行回数(1始まり。試行を伴わないイベントでは0)
+        self.attempt: int = attempt
+        # この段階でこれまでに得られた最少の未割当日数
+        self.best_num_of_unassigned_days: int = best_num_of_unassigned_days
+        # 1日の在宅勤務の割り当て人数(在宅勤務の割り当て時のみ)
+        self.max_num_of_remotes_per_day: int = max_num_of_remotes_per_day
+        # フィルタ優先度
+        self.filter_priority: int = filter_priority
+        # スケジュール作成開始からの経過秒数
+        self.elapsed: float = elapsed
+
+    def __repr__(self):
+        return (f'ProgressEvent({self.phase}, {self.status}, attempt={self.attempt}, '
+                f'best_num_of_unassigned_days={self.best_num_of_unassigned_days}, '
+                f'max_num_of_remotes_per_day={self.max_num_of_remotes_per_day}, '
+                f'filter_priority={self.filter_priority}, elapsed={self.elapsed:.3f})')
+
+
+class ProgressReporter:
+    """
+    割り当て処理の進捗をcallbackへ通知し、キャンセルを確認するクラス。
+    未割当日数の最少値は(段階, フィルタ優先度, 1日の在宅勤務の割り当て人数)ごとに保持する。
+    """
+
+    def __init__(self, on_progress=None, cancel_token: CancelToken = None):
+        """
+        :param on_progress: ProgressEventを受け取るcallable(Noneの場合は通知しない)
+        :param cancel_token: キャンセル用トークン
+        """
+        self.on_progress = on_progress
+        self.cancel_token: CancelToken = cancel_token
+        self._st = time.perf_counter()
+        # key:=(phase, filter_priority, max_num_of_remotes_per_day), item:=最少の未割当日数
+        self._best_num_of_unassigned_days = {}
+
+    @property
+    def is_stop_requested(self) -> bool:
+        """
+        :return: 最良の結果での終了が要求されている場合はTrue
+        """
+        return self.cancel_token is not None and self.cancel_token.is_stop_requested
+
+    def report(self, phase: str, status: str = STATUS_ATTEMPT, attempt: int = 0,
+               num_of_unassigned_days: int = None, max_num_of_remotes_per_day: int = None,
+               filter_priority: int = None) -> None:
+        """
+        進捗を通知し、キャンセルされていれば例外を送出する。
+
+        :param phase: 処理の段階(PHASE_*)
+        :param status: 状態(STATUS_*)
+        :param attempt: 試行回数
+        :param num_of_unassigned_days: 今回の試行の未割当日数
+        :param max_num_of_remotes_per_day: 1日の在宅勤務の割り当て人数
+        :param filter_priority: フィルタ優先度
+        :raises: ScheduleCancelledException: キャンセルが要求されている場合
+        """
+        key = (phase, filter_priority, max_num_of_remotes_per_day)
+        best = self._best_num_of_unassigned_days.get(key)
+        if num_of_unassigned_days is not None and (best is None or num_of_unassigned_days < best):
+            best = num_of_unassigned_days
+            self._best_num_of_unassigned_days[key] = best
+        if self.on_progress:
+            self.on_progress(ProgressEvent(phase, status, attempt, best, max_num_of_remotes_per_day,
+                                           filter_priority, time.perf_counter() - self._st))
+        self.raise_if_cancelled(phase)
+
+    def raise_if_cancelled(self, phase: str) -> None:
+        """
+        キャンセルが要求されていれば、STATUS_CANCELLEDのイベントを通知して例外を送出する。
+        試行を伴わない事前計算等のループからも呼び出す。
+
+        :param phase: 処理の段階(PHASE_*)
+        :raises: ScheduleCancelledException: キャンセルが要求されている場合
+        """
+        if self.cancel_token is None or not self.cancel_token.is_cancelled:
+            return
+        if self.on_progress:
+            self.on_progress(ProgressEvent(phase, STATUS_CANCELLED, elapsed=time.perf_counter() - self._st))
+        raise ScheduleCancelledException()
+
+
+def print_progress(event: ProgressEvent) -> None:
+    """試行の結果のみをコンソールに出力するprogressのcallback"""
+    if event.status not in (STATUS_FOUND, STATUS_NOT_FOUND):
+        return
+    conditions = f'filter_priority={event.filter_priority}'
+    if event.max_num_of_remotes_per_day is not None:
+        conditions += f', max_num_of_remotes_per_day={event.max_num_of_remotes_per_day}'
+    if event.status == STATUS_FOUND:
+        print(f'{event.phase}: {conditions}: {event.attempt}: found.')
+    else:
+        print(f'{event.phase}: {conditions}: {event.attempt}: not found. '
+              f'min_num_of_unassigned_days={event.best_num_of_unassigned_days}')
+
+
+class ProgressStream:
+    """
+    スケジュール作成を別スレッドで実行し、進捗イベントを順に返すiterator。
+    withブロックを途中で抜けた場合は処理をキャンセルする。
+
+    例::
+
+        with ProgressStream(solve_schedule, scenario) as stream:
+            for event in stream:
+                if event.phase == PHASE_REMOTE and event.best_num_of_unassigned_days == 1:
+                    stream.cancel_token.stop()
+        monitor_dict = stream.result
+    """
+
+    _END = object()
+
+    def __init__(self, func, *args, **kwargs):
+        """
+        :param func: キーワード引数on_progress, cancel_tokenを受け取るスケジュール作成関数
+        :param args: funcの位置引数
+        :param kwargs: funcのキーワード引数
+        """
+        self.cancel_token: CancelToken = kwargs.pop('cancel_token', None) or CancelToken()
+        self.result = None
+        self.exception = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, args=(func, args, kwargs), daemon=True)
+        self._thread.start()
+
+    def _run(self, func, args, kwargs):
+        try:
+            self.result = func(*args, on_progress=self._queue.put, cancel_token=self.cancel_token, **kwargs)
+        except BaseException as e:
+            self.exception = e
+        finally:
+            self._queue.put(ProgressStream._END)
+
+    def __iter__(self):
+        while (event := self._queue.get()) is not ProgressStream._END:
+            yield event
+        self._thread.join()
+        if self.exception is not None:
+            raise self.exception
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._thread.is_alive():
+            self.cancel_token.cancel()
+            self._thread.join()
+        return False
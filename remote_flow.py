@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import random
+
+from diagnostics import PHASE_REMOTE_FLOW, SearchDiagnostics
+from filters import FILTER_PRIORITY1, RemoteFilterManager
+from flow import MaxFlow
+from monitors import ERole, NOT_AT_OFFICE_ROLES
+
+_SOURCE = 0
+_SINK = 1
+
+
+class RemoteFlowNetwork:
+    """
+    在宅勤務の割り当てのうち、在宅勤務の上限(REMOTE_MAX)と1日の在宅勤務の割り当て人数を表すフローネットワーク。
+    source → 監視者(容量:在宅勤務の残りの上限) → 日(容量1:その日に在宅勤務にできる場合のみ) → sink(容量:その日に
+    追加する在宅勤務者数)の最大流が全ての日の追加人数の合計に等しければ、上限と割り当て人数を満たす割り当てが存在する。
+    監視者→日の辺は、割り当て前の予定から作成したフィルタをその監視者1人で満たす場合のみ作成する。
+    増加路は辺を追加した順に探すため、同じ入力とrngからは同じ割り当てになる。
+    """
+
+    def __init__(self, monitor_dict: dict, weekdays, fm: RemoteFilterManager, max_num_of_remotes_per_day: int,
+                 filter_priority: int, diagnostics: SearchDiagnostics = None, rng: random.Random = None):
+        """
+        :param monitor_dict: 在宅勤務の割り当て前の監視者の辞書(key:=name, item:=Monitor)
+        :param weekdays: 営業日のIterable
+        :param fm: フィルタ管理クラス
+        :param max_num_of_remotes_per_day: 1日の在宅勤務の割り当て人数
+        :param filter_priority: フィルタ優先度
+        :param diagnostics: 指定された場合は日毎の監視者→日の辺の数と、フィルタ毎に作成しなかった辺の数を集計する
+        :param rng: 指定された場合は辺を追加する順をこの乱数生成器でランダムにする
+                    (Noneの場合はmonitor_dictの順と日付順)
+        """
+        weekdays = sorted(weekdays)
+        names = list(monitor_dict)
+        if rng is not None:
+            rng.shuffle(names)
+            rng.shuffle(weekdays)
+        monitors = monitor_dict.values()
+        self._flow = MaxFlow(2 + len(names) + len(weekdays))
+        monitor_nodes = {name: idx for idx, name in enumerate(names, 2)}
+        # key:=name, item:=source→監視者の辺
+        self._monitor_edges: dict = {}
+        # key:=day, item:=日→sinkの辺
+        self._day_edges: dict = {}
+        # key:=(name, day), item:=監視者→日の辺
+        self._assign_edges: dict = {}
+        # key:=(name, day), item:=割り当てを禁止した監視者→日の辺
+        self._forbidden_edges: dict = {}
+        # key:=day, item:=その日に追加する在宅勤務者数
+        self.day_num_of_remotes: dict = {}
+
+        for name in names:
+            monitor = monitor_dict[name]
+            if (max_count := monitor.role_max.get(ERole.R)) is not None:
+                capacity = max(max_count - monitor.get_role_count(ERole.R), 0)
+            else:
+                capacity = len(weekdays)
+            self._monitor_edges[name] = self._flow.add_edge(_SOURCE, monitor_nodes[name], capacity)
+        for day_node, day in enumerate(weekdays, 2 + len(names)):
+            num_of_not_at_office = len([m for m in monitors if m.schedule.get(day) in NOT_AT_OFFICE_ROLES])
+            if (num_of_remotes := max_num_of_remotes_per_day - num_of_not_at_office) <= 0:
+                continue
+            self.day_num_of_remotes[day] = num_of_remotes
+            self._day_edges[day] = self._flow.add_edge(day_node, _SINK, num_of_remotes)
+            candidates = [{name} for name in names if monitor_dict[name].schedule.get(day) is None]
+            if diagnostics:
+                candidates = diagnostics.filter_candidates(
+                    PHASE_REMOTE_FLOW, day, candidates, fm.get_filters_by_enum(monitors, day, filter_priority))
+            else:
+                filters = fm.get_filters(monitors, day, filter_priority)
+                candidates = [c for c in candidates if all([f(c) for f in filters])]
+            for (name,) in candidates:
+                self._assign_edges[(name, day)] = self._flow.add_edge(monitor_nodes[name], day_node, 1)
+
+    @property
+    def required_flow(self) -> int:
+        """
+        :return: 全ての日の追加する在宅勤務者数の合計
+        """
+        return sum(self.day_num_of_remotes.values())
+
+    @property
+    def flow(self) -> int:
+        """
+        :return: 現在のフロー
+        """
+        return sum([self._flow.get_flow(edge) for edge in self._day_edges.values()])
+
+    @property
+    def is_saturated(self) -> bool:
+        """
+        :return: 全ての日に必要な人数の在宅勤務が割り当てられている場合はTrue
+        """
+        return self.flow == self.required_flow
+
+    def solve(self) -> int:
+        """
+        現在のフローから増加路を探して最大流にする。
+
+        :return: 現在のフロー
+        """
+        self._flow.max_flow(_SOURCE, _SINK)
+        return self.flow
+
+    def get_remote_groups(self) -> dict:
+        """
+        :return: 在宅勤務者の辞書(key:=day, item:=監視者名のset)
+        """
+        remote_groups = {day: set() for day in self.day_num_of_remotes}
+        for (name, day), edge in self._assign_edges.items():
+            if self._flow.get_flow(edge):
+                remote_groups[day].add(name)
+        return remote_groups
+
+    def forbid(self, name: str, day) -> None:
+        """
+        監視者をその日に在宅勤務にしないようにする。割り当て済みの場合はフローを取り消す。
+
+        :param name: 監視者名
+        :param day: 日付
+        """
+        if (edge := self._assign_edges.pop((name, day), None)) is None:
+            return
+        if self._flow.get_flow(edge):
+            for e in (self._monitor_edges[name], edge, self._day_edges[day]):
+                self._flow.cancel_flow(e)
+        self._flow.set_capacity(edge, 0)
+        self._forbidden_edges[(name, day)] = edge
+
+    def allow(self, name: str, day) -> None:
+        """
+        forbidで禁止した割り当てを再び許可する。
+
+        :param name: 監視者名
+        :param day: 日付
+        """
+        if (edge := self._forbidden_edges.pop((name, day), None)) is None:
+            return
+        self._flow.set_capacity(edge, 1)
+        self._assign_edges[(name, day)] = edge
+
+
+def is_remote_cap_feasible(monitor_dict: dict, weekdays, fm: RemoteFilterManager,
+                           max_num_of_remotes_per_day: int, network: RemoteFlowNetwork = None) -> bool:
+    """
+    在宅勤務の上限と1日の在宅勤務の割り当て人数を満たす割り当てが存在するかを判定する。
+    Falseの場合、他のフィルタによらず全ての日に在宅勤務を割り当てることはできない(1日の割り当て人数を減らす必要がある)。
+
+    :param monitor_dict: 在宅勤務の割り当て前の監視者の辞書(key:=name, item:=Monitor)
+    :param weekdays: 営業日のIterable
+    :param fm: フィルタ管理クラス
+    :param max_num_of_remotes_per_day: 1日の在宅勤務の割り当て人数
+    :param network: 同じ入力からFILTER_PRIORITY1で作成したネットワーク(Noneの場合は作成する)。
+                    判定後のネットワークはassign_remotes_by_flowにそのまま渡せる
+    :return: 割り当てが存在する場合はTrue
+    """
+    network = network or RemoteFlowNetwork(monitor_dict, weekdays, fm, max_num_of_remotes_per_day, FILTER_PRIORITY1)
+    network.solve()
+    return network.is_saturated
+
+
+def assign_remotes_by_flow(monitor_dict: dict, weekdays, fm: RemoteFilterManager, max_num_of_remotes_per_day: int,
+                           filter_priority: int, diagnostics: SearchDiagnostics = None,
+                           network: RemoteFlowNetwork = None, rng: random.Random = None):
+    """
+    最大流で在宅勤務の割り当てを行う。
+    最大流の割り当てが他のフィルタ(MUST_WORK_AT_OFFICE_GROUP等)を満たさない場合は、違反の原因となる監視者のその日の
+    割り当てを禁止して増加路を探し直すことを、違反が無くなるまで繰り返す。
+    禁止する割り当ては、増加路を探し直しても必要な人数に届くものを優先する(同じ条件の中では日付順と監視者名の順)。
+    必要な人数に届かなかった日の割り当ては取り消す。
+
+    :param monitor_dict: 在宅勤務の割り当て前の監視者の辞書(key:=name, item:=Monitor)
+    :param weekdays: 営業日のIterable
+    :param fm: フィルタ管理クラス
+    :param max_num_of_remotes_per_day: 1日の在宅勤務の割り当て人数
+    :param filter_priority: フィルタ優先度
+    :param diagnostics: 指定された場合はネットワークの辺の数と、違反により禁止した辺の数をフィルタ毎に集計する
+                        (networkを指定した場合は辺の数はネットワークの作成時に集計する)
+    :param network: 同じ入力とfilter_priorityで作成したネットワーク(is_remote_cap_feasibleで判定したもの等)。
+                    Noneの場合は作成する
+    :param rng: 指定された場合は辺を追加する順と禁止する割り当ての順をこの乱数生成器でランダムにする
+    :return: tuple(割り当てを行った監視者の辞書(コピー), 未割当日数)
+    """
+    network = network or RemoteFlowNetwork(monitor_dict, weekdays, fm, max_num_of_remotes_per_day,
+                                           filter_priority, diagnostics, rng)
+    while True:
+        network.solve()
+        remote_groups = network.get_remote_groups()
+        cp_md = _create_remote_schedule(monitor_dict, remote_groups)
+        violations = _find_violations(cp_md, remote_groups, fm, filter_priority)
+        if not violations:
+            break
+        candidates = sorted([(name, day, filter_names) for day, blamed_names, filter_names in violations
+                             for name in blamed_names], key=lambda c: (c[1], c[0]))
+        if rng is not None:
+            rng.shuffle(candidates)
+        for name, day, filter_names in candidates:
+            network.forbid(name, day)
+            if network.solve() == network.required_flow:
+                break
+            network.allow(name, day)
+        else:
+            # どの割り当てを禁止しても必要な人数に届かない場合は、人数を満たせない日が出ることを受け入れる
+            name, day, filter_names = candidates[0]
+            network.forbid(name, day)
+        if diagnostics:
+            for filter_name in filter_names:
+                diagnostics.record_pruned(PHASE_REMOTE_FLOW, filter_name)
+
+    # 必要な人数に届かない日の割り当てを取り消す
+    num_of_unassigned_days = 0
+    for day, remote_group in remote_groups.items():
+        if len(remote_group) < network.day_num_of_remotes[day]:
+            num_of_unassigned_days += 1
+            for name in remote_group:
+                del cp_md[name].schedule[day]
+    return cp_md, num_of_unassigned_days
+
+
+def _create_remote_schedule(monitor_dict: dict, remote_groups: dict) -> dict:
+    cp_md = {}
+    for name, monitor in monitor_dict.items():
+        cp_md[name] = cp = copy.copy(monitor)
+        for day, remote_group in remote_groups.items():
+            if name in remote_group:
+                cp.schedule[day] = ERole.R
+    return cp_md
+
+
+def _find_violations(monitor_dict: dict, remote_groups: dict, fm: RemoteFilterManager, filter_priority: int) -> list:
+    """
+    フィルタを満たさない日と、その日の在宅勤務から外せば違反が減る監視者、満たさなかったフィルタ名を返す。
+
+    :return: tuple(日付, 監視者名のlist, フィルタ名のlist)のlist
+    """
+    violations = []
+    for day, remote_group in remote_groups.items():
+        for name in remote_group:
+            del monitor_dict[name].schedule[day]
+        filters_by_enum = fm.get_filters_by_enum(monitor_dict.values(), day, filter_priority)
+        for name in remote_group:
+            monitor_dict[name].schedule[day] = ERole.R
+        filters = [f for filters in filters_by_enum.values() for f in filters]
+        num_of_violations = len([f for f in filters if not f(remote_group)])
+        if not num_of_violations:
+            continue
+        blamed_names = [name for name in remote_group
+                        if len([f for f in filters if not f(remote_group - {name})]) < num_of_violations]
+        filter_names = [filter_enum.name for filter_enum, filters in filters_by_enum.items()
+                        if not all([f(remote_group) for f in filters])]
+        violations.append((day, blamed_names or list(remote_group), filter_names))
+    return violations
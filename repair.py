@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+import copy
+from datetime import timedelta
+import random
+
+from filters import FILTER_PRIORITY1, MonitorFilterManager, RemoteFilterManager
+from monitors import ERole, MONITOR_ROLES_ALL
+from progress import PHASE_MONITOR, PHASE_REMOTE
+
+# 修復する最大の手数の既定値
+DEFAULT_MAX_STEPS = 2000
+# 未割当日数が減らないまま続ける最大の手数の既定値
+DEFAULT_MAX_STALLED_STEPS = 300
+# 違反数によらずランダムに候補を選ぶ確率(局所解から抜け出すため)
+DEFAULT_NOISE = 0.1
+
+
+def repair_monitors(monitor_dict: dict, base_monitor_dict: dict, weekdays, fm: MonitorFilterManager,
+                    day_monitor_combos: dict, filter_priority=FILTER_PRIORITY1, max_steps=DEFAULT_MAX_STEPS,
+                    max_stalled_steps=DEFAULT_MAX_STALLED_STEPS, noise=DEFAULT_NOISE, reporter=None) -> int:
+    """
+    監視当番が揃わなかった日を、他の日の割り当てを動かして埋める(min-conflicts法による局所探索)。
+    未割当日を1つ選び、フィルタの違反数が最も少ない組み合わせを割り当て、その結果フィルタを満たさなくなった
+    日の割り当てを取り消す、という手を繰り返す。
+    割り当てを取り消した日には、あらかじめ入力された予定(base_monitor_dict)を戻す。
+
+    :param monitor_dict: 一部の日が未割当の監視者の辞書(key:=name, item:=Monitor)。最良の結果で更新される
+    :param base_monitor_dict: 監視当番の割り当て前の監視者の辞書
+    :param weekdays: 営業日のIterable
+    :param fm: フィルタ管理クラス
+    :param day_monitor_combos: 割り当て状況に依存しないフィルタを満たす監視の組み合わせの辞書
+                               (key:=day, item:=監視の組み合わせ(key:=ERole, item:=monitor name)のlist)
+    :param filter_priority: フィルタ優先度
+    :param max_steps: 最大の手数
+    :param max_stalled_steps: 未割当日数が減らないまま続ける最大の手数
+    :param noise: 違反数によらずランダムに組み合わせを選ぶ確率
+    :param reporter: 進捗の通知先(終了が要求された場合はそれまでの最良の結果で終える)
+    :return: 修復後の未割当日数
+    :raises: ScheduleCancelledException: キャンセルされた場合
+    """
+    filter_enums = fm.get_filter_enums(filter_priority, static=False)
+
+    def get_monitor_filters(monitor, day):
+        return [f for filter_enum in filter_enums for f in fm.get_monitor_filters(monitor, day, filter_enum)]
+
+    return _repair(monitor_dict, base_monitor_dict, weekdays, MONITOR_ROLES_ALL, day_monitor_combos,
+                   get_monitor_filters, _get_monitor_combo, _monitor_combo_to_roles, max_steps, max_stalled_steps,
+                   noise, reporter, PHASE_MONITOR)
+
+
+def _get_monitor_combo(monitor_dict: dict, base_monitor_dict: dict, day):
+    monitor_combo = {m.schedule.get(day): name for name, m in monitor_dict.items()
+                     if m.schedule.get(day) in MONITOR_ROLES_ALL}
+    return monitor_combo if len(monitor_combo) == len(MONITOR_ROLES_ALL) else None
+
+
+def _monitor_combo_to_roles(monitor_combo: dict) -> dict:
+    return {name: role for role, name in monitor_combo.items()}
+
+
+def repair_remotes(monitor_dict: dict, base_monitor_dict: dict, weekdays, fm: RemoteFilterManager,
+                   day_remote_groups: dict, filter_priority=FILTER_PRIORITY1, max_steps=DEFAULT_MAX_STEPS,
+                   max_stalled_steps=DEFAULT_MAX_STALLED_STEPS, noise=DEFAULT_NOISE, reporter=None) -> int:
+    """
+    在宅勤務を割り当てられなかった日を、他の日の割り当てを動かして埋める(min-conflicts法による局所探索)。
+    手順はrepair_monitorsと同じ。
+
+    :param monitor_dict: 一部の日が未割当の監視者の辞書(key:=name, item:=Monitor)。最良の結果で更新される
+    :param base_monitor_dict: 在宅勤務の割り当て前の監視者の辞書
+    :param weekdays: 営業日のIterable
+    :param fm: フィルタ管理クラス
+    :param day_remote_groups: create_day_remote_groupsの結果
+    :param filter_priority: フィルタ優先度
+    :param max_steps: 最大の手数
+    :param max_stalled_steps: 未割当日数が減らないまま続ける最大の手数
+    :param noise: 違反数によらずランダムに在宅勤務者の組み合わせを選ぶ確率
+    :param reporter: 進捗の通知先(終了が要求された場合はそれまでの最良の結果で終える)
+    :return: 修復後の未割当日数
+    :raises: ScheduleCancelledException: キャンセルされた場合
+    """
+    filter_enums = fm.get_filter_enums(filter_priority, static=False)
+
+    def get_monitor_filters(monitor, day):
+        return [f for filter_enum in filter_enums
+                for f in filter_enum.get_filters([monitor], day, fm.must_work_at_office_groups)]
+
+    # 在宅勤務者を追加する必要のない日は修復の対象としない
+    days = [day for day in weekdays if day_remote_groups[day] is not None]
+    return _repair(monitor_dict, base_monitor_dict, days, (ERole.R, ), day_remote_groups,
+                   get_monitor_filters, _get_remote_group, _remote_group_to_roles, max_steps, max_stalled_steps,
+                   noise, reporter, PHASE_REMOTE)
+
+
+def _get_remote_group(monitor_dict: dict, base_monitor_dict: dict, day):
+    remote_group = {name for name, m in monitor_dict.items()
+                    if m.schedule.get(day) == ERole.R and base_monitor_dict[name].schedule.get(day) != ERole.R}
+    return remote_group or None
+
+
+def _remote_group_to_roles(remote_group: set) -> dict:
+    return {name: ERole.R for name in remote_group}
+
+
+class _FilterCache:
+    """
+    局所探索中の監視者の辞書の、監視者毎・日毎の割り当て状況に依存するフィルタのキャッシュ。
+    監視者のある日のフィルタは、その前後の日の予定と対象の役割の日数(その日を除く)だけに依存するため、
+    予定の変更時は前後の日のフィルタのみを作り直し、役割の日数が変わった場合は日数毎に作成したフィルタを使う。
+    """
+
+    def __init__(self, monitor_dict: dict, roles, get_monitor_filters):
+        """
+        :param monitor_dict: 監視者の辞書(予定はset_roleで変更すること)
+        :param roles: 割り当ての対象の役割
+        :param get_monitor_filters: (Monitor, 日付)からその監視者の割り当て状況に依存するフィルタ関数のlistを返すcallable
+        """
+        self._monitor_dict = monitor_dict
+        self._roles = tuple(roles)
+        self._get_monitor_filters = get_monitor_filters
+        # key:=name, item:=Counter(key:=ERole, item:=対象の役割の日数)
+        self._counts = {name: Counter([r for r in m.schedule.values() if r in self._roles])
+                        for name, m in monitor_dict.items()}
+        # key:=(name, day), item:=dict(key:=その日を除く役割の日数のtuple, item:=フィルタ関数のlist)
+        self._filters = {}
+
+    def set_role(self, name: str, day, role) -> None:
+        """
+        監視者の予定を変更する。
+
+        :param role: 役割(Noneの場合は予定を削除する)
+        """
+        schedule = self._monitor_dict[name].schedule
+        if (old_role := schedule.get(day)) == role:
+            return
+        if old_role in self._roles:
+            self._counts[name][old_role] -= 1
+        if role in self._roles:
+            self._counts[name][role] += 1
+        if role is None:
+            del schedule[day]
+        else:
+            schedule[day] = role
+        for adjacent_day in (day - timedelta(days=1), day + timedelta(days=1)):
+            self._filters.pop((name, adjacent_day), None)
+
+    def get_filters(self, day) -> list:
+        """
+        その日の対象の役割を(あらかじめ入力された予定も含めて)除いた状態のフィルタを返す。
+        あらかじめ入力された予定は割り当て状況に依存しないフィルタで候補に含まれている。
+
+        :param day: 日付
+        :return: フィルタ関数のlist
+        """
+        filters = []
+        for name, monitor in self._monitor_dict.items():
+            role = monitor.schedule.get(day)
+            counts = self._counts[name]
+            key = tuple([counts[r] - (r == role) for r in self._roles])
+            filters_by_counts = self._filters.setdefault((name, day), {})
+            if (monitor_filters := filters_by_counts.get(key)) is None:
+                if role in self._roles:
+                    del monitor.schedule[day]
+                monitor_filters = filters_by_counts[key] = self._get_monitor_filters(monitor, day)
+                if role in self._roles:
+                    monitor.schedule[day] = role
+            filters.extend(monitor_filters)
+        return filters
+
+
+def _repair(monitor_dict: dict, base_monitor_dict: dict, days, roles, day_candidates: dict,
+            get_monitor_filters, get_candidate, candidate_to_roles, max_steps: int, max_stalled_steps: int,
+            noise: float, reporter, phase: str) -> int:
+    """
+    min-conflicts法による局所探索。
+
+    :param roles: 割り当ての対象の役割
+    :param day_candidates: 割り当て状況に依存しないフィルタを満たす候補の辞書(key:=day, item:=候補のlist)
+    :param get_monitor_filters: (Monitor, 日付)からその監視者の割り当て状況に依存するフィルタ関数のlistを返すcallable
+    :param get_candidate: (監視者の辞書, 割り当て前の監視者の辞書, 日付)からその日に割り当てられた候補を返すcallable
+                          (未割当の場合はNone)
+    :param candidate_to_roles: 候補を役割の辞書(key:=name, item:=ERole)に変換するcallable
+    :param phase: キャンセルを通知する処理の段階(PHASE_*)
+    :return: 修復後の未割当日数
+    """
+    cp_md = {name: copy.copy(m) for name, m in monitor_dict.items()}
+    filter_cache = _FilterCache(cp_md, roles, get_monitor_filters)
+    # 候補が1つも無い日はどのように割り当てても埋められないため対象外とする
+    num_of_impossible_days = len([day for day in days if not day_candidates[day]])
+    days = [day for day in days if day_candidates[day]]
+
+    def clear(day):
+        for name, m in cp_md.items():
+            if m.schedule.get(day) in roles:
+                filter_cache.set_role(name, day, base_monitor_dict[name].schedule.get(day))
+
+    def save(day):
+        return {name: m.schedule.get(day) for name, m in cp_md.items()}
+
+    def restore(day, saved):
+        for name, role in saved.items():
+            filter_cache.set_role(name, day, role)
+
+    def count_violations(day, candidate):
+        return len([f for f in filter_cache.get_filters(day) if not f(candidate)])
+
+    def find_conflicted_days(day, candidate):
+        # 割り当てた監視者が対象の役割を持つ日のうち、フィルタを満たさなくなった日
+        affected_days = [other_day for other_day in days if other_day != day and
+                         any([cp_md[name].schedule.get(other_day) in roles for name in candidate_to_roles(candidate)])
+                         and get_candidate(cp_md, base_monitor_dict, other_day) is not None]
+        conflicted_days = [other_day for other_day in affected_days
+                           if count_violations(other_day, get_candidate(cp_md, base_monitor_dict, other_day))]
+        if conflicted_days or not (num_of_violations := count_violations(day, candidate)):
+            return conflicted_days
+        # フィルタが対称でない場合(PM_AM_IN_A_ROW等)に備え、割り当てを取り消すと違反が減る日を探す
+        for other_day in affected_days:
+            saved = save(other_day)
+            clear(other_day)
+            if count_violations(day, candidate) < num_of_violations:
+                conflicted_days.append(other_day)
+            restore(other_day, saved)
+        return conflicted_days
+
+    unassigned_days = [day for day in days if get_candidate(cp_md, base_monitor_dict, day) is None]
+    best_num_of_unassigned_days = len(unassigned_days)
+    best_step = 0
+    for step in range(max_steps):
+        if not unassigned_days or step - best_step > max_stalled_steps:
+            break
+        if reporter is not None:
+            reporter.raise_if_cancelled(phase)
+            if reporter.is_stop_requested:
+                break
+        day = random.choice(unassigned_days)
+        filters = filter_cache.get_filters(day)
+        if random.random() < noise:
+            candidate = random.choice(day_candidates[day])
+        else:
+            scored = [(len([f for f in filters if not f(c)]), c) for c in day_candidates[day]]
+            min_violations = min(s for s, _ in scored)
+            candidate = random.choice([c for s, c in scored if s == min_violations])
+        for name, role in candidate_to_roles(candidate).items():
+            filter_cache.set_role(name, day, role)
+
+        # フィルタを満たさなくなった日の割り当てを取り消す
+        while conflicted_days := find_conflicted_days(day, candidate):
+            clear(random.choice(conflicted_days))
+        if count_violations(day, candidate):
+            # 他の日を取り消しても解消できない場合はこの手を取り消す
+            clear(day)
+
+        unassigned_days = [d for d in days if get_candidate(cp_md, base_monitor_dict, d) is None]
+        if len(unassigned_days) < best_num_of_unassigned_days:
+            best_num_of_unassigned_days = len(unassigned_days)
+            best_step = step
+            for name, m in cp_md.items():
+                monitor_dict[name].schedule = m.schedule.copy()
+    return best_num_of_unassigned_days + num_of_impossible_days
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+
+import csv
+
+from monitors import ERole, MONITOR_ROLES_ALL
+
+REPORT_SHEET_NAME = 'report'
+# 監視当番の合計の列名
+SUM_COLUMN = 'SUM'
+# 集計する役割の列(key:=列名, item:=役割のtuple)
+REPORT_COLUMNS = {
+    ERole.AM1.name: (ERole.AM1, ),
+    ERole.AM2.name: (ERole.AM2, ),
+    ERole.PM.name: (ERole.PM, ),
+    SUM_COLUMN: tuple(MONITOR_ROLES_ALL),
+    ERole.R.name: (ERole.R, ),
+}
+
+
+class ScheduleReport:
+    """
+    作成したスケジュールの統計情報。
+    日毎の当番表、監視者毎の役割の日数と上限、役割毎の監視者間の日数の差(公平性)を持つ。
+    役割の日数は、Monitor.get_role_countと同様にスケジュールの全ての日(営業日以外を含む)を数える。
+    """
+
+    def __init__(self, monitor_dict: dict, weekdays):
+        """
+        監視者毎のスケジュールを1度だけ走査して集計する。
+
+        :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+        :param weekdays: 当番表を作成する営業日のIterable
+        """
+        # 日毎の当番表(key:=day, item:=dict(key:=ERole, item:=監視者名のlist))
+        self.rosters: dict = {day: {} for day in sorted(weekdays)}
+        # 監視者毎の役割の日数(key:=name, item:=dict(key:=列名, item:=日数))
+        self.role_counts: dict = {}
+        # 監視者毎の役割の上限(key:=name, item:=dict(key:=列名, item:=上限。上限が設定されていない役割を含む場合はNone))
+        self.role_maxes: dict = {}
+        for name, monitor in monitor_dict.items():
+            counts = dict.fromkeys(ERole, 0)
+            for day, role in monitor.schedule.items():
+                counts[role] += 1
+                if (roster := self.rosters.get(day)) is not None:
+                    roster.setdefault(role, []).append(name)
+            self.role_counts[name] = {column: sum([counts[role] for role in roles])
+                                      for column, roles in REPORT_COLUMNS.items()}
+            self.role_maxes[name] = {column: sum([monitor.role_max[role] for role in roles])
+                                     if all([role in monitor.role_max for role in roles]) else None
+                                     for column, roles in REPORT_COLUMNS.items()}
+        # 役割毎の監視者間の日数の最大値と最小値の差(key:=列名, item:=差)
+        self.spreads: dict = {}
+        for column in REPORT_COLUMNS:
+            counts = [role_counts[column] for role_counts in self.role_counts.values()]
+            self.spreads[column] = max(counts) - min(counts) if counts else 0
+
+    @property
+    def fairness_score(self) -> int:
+        """
+        :return: 役割毎の監視者間の日数の差の合計(小さいほど公平)
+        """
+        return sum(self.spreads.values())
+
+    def to_dict(self) -> dict:
+        """
+        :return: JSONに変換可能な集計結果の辞書
+        """
+        rosters = []
+        for day, roster in self.rosters.items():
+            d = {'day': day.strftime('%Y-%m-%d')}
+            d.update({role.name: (roster.get(role) or [None])[0] for role in (ERole.AM1, ERole.AM2, ERole.PM)})
+            d.update({role.name: roster.get(role, []) for role in (ERole.N, ERole.R)})
+            rosters.append(d)
+        monitors = [{'name': name, 'counts': counts, 'maxes': self.role_maxes[name]}
+                    for name, counts in self.role_counts.items()]
+        return {'rosters': rosters, 'monitors': monitors, 'spreads': self.spreads,
+                'fairness_score': self.fairness_score}
+
+    def _monitor_rows(self) -> list:
+        header = ['Name'] + list(REPORT_COLUMNS) + [f'{column} max' for column in REPORT_COLUMNS]
+        return [header] + [[name] + list(counts.values()) + list(self.role_maxes[name].values())
+                           for name, counts in self.role_counts.items()]
+
+    def write_csv(self, path) -> None:
+        """
+        監視者毎の役割の日数と上限をCSVに書き込む。
+
+        :param path: 保存先のパス
+        """
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows(self._monitor_rows())
+
+    def write_sheet(self, wb, title: str = REPORT_SHEET_NAME) -> None:
+        """
+        集計結果をworkbookのシートに書き込む。同名のシートが存在する場合は置き換える。
+
+        :param wb: 書き込み先のworkbook
+        :param title: シート名
+        """
+        if title in wb.sheetnames:
+            wb.remove(wb[title])
+        ws = wb.create_sheet(title)
+        for row in self._monitor_rows():
+            ws.append(row)
+        ws.append([])
+        ws.append(['Spread'] + list(self.spreads.values()))
+        ws.append(['Fairness score', self.fairness_score])
+        ws.append([])
+        ws.append(['Date', ERole.AM1.name, ERole.AM2.name, ERole.PM.name, ERole.N.name, ERole.R.name])
+        for d in self.to_dict()['rosters']:
+            ws.append([d['day'], d[ERole.AM1.name], d[ERole.AM2.name], d[ERole.PM.name],
+                       ' & '.join(d[ERole.N.name]), ' & '.join(d[ERole.R.name])])
+
+    def print_summary(self, file=None) -> None:
+        """
+        集計結果をコンソールに出力する。
+
+        :param file: 出力先(Noneの場合は標準出力)
+        """
+        for d in self.to_dict()['rosters']:
+            print(f'{d["day"]}: {d[ERole.AM1.name]}, {d[ERole.AM2.name]}, {d[ERole.PM.name]}, '
+                  f'{" & ".join(d[ERole.N.name]) or "[]"}, {" & ".join(d[ERole.R.name]) or "[]"}', file=file)
+        print(file=file)
+        for row in self._monitor_rows():
+            print(', '.join([str(v) for v in row]), file=file)
+        print(file=file)
+        spreads = ', '.join([f'{column}={spread}' for column, spread in self.spreads.items()])
+        print(f'Spread: {spreads}, fairness score: {self.fairness_score}', file=file)
@@ -1,22 +1,44 @@
 # -*- coding: utf-8 -*-
 
+import argparse
 import copy
-from datetime import datetime
+from datetime import datetime, timedelta
 from itertools import combinations, permutations
-import openpyxl
-from openpyxl.worksheet.worksheet import Worksheet
 import random
 import sys
 import time
+from typing import TYPE_CHECKING
 
-from filters import FILTER_PRIORITY1, FILTER_PRIORITY2, MonitorFilterManager, RemoteFilterManager
+from am_balance import balance_am_roles
+from diagnostics import SearchDiagnostics
+from filters import FILTER_PRIORITY1, FILTER_PRIORITY2, AmPairFilterManager, MonitorFilterManager
+from filters import RemoteFilterManager
 from monitors import ERole, MONITOR_ROLES_ALL, NOT_AT_OFFICE_ROLES, OUTPUT_ROLES
 from monitors import assign_role_maxes, assign_remote_max, load_monitors_info
+from history import ScheduleHistory
+from profiling import PHASE_OUTPUT, PHASE_REMOTE_MAX, PROFILE_MODES, PhaseProfiler, profile_phase
+from progress import PHASE_LOAD, PHASE_MONITOR, PHASE_REMOTE, PHASE_ROLE_MAX, PHASE_SAVE, STATUS_ATTEMPT, STATUS_FOUND
+from progress import STATUS_NOT_FOUND, STATUS_STARTED, CancelToken, ProgressReporter, print_progress
+from remote_flow import RemoteFlowNetwork, assign_remotes_by_flow, is_remote_cap_feasible
+from repair import repair_monitors, repair_remotes
+from report import ScheduleReport
+from validator import format_violations, validate_schedule
+
+if TYPE_CHECKING:
+    from openpyxl.worksheet.worksheet import Worksheet
 
 HEADER_ROW_IDX = 7
 DATA_START_ROW_IDX = HEADER_ROW_IDX + 1
 REMOTE_MAX_ROW_IDX = HEADER_ROW_IDX - 1
 REMOTE_PER_DAY_ROW_IDX = REMOTE_MAX_ROW_IDX - 1
+CANDIDATE_SHEET_PREFIX = 'candidate'
+# ウィンドウ間で割り当て日数を引き継ぐ役割
+CARRIED_ROLES = (ERole.AM1, ERole.AM2, ERole.PM, ERole.R, )
+# 上限の設定に使用する履歴の月数
+DEFAULT_HISTORY_MONTHS = 3
+# solve_horizonで制約に違反したウィンドウを作成し直す最大回数
+DEFAULT_WINDOW_RETRIES = 2
+DEFAULT_PROFILE_DIR = './profiles'
 
 
 class ComboNotFoundException(Exception):
@@ -25,41 +47,504 @@ class ComboNotFoundException(Exception):
         self.message = message
 
 
-def make_schedule(excel_path):
+class ScheduleViolationException(Exception):
+    """作成したスケジュールがFILTER_PRIORITY1の制約に違反しているため、保存しなかった場合に送出される例外"""
+    def __init__(self, violations: list):
+        # FILTER_PRIORITY1の制約のViolationのlist
+        self.violations = violations
+        self.message = f'The schedule violates {len(violations)} priority 1 constraints and was not saved'
+
+
+class Scenario:
+    """スケジュール作成の入力情報クラス"""
+
+    def __init__(self, monitor_dict: dict, must_work_at_office_groups: list, weekday_dict: dict,
+                 monitor_filter_manager: MonitorFilterManager, remote_filter_manager: RemoteFilterManager,
+                 max_num_of_remotes_per_day: int, monitor_column_dict: dict = None, wb=None,
+                 excel_path: str = None):
+        # 監視者の辞書(key:=name, item:=Monitor)。あらかじめ入力された予定のみを保持する
+        self.monitor_dict: dict = monitor_dict
+        # 最低1人は出社する必要のある監視者の組み合わせのリスト
+        self.must_work_at_office_groups: list = must_work_at_office_groups
+        # 日付の辞書(key:=行番号, item:=datetime)
+        self.weekday_dict: dict = weekday_dict
+        self.monitor_filter_manager: MonitorFilterManager = monitor_filter_manager
+        self.remote_filter_manager: RemoteFilterManager = remote_filter_manager
+        # 1日の最大の在宅勤務者数
+        self.max_num_of_remotes_per_day: int = max_num_of_remotes_per_day
+        # 監視者のlatestシートにおける列インデックスの辞書(key:=name, item:=column index)
+        self.monitor_column_dict: dict = monitor_column_dict
+        self.wb = wb
+        self.excel_path: str = excel_path
+
+    @property
+    def weekdays(self) -> list:
+        """
+        :return: 昇順に並べた営業日のlist
+        """
+        return sorted(self.weekday_dict.values())
+
+
+def make_schedule(excel_path, on_progress=print_progress, num_of_solutions=1, window_months=None,
+                  diagnostics: SearchDiagnostics = None, history_dir=None, history_months=DEFAULT_HISTORY_MONTHS,
+                  profiler: PhaseProfiler = None, report_sheet: bool = False, report_csv=None,
+                  verbose: bool = False, force: bool = False):
+    """
+    Excelから入力情報を読み込んでスケジュールを作成し、Excelを保存する。
+    num_of_solutionsが2以上の場合は異なるスケジュールを指定数作成し、それぞれを候補シートに書き込む。
+    latestシートには公平性スコアの最も良いスケジュールを書き込む。
+
+    :param excel_path: Excelのパス
+    :param on_progress: ProgressEventを受け取るcallable
+    :param num_of_solutions: 作成するスケジュールの数
+    :param window_months: 指定された場合はlatestシートの営業日をこの月数ごとに分けて順に作成する(solve_horizon)
+    :param diagnostics: 指定された場合は探索空間の診断情報を集計し、diagnosticsシートに書き込む
+    :param history_dir: 指定された場合はこのディレクトリの履歴の直近history_months月の割り当て日数を上限の設定に使用し、
+                        作成したスケジュール(latestシートに書き込むもの)を履歴に追記する
+    :param history_months: 上限の設定に使用する履歴の月数
+    :param profiler: 指定された場合は処理の段階毎にプロファイルを取る
+    :param report_sheet: Trueの場合はlatestシートに書き込むスケジュールの統計情報をreportシートに書き込む
+    :param report_csv: 指定された場合は監視者毎の役割の日数と上限をこのパスのCSVに書き込む
+    :param verbose: Trueの場合は統計情報(複数作成した場合は候補毎の公平性スコアを含む)をコンソールに出力する
+    :param force: Trueの場合はFILTER_PRIORITY1の制約に違反したスケジュールも保存する
+                  (Falseで複数作成した場合は、違反したスケジュールを除いて保存する)
+    :raises: ScheduleViolationException: forceがFalseで、作成したスケジュールがFILTER_PRIORITY1の制約に違反している場合
+                                         (複数作成した場合は全てのスケジュールが違反している場合)
+    """
+    with profile_phase(profiler, PHASE_LOAD):
+        scenario = load_scenario(excel_path)
+        carried_counts = load_history_counts(history_dir, scenario, history_months) if history_dir else None
+    if window_months:
+        monitor_dict = solve_horizon(scenario, window_months, on_progress=on_progress, diagnostics=diagnostics,
+                                     carried_counts=carried_counts, profiler=profiler)
+    elif num_of_solutions <= 1:
+        monitor_dict = solve_schedule(scenario, on_progress=on_progress, carried_counts=carried_counts,
+                                      diagnostics=diagnostics, profiler=profiler)
+    else:
+        solutions = solve_schedules(scenario, num_of_solutions, on_progress=on_progress, diagnostics=diagnostics,
+                                    carried_counts=carried_counts, profiler=profiler)
+        solutions = select_valid_solutions(scenario, solutions, force, verbose)
+        with profile_phase(profiler, PHASE_OUTPUT):
+            output_report(solutions[0][0], scenario, report_sheet, report_csv, verbose)
+            if diagnostics:
+                diagnostics.write_sheet(scenario.wb)
+        save_schedules(scenario, solutions, profiler=profiler)
+        if history_dir:
+            ScheduleHistory(history_dir).append(solutions[0][0], scenario.weekdays)
+        return
+
+    report_violations(scenario, monitor_dict, force)
+    with profile_phase(profiler, PHASE_OUTPUT):
+        output_report(monitor_dict, scenario, report_sheet, report_csv, verbose)
+        if diagnostics:
+            diagnostics.write_sheet(scenario.wb)
+    save_schedule(scenario, monitor_dict, profiler=profiler)
+    if history_dir:
+        ScheduleHistory(history_dir).append(monitor_dict, scenario.weekdays)
+
+
+def output_report(monitor_dict: dict, scenario: Scenario, report_sheet: bool = False, report_csv=None,
+                  verbose: bool = False) -> ScheduleReport:
+    """
+    作成したスケジュールの統計情報を集計し、指定された出力先に出力する。
+
+    :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :param scenario: スケジュール作成の入力情報
+    :param report_sheet: Trueの場合は入力情報のworkbookのreportシートに書き込む(保存はしない)
+    :param report_csv: 指定された場合は監視者毎の役割の日数と上限をこのパスのCSVに書き込む
+    :param verbose: Trueの場合はコンソールに出力する
+    :return: 統計情報
+    """
+    report = ScheduleReport(monitor_dict, scenario.weekdays)
+    if report_sheet:
+        report.write_sheet(scenario.wb)
+    if report_csv:
+        report.write_csv(report_csv)
+    if verbose:
+        report.print_summary()
+    return report
+
+
+def load_history_counts(history_dir, scenario: Scenario, months: int = DEFAULT_HISTORY_MONTHS) -> dict:
+    """
+    履歴から、入力情報の最初の営業日の月の前のmonths月間の役割毎の割り当て日数を読み込む。
+    履歴に無い監視者の日数は0とする。
+
+    :param history_dir: 履歴のディレクトリ
+    :param scenario: スケジュール作成の入力情報
+    :param months: 読み込む月数
+    :return: 役割毎の割り当て日数の辞書(key:=name, item:=dict(key:=ERole, item:=日数))
+    """
+    role_counts = ScheduleHistory(history_dir).get_recent_role_counts(scenario.weekdays[0], months, CARRIED_ROLES)
+    return {name: role_counts.get(name, {role: 0 for role in CARRIED_ROLES}) for name in scenario.monitor_dict}
+
+
+def load_scenario(excel_path) -> Scenario:
+    """
+    Excelからスケジュール作成の入力情報を読み込む。
+
+    :param excel_path: 読み込むExcelのパス
+    :return: スケジュール作成の入力情報
+    """
+    # openpyxlの読み込みは時間がかかるため、Excelを扱う場合のみ読み込む
+    import openpyxl
+
     keep_vba = True if excel_path.endswith('xlsm') else False
     wb = openpyxl.load_workbook(excel_path, keep_vba=keep_vba)
     monitor_dict, must_work_at_office_groups = load_monitors_info(wb)
 
     ws = wb['latest']
     monitor_column_dict, weekday_dict = load_initial_schedules(ws, monitor_dict)
-    weekdays = weekday_dict.values()
-    days = len(weekdays)
-    assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, days)
+    load_manual_remote_max(ws, monitor_dict, monitor_column_dict)
+    max_num_of_remotes_per_day = load_remote_per_day(ws)
 
     filter_ws = wb['filters']
     monitor_filter_manager = MonitorFilterManager(filter_ws)
-    assign_monitors(monitor_dict, weekdays, monitor_filter_manager)
-
-    load_manual_remote_max(ws, monitor_dict, monitor_column_dict)
-    max_num_of_remotes_per_day = load_remote_per_day(ws)
-    assign_remote_max(monitor_dict, days, max_num_of_remotes_per_day=max_num_of_remotes_per_day)
     remote_filter_manager = RemoteFilterManager(filter_ws, must_work_at_office_groups)
+    return Scenario(monitor_dict, must_work_at_office_groups, weekday_dict,
+                    monitor_filter_manager, remote_filter_manager, max_num_of_remotes_per_day,
+                    monitor_column_dict=monitor_column_dict, wb=wb, excel_path=excel_path)
+
+
+def solve_schedule(scenario: Scenario, cancel_token: CancelToken = None, on_progress=None,
+                   search_space: 'MonitorSearchSpace' = None, carried_counts: dict = None,
+                   diagnostics: SearchDiagnostics = None, profiler: PhaseProfiler = None) -> dict:
+    """
+    入力情報からスケジュールを作成する。
+    入力情報の監視者の辞書は変更せず、コピーに対して割り当てを行う。
+    営業日以外の日の予定(前後の期間の割り当て結果等)は隣接日のフィルタにのみ使用し、役割の上限には含めない。
+
+    :param scenario: スケジュール作成の入力情報
+    :param cancel_token: キャンセル用トークン(割り当ての試行の合間に確認される)
+    :param on_progress: ProgressEventを受け取るcallable
+    :param search_space: 監視当番の割り当ての事前計算結果(Noneの場合は入力情報から作成する)
+    :param carried_counts: これまでの期間の役割毎の割り当て日数の辞書(key:=name, item:=dict(key:=ERole, item:=日数))
+    :param diagnostics: 指定された場合は探索空間の診断情報を集計する
+    :param profiler: 指定された場合は処理の段階毎にプロファイルを取る(在宅勤務は1日の割り当て人数毎に別の段階とする)
+    :return: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :raises: ScheduleCancelledException: キャンセルされた場合
+    """
+    reporter = ProgressReporter(on_progress, cancel_token)
+    monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+    weekdays = scenario.weekdays
+    days = len(weekdays)
+
+    reporter.report(PHASE_ROLE_MAX, STATUS_STARTED)
+    with profile_phase(profiler, PHASE_ROLE_MAX):
+        assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, days, carried_counts, weekdays)
+        _exclude_outside_role_counts(monitor_dict, weekdays, MONITOR_ROLES_ALL)
+
+    reporter.report(PHASE_MONITOR, STATUS_STARTED)
+    with profile_phase(profiler, PHASE_MONITOR):
+        assign_monitors(monitor_dict, weekdays, scenario.monitor_filter_manager, reporter=reporter,
+                        search_space=search_space, diagnostics=diagnostics)
+
+    reporter.report(PHASE_REMOTE, STATUS_STARTED)
+    max_num_of_remotes_per_day = scenario.max_num_of_remotes_per_day
+    with profile_phase(profiler, PHASE_REMOTE_MAX):
+        assign_remote_max(monitor_dict, days, max_num_of_remotes_per_day, carried_counts)
+        _exclude_outside_role_counts(monitor_dict, weekdays, (ERole.R,))
     for max_num_of_remotes_per_day in range(max_num_of_remotes_per_day, 0, -1):
-        cp_md, num_of_unassigned_days = assign_remotes(
-            monitor_dict, sorted(weekdays), remote_filter_manager,
-            max_num_of_remotes_per_day=max_num_of_remotes_per_day)
-        copy_to_original_monitor_dict(cp_md, monitor_dict)
-        if num_of_unassigned_days <= 0:
+        with profile_phase(profiler, f'{PHASE_REMOTE}{max_num_of_remotes_per_day}'):
+            cp_md, num_of_unassigned_days = assign_remotes(
+                monitor_dict, weekdays, scenario.remote_filter_manager,
+                max_num_of_remotes_per_day=max_num_of_remotes_per_day, reporter=reporter, diagnostics=diagnostics)
+            copy_to_original_monitor_dict(cp_md, monitor_dict)
+        # 終了が要求された場合は1日の在宅勤務の割り当て人数をそれ以上減らさない
+        if num_of_unassigned_days <= 0 or reporter.is_stop_requested:
             break
 
     fill_in_blanks_to(monitor_dict, weekdays, ERole.N)
-    debug_schedules(monitor_dict, weekdays)
+    return monitor_dict
+
 
-    output_schedules(ws, monitor_dict, weekday_dict, monitor_column_dict)
-    wb.save(excel_path)
+def _exclude_outside_role_counts(monitor_dict: dict, weekdays, roles) -> None:
+    """
+    営業日以外の日に割り当てられた役割の日数を上限値に加え、上限の判定から除外する。
+    上限値が設定されていない役割は変更しない。
+    """
+    weekday_set = set(weekdays)
+    for monitor in monitor_dict.values():
+        for day, role in monitor.schedule.items():
+            if role in roles and day not in weekday_set and role in monitor.role_max:
+                monitor.role_max[role] += 1
 
 
-def load_initial_schedules(ws: Worksheet, monitor_dict: dict):
+def solve_horizon(scenario: Scenario, window_months: int = 1, overlap_days: int = 7,
+                  cancel_token: CancelToken = None, on_progress=None, diagnostics: SearchDiagnostics = None,
+                  carried_counts: dict = None, profiler: PhaseProfiler = None,
+                  window_retries: int = DEFAULT_WINDOW_RETRIES) -> dict:
+    """
+    複数月にわたる入力情報を、月単位の期間(ウィンドウ)に分けて順にスケジュールを作成する。
+    各ウィンドウは直後のoverlap_days日分の営業日を含めて割り当てを行い、ウィンドウ内の結果のみを確定する。
+    前のウィンドウで確定した直前overlap_days日分の割り当ては次のウィンドウの予定として隣接日のフィルタに使用し、
+    役割毎の割り当て日数は次のウィンドウの上限の設定に引き継ぐ。
+    確定する日(直前の日との境界を含む)がFILTER_PRIORITY2の制約に違反する場合は、ウィンドウをwindow_retries回まで作成し直し、
+    違反の最も少ない結果を確定する。
+    1ウィンドウあたりの処理量は一定のため、処理時間は月数にほぼ比例する。
+
+    :param scenario: スケジュール作成の入力情報
+    :param window_months: 1ウィンドウの月数
+    :param overlap_days: ウィンドウの後ろに含める日数と、前のウィンドウの確定した予定を含める日数
+    :param cancel_token: キャンセル用トークン
+    :param on_progress: ProgressEventを受け取るcallable
+    :param diagnostics: 指定された場合は探索空間の診断情報を集計する
+    :param carried_counts: 最初のウィンドウより前の役割毎の割り当て日数の辞書(key:=name, item:=dict(key:=ERole, item:=日数))
+    :param profiler: 指定された場合は処理の段階毎にプロファイルを取る(全ウィンドウの結果を合算する)
+    :param window_retries: 制約に違反したウィンドウを作成し直す最大回数
+    :return: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)。
+             役割の上限は、各ウィンドウで確定した日数とそのウィンドウの上限の残りの合計とする
+    :raises: ScheduleCancelledException: キャンセルされた場合
+    """
+    weekdays = scenario.weekdays
+    monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+    initial_counts = carried_counts or {}
+    carried_counts = {name: {role: initial_counts.get(name, {}).get(role, 0) for role in CARRIED_ROLES}
+                      for name in monitor_dict}
+    # key:=name, item:=dict(key:=ERole, item:=上限。いずれかのウィンドウで上限が無い役割は含めない)
+    role_maxes = {name: {role: 0 for role in CARRIED_ROLES} for name in monitor_dict}
+    windows = split_into_windows(weekdays, window_months)
+    # 最後のウィンドウが前のウィンドウの重なりの日に収まる場合は、短いウィンドウを作らずに前のウィンドウで確定する
+    if len(windows) > 1 and windows[-1][-1] <= windows[-2][-1] + timedelta(days=overlap_days):
+        windows[-2:] = [windows[-2] + windows[-1]]
+    for window in windows:
+        window_end = window[-1] + timedelta(days=overlap_days)
+        solve_days = window + [day for day in weekdays if window[-1] < day <= window_end]
+        # 前のウィンドウで確定した割り当てと次のウィンドウ以降の手動入力を隣接日のフィルタのために含める
+        context_st = window[0] - timedelta(days=overlap_days)
+        context_end = solve_days[-1] + timedelta(days=1)
+        window_md = {}
+        for name, monitor in monitor_dict.items():
+            window_monitor = copy.copy(monitor)
+            window_monitor.schedule = {day: role for day, role in monitor.schedule.items()
+                                       if context_st <= day <= context_end}
+            window_md[name] = window_monitor
+        window_scenario = Scenario(
+            window_md, scenario.must_work_at_office_groups, dict(enumerate(solve_days)),
+            scenario.monitor_filter_manager, scenario.remote_filter_manager,
+            scenario.max_num_of_remotes_per_day)
+        solved_md, num_of_violations = None, None
+        for _ in range(window_retries + 1):
+            md = solve_schedule(window_scenario, cancel_token, on_progress, carried_counts=carried_counts,
+                                diagnostics=diagnostics, profiler=profiler)
+            violations = validate_schedule(md, window, scenario.monitor_filter_manager,
+                                           scenario.remote_filter_manager, window_md)
+            if num_of_violations is None or len(violations) < num_of_violations:
+                solved_md, num_of_violations = md, len(violations)
+            if not num_of_violations or (cancel_token and cancel_token.is_stop_requested):
+                break
+
+        window_set = set(window)
+        for name, monitor in monitor_dict.items():
+            solved_monitor = solved_md[name]
+            for day in window:
+                role = solved_monitor.schedule[day]
+                monitor.schedule[day] = role
+                if role in CARRIED_ROLES:
+                    carried_counts[name][role] += 1
+            for role in list(role_maxes[name]):
+                if role not in solved_monitor.role_max:
+                    del role_maxes[name][role]
+                    continue
+                # 確定しなかった日(前後の予定と重なりの日)の日数を除いた、上限の残りと確定した日数の合計
+                num_of_window_days = len([d for d, r in solved_monitor.schedule.items()
+                                          if r == role and d in window_set])
+                role_maxes[name][role] += (solved_monitor.role_max[role] - solved_monitor.get_role_count(role)
+                                           + num_of_window_days)
+    for name, monitor in monitor_dict.items():
+        monitor.role_max = role_maxes[name]
+    return monitor_dict
+
+
+def split_into_windows(weekdays, window_months: int = 1) -> list:
+    """
+    営業日をwindow_months月ごとのウィンドウに分ける。
+
+    :param weekdays: 昇順に並べた営業日のIterable
+    :param window_months: 1ウィンドウの月数
+    :return: 営業日のlistのlist
+    """
+    windows = []
+    window_key = None
+    st_month = None
+    for day in weekdays:
+        month = day.year * 12 + day.month - 1
+        if st_month is None:
+            st_month = month
+        # 最初の営業日の月からwindow_months月ごとに区切る
+        key = (month - st_month) // window_months
+        if key != window_key:
+            windows.append([])
+            window_key = key
+        windows[-1].append(day)
+    return windows
+
+
+def solve_schedules(scenario: Scenario, num_of_solutions: int, cancel_token: CancelToken = None,
+                    on_progress=None, max_num_of_trials: int = None, diagnostics: SearchDiagnostics = None,
+                    carried_counts: dict = None, profiler: PhaseProfiler = None) -> list:
+    """
+    入力情報から互いに異なるスケジュールを複数作成する。
+    監視の組み合わせや割り当て状況に依存しないフィルタの結果は全スケジュールで共有する。
+
+    :param scenario: スケジュール作成の入力情報
+    :param num_of_solutions: 作成するスケジュールの数
+    :param cancel_token: キャンセル用トークン
+    :param on_progress: ProgressEventを受け取るcallable
+    :param max_num_of_trials: スケジュール作成の最大試行回数(Noneの場合はnum_of_solutionsの3倍)
+    :param diagnostics: 指定された場合は探索空間の診断情報を集計する
+    :param carried_counts: これまでの期間の役割毎の割り当て日数の辞書(key:=name, item:=dict(key:=ERole, item:=日数))
+    :param profiler: 指定された場合は処理の段階毎にプロファイルを取る(全スケジュールの結果を合算する)
+    :return: tuple(監視者の辞書, 公平性スコア)のlist(公平性スコアの昇順)。
+             試行回数内に異なるスケジュールが見つからなかった場合、要素数はnum_of_solutionsより少なくなる。
+    :raises: ScheduleCancelledException: キャンセルされた場合
+    """
+    search_space = MonitorSearchSpace(scenario.monitor_dict, scenario.weekdays, scenario.monitor_filter_manager,
+                                      diagnostics, ProgressReporter(on_progress, cancel_token))
+    if max_num_of_trials is None:
+        max_num_of_trials = num_of_solutions * 3
+    solutions = []
+    schedule_keys = set()
+    for _ in range(max_num_of_trials):
+        monitor_dict = solve_schedule(scenario, cancel_token, on_progress, search_space, carried_counts,
+                                      diagnostics=diagnostics, profiler=profiler)
+        schedule_key = _create_schedule_key(monitor_dict, scenario.weekdays)
+        if schedule_key in schedule_keys:
+            continue
+        schedule_keys.add(schedule_key)
+        solutions.append((monitor_dict, calc_fairness_score(monitor_dict)))
+        if len(solutions) >= num_of_solutions:
+            break
+    solutions.sort(key=lambda solution: solution[1])
+    return solutions
+
+
+def report_violations(scenario: Scenario, monitor_dict: dict, force: bool = False) -> list:
+    """
+    作成したスケジュールを出力前に検証し、制約違反があれば標準エラー出力に出力する。
+    FILTER_PRIORITY2の制約は条件を緩くして割り当てた場合に違反し得るため、違反があってもスケジュールは出力する。
+
+    :param scenario: スケジュール作成の入力情報
+    :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :param force: Trueの場合はFILTER_PRIORITY1の制約に違反していても例外を送出しない
+    :return: Violationのlist
+    :raises: ScheduleViolationException: forceがFalseで、FILTER_PRIORITY1の制約に違反している場合
+    """
+    violations = validate_schedule(monitor_dict, scenario.weekdays, scenario.monitor_filter_manager,
+                                   scenario.remote_filter_manager, scenario.monitor_dict)
+    if violations:
+        print(f'Violations: {len(violations)}', file=sys.stderr)
+        print(format_violations(violations), file=sys.stderr)
+    if not force and (p1_violations := [v for v in violations if v.priority <= FILTER_PRIORITY1]):
+        raise ScheduleViolationException(p1_violations)
+    return violations
+
+
+def select_valid_solutions(scenario: Scenario, solutions: list, force: bool = False, verbose: bool = False) -> list:
+    """
+    solve_schedulesで作成したスケジュールをそれぞれ検証し、FILTER_PRIORITY1の制約に違反したものを除く。
+    除いたスケジュールは標準エラー出力に出力する。
+
+    :param scenario: スケジュール作成の入力情報
+    :param solutions: solve_schedulesの結果
+    :param force: Trueの場合は違反したスケジュールも除かない
+    :param verbose: Trueの場合は候補毎の公平性スコアをコンソールに出力する
+    :return: 違反の無いスケジュールのlist(solutionsと同じ順)
+    :raises: ScheduleViolationException: 全てのスケジュールがFILTER_PRIORITY1の制約に違反している場合
+    """
+    valid_solutions = []
+    first_exception = None
+    for idx, (monitor_dict, fairness_score) in enumerate(solutions, 1):
+        if verbose:
+            print(f'Candidate {idx}: {fairness_score=}')
+        try:
+            report_violations(scenario, monitor_dict, force)
+        except ScheduleViolationException as e:
+            print(f'Candidate {idx} is not saved: {e.message}', file=sys.stderr)
+            first_exception = first_exception or e
+            continue
+        valid_solutions.append((monitor_dict, fairness_score))
+    if not valid_solutions and first_exception:
+        raise first_exception
+    return valid_solutions
+
+
+def validate_latest(scenario: Scenario) -> list:
+    """
+    スケジュールを作成せずに、latestシートに入力済みのスケジュール(手作業で編集したもの等)を検証し、
+    制約違反を標準出力に出力する。
+    latestシートの予定は全て手動入力として読み込まれるため、手動入力の変更は検証しない。
+
+    :param scenario: latestシートから読み込んだ入力情報
+    :return: Violationのlist
+    """
+    violations = validate_schedule(scenario.monitor_dict, scenario.weekdays, scenario.monitor_filter_manager,
+                                   scenario.remote_filter_manager)
+    print(f'Violations: {len(violations)}')
+    if violations:
+        print(format_violations(violations))
+    return violations
+
+
+def _create_schedule_key(monitor_dict: dict, weekdays) -> tuple:
+    return tuple(tuple(monitor.schedule.get(day) for day in weekdays) for monitor in monitor_dict.values())
+
+
+def calc_fairness_score(monitor_dict: dict) -> int:
+    """
+    スケジュールの公平性スコアを計算する。
+    役割(AM1, AM2, PM, 監視当番の合計, R)毎の監視者間の割り当て日数の最大値と最小値の差の合計で、小さいほど公平となる。
+
+    :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :return: 公平性スコア
+    """
+    return ScheduleReport(monitor_dict, ()).fairness_score
+
+
+def save_schedule(scenario: Scenario, monitor_dict: dict, excel_path=None, profiler: PhaseProfiler = None) -> None:
+    """
+    作成したスケジュールをlatestシートに書き込み、Excelを保存する。
+
+    :param scenario: Excelから読み込んだスケジュール作成の入力情報
+    :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :param excel_path: 保存先のパス(Noneの場合は読み込んだExcelに上書きする)
+    :param profiler: 指定された場合はシートへの書き込みと保存のプロファイルを取る
+    """
+    with profile_phase(profiler, PHASE_OUTPUT):
+        ws = scenario.wb['latest']
+        output_schedules(ws, monitor_dict, scenario.weekday_dict, scenario.monitor_column_dict)
+    with profile_phase(profiler, PHASE_SAVE):
+        scenario.wb.save(excel_path or scenario.excel_path)
+
+
+def save_schedules(scenario: Scenario, solutions: list, excel_path=None, profiler: PhaseProfiler = None) -> None:
+    """
+    作成した複数のスケジュールをそれぞれ候補シート(candidate1, candidate2, ...)に書き込み、
+    先頭のスケジュールをlatestシートに書き込んでから、Excelを1度だけ保存する。
+    候補シートは書き込み前のlatestシートのコピーとして作成し、同名のシートが存在する場合は置き換える。
+
+    :param scenario: Excelから読み込んだスケジュール作成の入力情報
+    :param solutions: solve_schedulesの結果
+    :param excel_path: 保存先のパス(Noneの場合は読み込んだExcelに上書きする)
+    :param profiler: 指定された場合はシートへの書き込みと保存のプロファイルを取る
+    """
+    wb = scenario.wb
+    ws = wb['latest']
+    with profile_phase(profiler, PHASE_OUTPUT):
+        for idx, (monitor_dict, _) in enumerate(solutions, 1):
+            title = f'{CANDIDATE_SHEET_PREFIX}{idx}'
+            if title in wb.sheetnames:
+                wb.remove(wb[title])
+            candidate_ws = wb.copy_worksheet(ws)
+            candidate_ws.title = title
+            output_schedules(candidate_ws, monitor_dict, scenario.weekday_dict, scenario.monitor_column_dict)
+        if solutions:
+            output_schedules(ws, solutions[0][0], scenario.weekday_dict, scenario.monitor_column_dict)
+    with profile_phase(profiler, PHASE_SAVE):
+        wb.save(excel_path or scenario.excel_path)
+
+
+def load_initial_schedules(ws: 'Worksheet', monitor_dict: dict):
     """
     指定シートからあらかじめ代入されている予定を読み取り、各監視者のスケジュールを初期化する。
 
@@ -87,7 +572,7 @@ def load_initial_schedules(ws: Worksheet, monitor_dict: dict):
     return monitor_column_dict, weekday_dict
 
 
-def create_monitor_col_dict(ws: Worksheet, monitor_dict: dict) -> dict:
+def create_monitor_col_dict(ws: 'Worksheet', monitor_dict: dict) -> dict:
     """
     監視者のlatestシートにおける列インデックスの辞書を作成する
 
@@ -119,28 +604,97 @@ def convert_val_to_role(val):
     return ERole.OTHER
 
 
+class MonitorSearchSpace:
+    """
+    監視当番の割り当てのうち、割り当て状況に依存しない部分の事前計算結果。
+    同じ入力情報から複数のスケジュールを作成する場合に共有できる。
+    """
+
+    def __init__(self, monitor_dict: dict, weekdays, filter_manager: MonitorFilterManager,
+                 diagnostics: SearchDiagnostics = None, reporter: ProgressReporter = None):
+        """
+        :param monitor_dict: あらかじめ入力された予定のみを持つ監視者の辞書(key:=name, item:=Monitor)
+        :param weekdays: 営業日のIterable
+        :param filter_manager: フィルタ管理クラス
+        :param diagnostics: 指定された場合は割り当て状況に依存しないフィルタの除外数を集計する。
+                            除外数はフィルタ優先度によらずフィルタ毎に1回だけ数える
+        :param reporter: 指定された場合は日毎にキャンセルを確認する
+        :raises: ScheduleCancelledException: キャンセルされた場合
+        """
+        monitors = monitor_dict.values()
+        # 割り当てを行う順に並べた営業日のlist
+        self.sorted_weekdays: list = sorted(weekdays, key=_create_weekday_sort_func(monitors))
+        # 監視の組み合わせ(key:=ERole, item:=monitor name)のlist
+        self.all_monitor_combo: list = list(gen_monitor_combos(monitors))
+        # AM1とAM2を区別しない監視の組み合わせ(AMの組)のlist
+        self.all_am_pair_combo: list = list(gen_am_pair_combos(monitors))
+        # フィルタ優先度毎の、割り当て状況に依存しないフィルタを満たす監視の組み合わせ
+        # (key:=filter_priority, item:=dict(key:=day, item:=監視の組み合わせのlist))
+        self.day_monitor_combos: dict = {FILTER_PRIORITY1: {}, FILTER_PRIORITY2: {}}
+        for day in self.sorted_weekdays:
+            if reporter is not None:
+                reporter.raise_if_cancelled(PHASE_MONITOR)
+            # 優先度2のフィルタは優先度1のフィルタを含むため、各フィルタを1回だけ適用して両方の優先度に振り分ける
+            filters_by_enum = filter_manager.get_filters_by_enum(monitors, day, FILTER_PRIORITY2, static=True)
+            monitor_combos1 = []
+            monitor_combos2 = []
+            for mc in self.all_monitor_combo:
+                failed_priorities = set()
+                for filter_enum, filters in filters_by_enum.items():
+                    if not all([f(mc) for f in filters]):
+                        failed_priorities.add(filter_enum.priority)
+                        if diagnostics:
+                            diagnostics.record_pruned(PHASE_MONITOR, filter_enum.name)
+                if FILTER_PRIORITY1 not in failed_priorities:
+                    monitor_combos1.append(mc)
+                    if not failed_priorities:
+                        monitor_combos2.append(mc)
+            self.day_monitor_combos[FILTER_PRIORITY1][day] = monitor_combos1
+            self.day_monitor_combos[FILTER_PRIORITY2][day] = monitor_combos2
+        # フィルタ優先度毎の、AM1とAM2のどちらかの順でday_monitor_combosに含まれるAMの組
+        # (key:=filter_priority, item:=dict(key:=day, item:=AMの組のlist))
+        self.day_am_pair_combos: dict = {
+            filter_priority: {day: _filter_am_pair_combos(self.all_am_pair_combo, monitor_combos)
+                              for day, monitor_combos in day_monitor_combos.items()}
+            for filter_priority, day_monitor_combos in self.day_monitor_combos.items()}
+
+
 def assign_monitors(monitor_dict: dict, weekdays, filter_manager: MonitorFilterManager,
-                    try_cnt1=1000, try_cnt2=1000) -> None:
+                    try_cnt1=1000, try_cnt2=1000, reporter: ProgressReporter = None,
+                    search_space: MonitorSearchSpace = None, diagnostics: SearchDiagnostics = None) -> None:
     """
     監視当番の割り当てを行う。
+    試行ではAM1とAM2を区別しない組み合わせ(AMの組)で割り当て、割り当て後にAM1とAM2に振り分ける(balance_am_roles)。
+    全ての試行で割り当てられなかった場合は、未割当日を除いて割り振った結果を局所探索(repair_monitors)で修復する。
 
     :param monitor_dict: 監視者の辞書(key:=name, item:=Monitor)
     :param weekdays: 営業日のIterable
     :param filter_manager: フィルタ管理クラス
     :param try_cnt1: 全フィルタを使用しての割り当て試行回数
     :param try_cnt2: 条件を緩くしての割り当て試行回数
+    :param reporter: 進捗の通知先(終了が要求された場合は未割当日を除いて割り振りを行う)
+    :param search_space: 事前計算結果(Noneの場合はmonitor_dictから作成する)
+    :param diagnostics: 指定された場合は探索空間の診断情報を集計する
+    :raises: ScheduleCancelledException: キャンセルされた場合
     """
-    monitors = monitor_dict.values()
-    sorted_weekdays = sorted(weekdays, key=_create_weekday_sort_func(monitors))
-    all_monitor_combo = list(gen_monitor_combos(monitors))
-    if _try_assign_monitors(
-            monitor_dict, all_monitor_combo, sorted_weekdays, filter_manager, try_cnt1, FILTER_PRIORITY2):
+    reporter = reporter or ProgressReporter()
+    search_space = search_space or MonitorSearchSpace(monitor_dict, weekdays, filter_manager, diagnostics, reporter)
+    if _try_assign_monitors(monitor_dict, search_space, filter_manager, try_cnt1, FILTER_PRIORITY2, reporter,
+                            diagnostics):
         return
-    if _try_assign_monitors(
-            monitor_dict, all_monitor_combo, sorted_weekdays, filter_manager, try_cnt2, FILTER_PRIORITY1):
+    if _try_assign_monitors(monitor_dict, search_space, filter_manager, try_cnt2, FILTER_PRIORITY1, reporter,
+                            diagnostics):
         return
-    _assign_monitors(monitor_dict, all_monitor_combo, sorted_weekdays, filter_manager, FILTER_PRIORITY1,
-                     force_exec=True)
+    base_monitor_dict = copy_monitor_dict(monitor_dict)
+    day_monitor_combos = search_space.day_monitor_combos[FILTER_PRIORITY1]
+    if num_of_unassigned_days := _assign_monitors(monitor_dict, day_monitor_combos, search_space.sorted_weekdays,
+                                                  filter_manager, FILTER_PRIORITY1, force_exec=True,
+                                                  diagnostics=diagnostics):
+        num_of_unassigned_days = repair_monitors(monitor_dict, base_monitor_dict, search_space.sorted_weekdays,
+                                                 filter_manager, day_monitor_combos, FILTER_PRIORITY1,
+                                                 reporter=reporter)
+    status = STATUS_NOT_FOUND if num_of_unassigned_days else STATUS_FOUND
+    reporter.report(PHASE_MONITOR, status, 0, num_of_unassigned_days, filter_priority=FILTER_PRIORITY1)
 
 
 def gen_monitor_combos(monitors):
@@ -155,6 +709,34 @@ def gen_monitor_combos(monitors):
             yield {ERole.AM1: m1.name, ERole.AM2: m2.name, ERole.PM: m3.name}
 
 
+def gen_am_pair_combos(monitors):
+    """
+    AM1とAM2を区別しない監視の組み合わせ(AMの組)のgeneratorを返す。
+    AMの2人はmonitorsの順にAM1、AM2とする。
+
+    :param monitors: 全監視メンバー(None不可)
+    :return: AMの組(key:=ERole, item:=monitor name)(generator)
+    """
+    for m1, m2 in combinations(monitors, 2):
+        if m1.is_fix_specialist or m2.is_fix_specialist:
+            for m3 in monitors:
+                if m3 is not m1 and m3 is not m2:
+                    yield {ERole.AM1: m1.name, ERole.AM2: m2.name, ERole.PM: m3.name}
+
+
+def _filter_am_pair_combos(am_pair_combos, monitor_combos) -> list:
+    """
+    AMの組のうち、AM1とAM2のどちらかの順で監視の組み合わせに含まれるもののlistを返す。
+
+    :param am_pair_combos: AMの組(key:=ERole, item:=monitor name)のIterable
+    :param monitor_combos: 監視の組み合わせ(key:=ERole, item:=monitor name)のIterable
+    :return: AMの組のlist
+    """
+    keys = {(mc[ERole.AM1], mc[ERole.AM2], mc[ERole.PM]) for mc in monitor_combos}
+    return [pc for pc in am_pair_combos if (pc[ERole.AM1], pc[ERole.AM2], pc[ERole.PM]) in keys
+            or (pc[ERole.AM2], pc[ERole.AM1], pc[ERole.PM]) in keys]
+
+
 def _create_weekday_sort_func(monitors):
     def weekday_sort_func(weekday: datetime):
         priority = 0
@@ -185,51 +767,73 @@ def copy_to_original_monitor_dict(cp_monitor_dict: dict, org_monitor_dict: dict)
             monitor.schedule[day] = role
 
 
-def _try_assign_monitors(monitor_dict, all_monitor_combo, weekdays, fm, try_cnt, filter_priority):
+def _try_assign_monitors(monitor_dict, search_space: MonitorSearchSpace, fm, try_cnt, filter_priority,
+                         reporter: ProgressReporter, diagnostics: SearchDiagnostics = None):
+    # AM1とAM2を区別せずに割り当て、割り当て後にAM1とAM2に振り分ける
+    day_monitor_combos = search_space.day_am_pair_combos[filter_priority]
+    am_pair_fm = AmPairFilterManager(fm)
     for i in range(try_cnt):
-        if _assign_monitors(monitor_dict, all_monitor_combo, weekdays, fm, filter_priority):
-            print(f'MONITOR: {filter_priority=}: {i + 1}: found.')
+        if reporter.is_stop_requested:
+            break
+        # 割り当てと振り分けはコピーに対して行い、両方が完了した場合のみオリジナルへコピーする
+        cp_md = copy_monitor_dict(monitor_dict)
+        num_of_unassigned_days = _assign_monitors(
+            cp_md, day_monitor_combos, search_space.sorted_weekdays, am_pair_fm, filter_priority,
+            diagnostics=diagnostics)
+        if num_of_unassigned_days == 0:
+            num_of_unassigned_days = balance_am_roles(cp_md, monitor_dict, search_space.sorted_weekdays)
+        if num_of_unassigned_days == 0:
+            copy_to_original_monitor_dict(cp_md, monitor_dict)
+            reporter.report(PHASE_MONITOR, STATUS_FOUND, i + 1, 0, filter_priority=filter_priority)
             return True
-    print(f'MONITOR: {filter_priority=}: {try_cnt}: not found.')
+        reporter.report(PHASE_MONITOR, STATUS_ATTEMPT, i + 1, num_of_unassigned_days,
+                        filter_priority=filter_priority)
+    reporter.report(PHASE_MONITOR, STATUS_NOT_FOUND, try_cnt, filter_priority=filter_priority)
     return False
 
 
-def _assign_monitors(monitor_dict: dict, all_monitor_combo: list, weekdays, fm: MonitorFilterManager,
-                     filter_priority, force_exec=False):
+def _assign_monitors(monitor_dict: dict, day_monitor_combos: dict, weekdays, fm: MonitorFilterManager,
+                     filter_priority, force_exec=False, diagnostics: SearchDiagnostics = None):
     """
     監視当番の割り振りを行う。
+    monitor_dictに直接割り当てるため、force_execがFalseで割り振りが完了しなかった場合は途中までの割り当てが残る。
+    割り当て前の状態が必要な場合は、呼び出し元でコピーを渡すこと。
 
     :param monitor_dict: 監視者の辞書(key:=name, item:=Monitor)
-    :param all_monitor_combo: 監視の組み合わせ(key:=ERole, item:=monitor name)のlist
+    :param day_monitor_combos: 割り当て状況に依存しないフィルタを満たす監視の組み合わせの辞書
+                               (key:=day, item:=監視の組み合わせ(key:=ERole, item:=monitor name)のlist)
     :param weekdays: 営業日のIterable
     :param fm: フィルタ管理クラス
     :param filter_priority: フィルタ優先度
     :param force_exec: 均等な割り振りが不可の場合でも、その日を除いて処理を続行する場合はTrueを設定する
-    :return: 割り振りが完了した場合はTrue
+    :param diagnostics: 指定された場合は日毎の候補数とフィルタ毎の除外数を集計する
+    :return: 未割当日数(割り振りが完了した場合は0)
     """
-    # 割り振りはまずコピーに対して行う
-    cp_md = copy_monitor_dict(monitor_dict)
-    for day in weekdays:
-        filters = fm.get_filters(cp_md.values(), day, filter_priority)
-        # extract monitor combo that meets all filters.
-        monitor_combos = [mc for mc in all_monitor_combo if all([f(mc) for f in filters])]
+    num_of_unassigned_days = 0
+    for idx, day in enumerate(weekdays):
+        if diagnostics:
+            monitor_combos = diagnostics.filter_candidates(
+                PHASE_MONITOR, day, day_monitor_combos[day],
+                fm.get_filters_by_enum(monitor_dict.values(), day, filter_priority, static=False))
+        else:
+            filters = fm.get_filters(monitor_dict.values(), day, filter_priority, static=False)
+            # extract monitor combo that meets all filters.
+            monitor_combos = [mc for mc in day_monitor_combos[day] if all([f(mc) for f in filters])]
         if not monitor_combos:
             if force_exec:
+                num_of_unassigned_days += 1
                 continue
-            return False
+            return len(weekdays) - idx
 
         # Choice a monitor combo at random.
         monitor_combo = random.choice(monitor_combos)
-        cp_md[monitor_combo[ERole.AM1]].schedule[day] = ERole.AM1
-        cp_md[monitor_combo[ERole.AM2]].schedule[day] = ERole.AM2
-        cp_md[monitor_combo[ERole.PM]].schedule[day] = ERole.PM
+        monitor_dict[monitor_combo[ERole.AM1]].schedule[day] = ERole.AM1
+        monitor_dict[monitor_combo[ERole.AM2]].schedule[day] = ERole.AM2
+        monitor_dict[monitor_combo[ERole.PM]].schedule[day] = ERole.PM
+    return num_of_unassigned_days
 
-    # 割り振りが全営業日で試みられた場合のみコピーからオリジナルへ割り振りをコピーする
-    copy_to_original_monitor_dict(cp_md, monitor_dict)
-    return True
 
-
-def load_manual_remote_max(ws: Worksheet, monitor_dict: dict, monitor_column_dict: dict):
+def load_manual_remote_max(ws: 'Worksheet', monitor_dict: dict, monitor_column_dict: dict):
     """
     手動で入力された在宅勤務数の上限を読み込み、MonitorScheduleに設定する。
 
@@ -243,7 +847,7 @@ def load_manual_remote_max(ws: Worksheet, monitor_dict: dict, monitor_column_dic
             monitor.role_max[ERole.R] = remote_max
 
 
-def load_remote_per_day(ws: Worksheet) -> int:
+def load_remote_per_day(ws: 'Worksheet') -> int:
     """
     1日の最大の在宅勤務者数を読み込む。
     入力なしの場合や負の値、数値以外が入力されている場合は0を返す。
@@ -259,11 +863,15 @@ def load_remote_per_day(ws: Worksheet) -> int:
 
 def assign_remotes(monitor_dict: dict, weekdays, filter_manager: RemoteFilterManager,
                    max_num_of_remotes_per_day=2, try_cnt1=1000, try_cnt2=10000,
-                   try_cnt3=1000):
+                   try_cnt3=1000, reporter: ProgressReporter = None, diagnostics: SearchDiagnostics = None):
     """
     在宅勤務の割り当てを行う。
+    各フィルタ優先度で、まず最大流による割り当て(assign_remotes_by_flow)を行い、割り当てられなかった場合は
+    ランダムな割り当てを試行する。
     条件によっては割り当てられない日もある。
-    割り当てられない日数はtry_cnt3の試行で最も少ない日のスケジュールを採用する。
+    割り当てられない日数はtry_cnt3の試行で最も少ない日のスケジュールを局所探索(repair_remotes)で修復して採用する。
+    在宅勤務の上限と1日の在宅勤務の割り当て人数だけで割り当てられないことが分かる場合は、試行を行わずに
+    最大流による割り当て結果を返す。
 
     :param monitor_dict: 監視者の辞書(key:=name, item:=Monitor)
     :param weekdays: 営業日のIterable
@@ -272,21 +880,50 @@ def assign_remotes(monitor_dict: dict, weekdays, filter_manager: RemoteFilterMan
     :param try_cnt1: 全フィルタを使用しての割り当て試行回数
     :param try_cnt2: 条件を緩くしての割り当て試行回数
     :param try_cnt3: 条件を緩くし、かつ未割当日許可での割り当て試行回数
+    :param reporter: 進捗の通知先(終了が要求された場合はそれまでで未割当日数の最も少ないスケジュールを返す)
+    :param diagnostics: 指定された場合は探索空間の診断情報を集計する
     :return: tuple(在宅勤務を割り当てた監視スケジュールのdict, 未割当日数)
+    :raises: ScheduleCancelledException: キャンセルされた場合
     """
+    reporter = reporter or ProgressReporter()
+    # FILTER_PRIORITY1のネットワークは上限の判定と最大流による割り当てで共有する
+    network1 = RemoteFlowNetwork(monitor_dict, weekdays, filter_manager, max_num_of_remotes_per_day,
+                                 FILTER_PRIORITY1, diagnostics)
+    if not is_remote_cap_feasible(monitor_dict, weekdays, filter_manager, max_num_of_remotes_per_day, network1):
+        cp_md, num_of_unassigned_days = assign_remotes_by_flow(
+            monitor_dict, weekdays, filter_manager, max_num_of_remotes_per_day, FILTER_PRIORITY1, diagnostics,
+            network1)
+        reporter.report(PHASE_REMOTE, STATUS_NOT_FOUND, 1, num_of_unassigned_days, max_num_of_remotes_per_day,
+                        FILTER_PRIORITY1)
+        return cp_md, num_of_unassigned_days
+
+    cp_md, num_of_unassigned_days = assign_remotes_by_flow(
+        monitor_dict, weekdays, filter_manager, max_num_of_remotes_per_day, FILTER_PRIORITY2, diagnostics)
+    if num_of_unassigned_days == 0:
+        reporter.report(PHASE_REMOTE, STATUS_FOUND, 1, 0, max_num_of_remotes_per_day, FILTER_PRIORITY2)
+        return cp_md, 0
     try:
         cp_md = _try_assign_remotes(monitor_dict, weekdays, filter_manager,
-                                    max_num_of_remotes_per_day, try_cnt1, FILTER_PRIORITY2)
-    except ComboNotFoundException as e:
-        print(e.message)
+                                    max_num_of_remotes_per_day, try_cnt1, FILTER_PRIORITY2, reporter,
+                                    diagnostics=diagnostics)
+    except ComboNotFoundException:
+        pass
     else:
         return cp_md, 0
 
+    cp_md, num_of_unassigned_days = assign_remotes_by_flow(
+        monitor_dict, weekdays, filter_manager, max_num_of_remotes_per_day, FILTER_PRIORITY1, diagnostics, network1)
+    if num_of_unassigned_days == 0:
+        reporter.report(PHASE_REMOTE, STATUS_FOUND, 1, 0, max_num_of_remotes_per_day, FILTER_PRIORITY1)
+        return cp_md, 0
+    day_remote_groups = create_day_remote_groups(
+        monitor_dict, weekdays, filter_manager, max_num_of_remotes_per_day, FILTER_PRIORITY1, diagnostics, reporter)
     try:
         cp_md = _try_assign_remotes(monitor_dict, weekdays, filter_manager,
-                                    max_num_of_remotes_per_day, try_cnt2, FILTER_PRIORITY1)
-    except ComboNotFoundException as e:
-        print(e.message)
+                                    max_num_of_remotes_per_day, try_cnt2, FILTER_PRIORITY1, reporter,
+                                    day_remote_groups, diagnostics)
+    except ComboNotFoundException:
+        pass
     else:
         return cp_md, 0
 
@@ -295,19 +932,32 @@ def assign_remotes(monitor_dict: dict, weekdays, filter_manager: RemoteFilterMan
     for i in range(max(try_cnt3, 1)):
         cp_md, num_of_unassigned_days = _assign_remotes(
             monitor_dict, weekdays, filter_manager,
-            max_num_of_remotes_per_day, FILTER_PRIORITY1, force_exec=True)
+            max_num_of_remotes_per_day, FILTER_PRIORITY1, day_remote_groups, force_exec=True,
+            diagnostics=diagnostics)
         if num_of_unassigned_days == 0:
-            print(f'REMOTE2: {FILTER_PRIORITY1=}: {i + 1}: found.')
+            reporter.report(PHASE_REMOTE, STATUS_FOUND, i + 1, 0, max_num_of_remotes_per_day, FILTER_PRIORITY1)
             return cp_md, 0
-        if num_of_unassigned_days < min_num_of_unassigned_days:
+        if tmp_md is None or num_of_unassigned_days < min_num_of_unassigned_days:
             min_num_of_unassigned_days = num_of_unassigned_days
             tmp_md = cp_md
-    print(f'Not found. {max_num_of_remotes_per_day=}. {min_num_of_unassigned_days=}')
+        reporter.report(PHASE_REMOTE, STATUS_ATTEMPT, i + 1, num_of_unassigned_days,
+                        max_num_of_remotes_per_day, FILTER_PRIORITY1)
+        if reporter.is_stop_requested:
+            break
+    min_num_of_unassigned_days = repair_remotes(tmp_md, monitor_dict, weekdays, filter_manager, day_remote_groups,
+                                                FILTER_PRIORITY1, reporter=reporter)
+    if min_num_of_unassigned_days == 0:
+        reporter.report(PHASE_REMOTE, STATUS_FOUND, i + 1, 0, max_num_of_remotes_per_day, FILTER_PRIORITY1)
+        return tmp_md, 0
+    reporter.report(PHASE_REMOTE, STATUS_NOT_FOUND, i + 1, min_num_of_unassigned_days,
+                    max_num_of_remotes_per_day, FILTER_PRIORITY1)
     return tmp_md, min_num_of_unassigned_days
 
 
 def _try_assign_remotes(monitor_dict: dict, weekdays, fm: RemoteFilterManager,
-                        max_num_of_remotes_per_day: int, try_cnt: int, filter_priority: int):
+                        max_num_of_remotes_per_day: int, try_cnt: int, filter_priority: int,
+                        reporter: ProgressReporter, day_remote_groups: dict = None,
+                        diagnostics: SearchDiagnostics = None):
     """
     指定回数在宅勤務の割り当てを行う。
 
@@ -317,38 +967,55 @@ def _try_assign_remotes(monitor_dict: dict, weekdays, fm: RemoteFilterManager,
     :param max_num_of_remotes_per_day: 1日の在宅勤務の割り当て人数
     :param try_cnt: 試行回数
     :param filter_priority: フィルタ優先度
+    :param reporter: 進捗の通知先(終了が要求された場合は試行を打ち切る)
+    :param day_remote_groups: create_day_remote_groupsの結果(Noneの場合はmonitor_dictから作成する)
+    :param diagnostics: 指定された場合は探索空間の診断情報を集計する
     :return: 割り当てを行った監視者の辞書(コピー)
     :raises: ComboNotFoundException: 割り当てが行われなかった営業日が存在する場合
+    :raises: ScheduleCancelledException: キャンセルされた場合
     """
+    if day_remote_groups is None:
+        day_remote_groups = create_day_remote_groups(
+            monitor_dict, weekdays, fm, max_num_of_remotes_per_day, filter_priority, diagnostics, reporter)
     for i in range(try_cnt):
+        if reporter.is_stop_requested:
+            break
         cp_md, num_of_unassigned_days = _assign_remotes(
-            monitor_dict, weekdays, fm, max_num_of_remotes_per_day, filter_priority)
+            monitor_dict, weekdays, fm, max_num_of_remotes_per_day, filter_priority, day_remote_groups,
+            diagnostics=diagnostics)
         if num_of_unassigned_days == 0:
-            print(f'REMOTE: {filter_priority=}, {max_num_of_remotes_per_day=}: {i + 1}: found.')
+            reporter.report(PHASE_REMOTE, STATUS_FOUND, i + 1, 0, max_num_of_remotes_per_day, filter_priority)
             return cp_md
+        reporter.report(PHASE_REMOTE, STATUS_ATTEMPT, i + 1, num_of_unassigned_days,
+                        max_num_of_remotes_per_day, filter_priority)
+    reporter.report(PHASE_REMOTE, STATUS_NOT_FOUND, try_cnt, None, max_num_of_remotes_per_day, filter_priority)
     raise ComboNotFoundException(f'Remote combo not found. '
                                  f'{filter_priority=}, {max_num_of_remotes_per_day=}: {try_cnt}')
 
 
-def _assign_remotes(monitor_dict: dict, weekdays, fm: RemoteFilterManager,
-                    max_num_of_remotes_per_day: int, filter_priority: int, force_exec=False):
+def create_day_remote_groups(monitor_dict: dict, weekdays, fm: RemoteFilterManager,
+                             max_num_of_remotes_per_day: int, filter_priority: int,
+                             diagnostics: SearchDiagnostics = None, reporter: ProgressReporter = None) -> dict:
     """
-    在宅勤務の割り当てを行う。
-    条件によっては割り当てられない日もある。
+    割り当て状況に依存しないフィルタを満たす、日毎の在宅勤務者の組み合わせを作成する。
+    在宅勤務の割り当てを行う前の監視者の辞書から作成した結果は、同じ条件での試行の間で共有できる。
 
     :param monitor_dict: 監視者の辞書(key:=name, item:=Monitor)
     :param weekdays: 営業日のIterable
     :param fm: フィルタ管理クラス
     :param max_num_of_remotes_per_day: 1日の在宅勤務の割り当て人数
     :param filter_priority: フィルタ優先度
-    :param force_exec: 均等な割り振りが不可の場合でも、その日を除いて処理を続行する場合はTrueを設定する
-    :return: tuple(割り当てを行った監視者の辞書(コピー), 未割当日数)
+    :param diagnostics: 指定された場合は割り当て状況に依存しないフィルタの除外数を集計する
+    :param reporter: 指定された場合は日毎にキャンセルを確認する
+    :return: 在宅勤務者の組み合わせの辞書(key:=day, item:=監視者名のsetのlist)。
+             在宅勤務者を追加する必要のない日はNoneとなる。
+    :raises: ScheduleCancelledException: キャンセルされた場合
     """
-    num_of_assigned_days = 0
-    # コピーに対して割り振りを行う
-    cp_md = copy_monitor_dict(monitor_dict)
-    monitors = cp_md.values()
+    day_remote_groups = {}
+    monitors = monitor_dict.values()
     for day in weekdays:
+        if reporter is not None:
+            reporter.raise_if_cancelled(PHASE_REMOTE)
         not_at_office_monitor_names = set()
         at_office_but_not_monitor_names = set()
         for monitor in monitors:
@@ -359,16 +1026,57 @@ def _assign_remotes(monitor_dict: dict, weekdays, fm: RemoteFilterManager,
                 not_at_office_monitor_names.add(monitor.name)
         num_of_remote_monitors = max_num_of_remotes_per_day - len(not_at_office_monitor_names)
         if num_of_remote_monitors <= 0:
-            num_of_assigned_days += 1
+            day_remote_groups[day] = None
+            continue
+
+        groups = [set(group) for group in
+                  combinations(sorted(at_office_but_not_monitor_names), num_of_remote_monitors)]
+        if diagnostics:
+            day_remote_groups[day] = diagnostics.filter_candidates(
+                PHASE_REMOTE, day, groups, fm.get_filters_by_enum(monitors, day, filter_priority, static=True),
+                is_static=True)
             continue
+        remote_filters = fm.get_filters(monitors, day, filter_priority, static=True)
+        day_remote_groups[day] = [g for g in groups if all([f(g) for f in remote_filters])]
+    return day_remote_groups
+
 
-        remote_groups = []
-        remote_filters = fm.get_filters(monitors, day, filter_priority)
+def _assign_remotes(monitor_dict: dict, weekdays, fm: RemoteFilterManager,
+                    max_num_of_remotes_per_day: int, filter_priority: int, day_remote_groups: dict = None,
+                    force_exec=False, diagnostics: SearchDiagnostics = None):
+    """
+    在宅勤務の割り当てを行う。
+    条件によっては割り当てられない日もある。
 
-        for group in combinations(at_office_but_not_monitor_names, num_of_remote_monitors):
-            g = set(group)
-            if all([f(g) for f in remote_filters]):
-                remote_groups.append(g)
+    :param monitor_dict: 監視者の辞書(key:=name, item:=Monitor)
+    :param weekdays: 営業日のIterable
+    :param fm: フィルタ管理クラス
+    :param max_num_of_remotes_per_day: 1日の在宅勤務の割り当て人数
+    :param filter_priority: フィルタ優先度
+    :param day_remote_groups: create_day_remote_groupsの結果(Noneの場合はmonitor_dictから作成する)
+    :param force_exec: 均等な割り振りが不可の場合でも、その日を除いて処理を続行する場合はTrueを設定する
+    :param diagnostics: 指定された場合は日毎の候補数とフィルタ毎の除外数を集計する
+    :return: tuple(割り当てを行った監視者の辞書(コピー), 未割当日数)
+    """
+    if day_remote_groups is None:
+        day_remote_groups = create_day_remote_groups(
+            monitor_dict, weekdays, fm, max_num_of_remotes_per_day, filter_priority, diagnostics)
+    num_of_assigned_days = 0
+    # コピーに対して割り振りを行う
+    cp_md = copy_monitor_dict(monitor_dict)
+    monitors = cp_md.values()
+    for day in weekdays:
+        if (static_remote_groups := day_remote_groups[day]) is None:
+            num_of_assigned_days += 1
+            continue
+
+        if diagnostics:
+            remote_groups = diagnostics.filter_candidates(
+                PHASE_REMOTE, day, static_remote_groups,
+                fm.get_filters_by_enum(monitors, day, filter_priority, static=False))
+        else:
+            remote_filters = fm.get_filters(monitors, day, filter_priority, static=False)
+            remote_groups = [g for g in static_remote_groups if all([f(g) for f in remote_filters])]
         if not remote_groups:
             if force_exec:
                 continue
@@ -392,7 +1100,7 @@ def fill_in_blanks_to(monitor_dict: dict, weekdays, role: ERole) -> None:
                 monitor.schedule[day] = role
 
 
-def output_schedules(ws: Worksheet, monitor_dict: dict, weekday_dict: dict,
+def output_schedules(ws: 'Worksheet', monitor_dict: dict, weekday_dict: dict,
                      monitor_column_dict: dict):
     monitor_name_st_col = find_col_idx_by_val(ws, HEADER_ROW_IDX, ERole.AM1.name)
     monitor_name_cols = {
@@ -408,7 +1116,7 @@ def output_schedules(ws: Worksheet, monitor_dict: dict, weekday_dict: dict,
                     ws.cell(row=row_idx, column=col_idx, value=monitor.name)
 
 
-def find_col_idx_by_val(ws: Worksheet, row_idx: int, value):
+def find_col_idx_by_val(ws: 'Worksheet', row_idx: int, value):
     for row in ws.iter_rows(min_row=row_idx, max_row=row_idx):
         for cell in row:
             if cell.value == value:
@@ -419,56 +1127,116 @@ def elapsed_time(f):
     def wrapper(*args, **kwargs):
         st = time.time()
         v = f(*args, **kwargs)
-        print(f'{f.__name__}: {time.time() - st}')
+        # 標準出力にJSONを出力する場合があるため、経過時間は標準エラー出力に出力する
+        print(f'{f.__name__}: {time.time() - st}', file=sys.stderr)
         return v
 
     return wrapper
 
 
-def debug_schedules(monitor_dict: dict, weekdays):
-    date_str = 'date'
-    print(f'{date_str: <19}: {ERole.AM1.name}, {ERole.AM2.name}, {ERole.PM.name}, '
-          f'{ERole.N.name}, {ERole.R.name}')
-    print_roles = {ERole.AM1, ERole.AM2, ERole.PM, ERole.N, ERole.R, }
-    for day in sorted(weekdays):
-        md = {}
-        normals = []
-        remotes = []
-        for monitor in monitor_dict.values():
-            if (role := monitor.schedule.get(day)) in print_roles:
-                if role == ERole.R:
-                    remotes.append(monitor.name)
-                elif role == ERole.N:
-                    normals.append(monitor.name)
-                else:
-                    md[role] = monitor.name
-        am1 = md.get(ERole.AM1)
-        am2 = md.get(ERole.AM2)
-        pm = md.get(ERole.PM)
-        n = ' & '.join(normals) if normals else '[]'
-        r = ' & '.join(remotes) if remotes else '[]'
-        print(f'{day}: {am1}, {am2}, {pm}, {n}, {r}')
-    print()
-    print('name, AM1, AM2, PM, SUM, R')
-    for name, monitor in monitor_dict.items():
-        print(f'{name}, {monitor.get_role_count(ERole.AM1)}, {monitor.get_role_count(ERole.AM2)}, '
-              f'{monitor.get_role_count(ERole.PM)}, {monitor.get_role_count(*MONITOR_ROLES_ALL)}, '
-              f'{monitor.get_role_count(ERole.R)}')
-    print()
-    print('name, AM1, AM2, PM, SUM, R')
-    for name, monitor in monitor_dict.items():
-        print(f'{name}\', {monitor.role_max[ERole.AM1]}, {monitor.role_max[ERole.AM2]} '
-              f',{monitor.role_max[ERole.PM]}, {monitor.sum_max_monitor_count}, {monitor.role_max[ERole.R]}')
-    print()
-
-
 @elapsed_time
-def main(file_path='./schedules/MonitorSchedule2020_test.xlsm'):
-    make_schedule(file_path)
+def main(argv=None):
+    """
+    コマンドラインからスケジュールを作成する。
+    --jsonを指定した場合はExcel(openpyxl)を使用せず、JSONの入力情報からスケジュールを作成してJSONで出力する。
+
+    :param argv: コマンドライン引数のlist(Noneの場合はsys.argvを使用する)
+    :return: 終了コード(FILTER_PRIORITY1の制約違反があった場合は1)
+    """
+    parser = argparse.ArgumentParser(description='監視当番と在宅勤務のスケジュールを作成する。')
+    parser.add_argument('excel_path', nargs='?', default='./schedules/MonitorSchedule2020_test.xlsm',
+                        help='入力情報を読み込み、スケジュールを書き込むExcelのパス')
+    parser.add_argument('--json', dest='json_path',
+                        help='Excelの代わりに入力情報のJSON(--save-snapshotで保存したもの)からスケジュールを作成する')
+    parser.add_argument('-o', '--output', help='--json指定時のスケジュールの出力先(省略時は標準出力)')
+    parser.add_argument('--save-snapshot', metavar='JSON_PATH',
+                        help='Excelから読み込んだ入力情報をJSONで保存して終了する')
+    parser.add_argument('--solutions', type=int, default=1, help='作成するスケジュールの数')
+    parser.add_argument('--window-months', type=int, help='この月数ごとに分けてスケジュールを作成する')
+    parser.add_argument('--history', metavar='HISTORY_DIR',
+                        help='直近の割り当て日数を上限の設定に使用し、作成したスケジュールを追記する履歴のディレクトリ')
+    parser.add_argument('--history-months', type=int, default=DEFAULT_HISTORY_MONTHS,
+                        help='上限の設定に使用する履歴の月数')
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='処理の段階毎にプロファイルを取り、collapsed形式のファイルを--profile-dirに書き込む')
+    parser.add_argument('--profile-dir', default=DEFAULT_PROFILE_DIR, help='プロファイルの出力先のディレクトリ')
+    parser.add_argument('--report-sheet', action='store_true',
+                        help='スケジュールの統計情報をreportシートに書き込む(--json指定時は無視する)')
+    parser.add_argument('--report-csv', metavar='CSV_PATH', help='監視者毎の役割の日数と上限を書き込むCSVのパス')
+    parser.add_argument('-v', '--verbose', action='store_true', help='スケジュールの統計情報をコンソールに出力する')
+    parser.add_argument('--diagnostics', action='store_true',
+                        help='探索空間の診断情報(日毎の候補数、フィルタ毎の除外数)をdiagnosticsシートに書き込む'
+                             '(--json指定時は無視する)')
+    parser.add_argument('--diagnostics-json', metavar='JSON_PATH',
+                        help='探索空間の診断情報を書き込むJSONのパス(スケジュールを保存しなかった場合も書き込む)')
+    parser.add_argument('--force', action='store_true',
+                        help='作成したスケジュールが優先度1の制約に違反していても保存する')
+    parser.add_argument('--validate-only', action='store_true',
+                        help='スケジュールを作成せずに、latestシート(--json指定時はJSON)のスケジュールを検証して終了する')
+    args = parser.parse_args(argv)
+
+    if args.save_snapshot:
+        from snapshot import save_snapshot
+        save_snapshot(load_scenario(args.excel_path), args.save_snapshot)
+        return 0
+    if args.validate_only:
+        if args.json_path:
+            from snapshot import load_snapshot
+            violations = validate_latest(load_snapshot(args.json_path))
+        else:
+            violations = validate_latest(load_scenario(args.excel_path))
+        return 1 if [v for v in violations if v.priority <= FILTER_PRIORITY1] else 0
+    profiler = PhaseProfiler(args.profile) if args.profile else None
+    diagnostics = SearchDiagnostics() if args.diagnostics or args.diagnostics_json else None
+    status = 0
+    try:
+        if args.json_path:
+            _make_json_schedule(args, profiler, diagnostics)
+        else:
+            make_schedule(args.excel_path, num_of_solutions=args.solutions, window_months=args.window_months,
+                          diagnostics=diagnostics, history_dir=args.history, history_months=args.history_months,
+                          profiler=profiler, report_sheet=args.report_sheet, report_csv=args.report_csv,
+                          verbose=args.verbose, force=args.force)
+    except ScheduleViolationException as e:
+        print(f'{e.message} (use --force to save it)', file=sys.stderr)
+        status = 1
+    if args.diagnostics_json:
+        diagnostics.write_json(args.diagnostics_json)
+    if profiler:
+        profiler.print_summary()
+        for path in profiler.write(args.profile_dir):
+            print(f'Profile: {path}', file=sys.stderr)
+    return status
+
+
+def _make_json_schedule(args, profiler: PhaseProfiler, diagnostics: SearchDiagnostics = None):
+    from snapshot import load_snapshot, save_schedule_json
+    with profile_phase(profiler, PHASE_LOAD):
+        scenario = load_snapshot(args.json_path)
+        carried_counts = load_history_counts(args.history, scenario, args.history_months) if args.history else None
+    # 標準出力にJSONを出力する場合は進捗を出力しない
+    on_progress = print_progress if args.output else None
+    if args.window_months:
+        monitor_dict = solve_horizon(scenario, args.window_months, on_progress=on_progress, diagnostics=diagnostics,
+                                     carried_counts=carried_counts, profiler=profiler)
+    elif args.solutions <= 1:
+        monitor_dict = solve_schedule(scenario, on_progress=on_progress, carried_counts=carried_counts,
+                                      diagnostics=diagnostics, profiler=profiler)
+    else:
+        monitor_dict = solve_schedules(scenario, args.solutions, on_progress=on_progress, diagnostics=diagnostics,
+                                       carried_counts=carried_counts, profiler=profiler)[0][0]
+    report_violations(scenario, monitor_dict, args.force)
+    with profile_phase(profiler, PHASE_OUTPUT):
+        # 標準出力にJSONを出力する場合は統計情報を標準エラー出力に出力する
+        report = ScheduleReport(monitor_dict, scenario.weekdays)
+        if args.report_csv:
+            report.write_csv(args.report_csv)
+        if args.verbose:
+            report.print_summary(file=None if args.output else sys.stderr)
+        save_schedule_json(monitor_dict, scenario.weekdays, args.output)
+    if args.history:
+        ScheduleHistory(args.history).append(monitor_dict, scenario.weekdays)
 
 
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
-        main(sys.argv[1])
-    else:
-        main()
+    sys.exit(main())
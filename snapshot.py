@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime
+import json
+
+from filters import EMonitorComboFilters, ERemoteFilters, MonitorFilterManager, RemoteFilterManager
+from filters import convert_str_to_filter
+from monitors import ERole, Monitor
+from scheduler import Scenario
+
+SNAPSHOT_VERSION = 1
+DATE_FORMAT = '%Y-%m-%d'
+
+
+def scenario_to_dict(scenario: Scenario) -> dict:
+    """
+    スケジュール作成の入力情報をJSONに変換可能な辞書にする。
+    workbookは含めないため、この辞書から復元した入力情報はExcelに保存できない。
+
+    :param scenario: スケジュール作成の入力情報
+    :return: 入力情報の辞書
+    """
+    return {
+        'version': SNAPSHOT_VERSION,
+        'monitors': [_monitor_to_dict(m) for m in scenario.monitor_dict.values()],
+        'must_work_at_office_groups': [sorted(g) for g in scenario.must_work_at_office_groups],
+        'weekdays': {str(row_idx): f'{day:{DATE_FORMAT}}' for row_idx, day in scenario.weekday_dict.items()},
+        'monitor_filters': sorted(f.name for f in scenario.monitor_filter_manager.filters),
+        'remote_filters': sorted(f.name for f in scenario.remote_filter_manager.filters),
+        'max_num_of_remotes_per_day': scenario.max_num_of_remotes_per_day,
+        'monitor_columns': scenario.monitor_column_dict,
+    }
+
+
+def _monitor_to_dict(monitor: Monitor) -> dict:
+    return {
+        'name': monitor.name,
+        'is_fix_specialist': monitor.is_fix_specialist,
+        'schedule': {f'{day:{DATE_FORMAT}}': role.name for day, role in sorted(monitor.schedule.items())},
+        'role_max': {role.name: count for role, count in monitor.role_max.items()},
+    }
+
+
+def scenario_from_dict(d: dict) -> Scenario:
+    """
+    scenario_to_dictで作成した辞書からスケジュール作成の入力情報を復元する。
+
+    :param d: 入力情報の辞書
+    :return: スケジュール作成の入力情報
+    :raises: ValueError: 対応していないバージョン、存在しない役割名やフィルタ名が含まれる場合
+    """
+    if d.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f'Unsupported snapshot version: {d.get("version")}')
+    monitor_dict = {}
+    for md in d['monitors']:
+        monitor = Monitor(md['name'], md['is_fix_specialist'])
+        monitor.schedule = {_parse_date(day): _convert_str_to_role(role) for day, role in md['schedule'].items()}
+        monitor.role_max = {_convert_str_to_role(role): count for role, count in md['role_max'].items()}
+        monitor_dict[monitor.name] = monitor
+    must_work_at_office_groups = [set(g) for g in d['must_work_at_office_groups']]
+    weekday_dict = {int(row_idx): _parse_date(day) for row_idx, day in d['weekdays'].items()}
+    monitor_filter_manager = MonitorFilterManager(
+        None, [convert_str_to_filter(EMonitorComboFilters, name) for name in d['monitor_filters']])
+    remote_filter_manager = RemoteFilterManager(
+        None, must_work_at_office_groups, [convert_str_to_filter(ERemoteFilters, name) for name in d['remote_filters']])
+    return Scenario(monitor_dict, must_work_at_office_groups, weekday_dict,
+                    monitor_filter_manager, remote_filter_manager, d['max_num_of_remotes_per_day'],
+                    monitor_column_dict=d.get('monitor_columns'))
+
+
+def _parse_date(s: str) -> datetime:
+    return datetime.strptime(s, DATE_FORMAT)
+
+
+def _convert_str_to_role(name: str) -> ERole:
+    try:
+        return ERole[name]
+    except KeyError:
+        raise ValueError(f'{name} is not a member of {ERole}.') from None
+
+
+def save_snapshot(scenario: Scenario, path: str) -> None:
+    """
+    スケジュール作成の入力情報をJSONファイルに保存する。
+
+    :param scenario: スケジュール作成の入力情報
+    :param path: 保存先のパス
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(scenario_to_dict(scenario), f, ensure_ascii=False, indent=2)
+
+
+def load_snapshot(path: str) -> Scenario:
+    """
+    save_snapshotで保存したJSONファイルからスケジュール作成の入力情報を読み込む。
+
+    :param path: JSONファイルのパス
+    :return: スケジュール作成の入力情報
+    """
+    with open(path, encoding='utf-8') as f:
+        return scenario_from_dict(json.load(f))
+
+
+def schedule_to_dict(monitor_dict: dict, weekdays) -> dict:
+    """
+    作成したスケジュールをJSONに変換可能な辞書にする。
+
+    :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :param weekdays: 営業日のIterable
+    :return: スケジュールの辞書(key:=name, item:=dict(key:=日付の文字列, item:=役割名))
+    """
+    weekdays = sorted(weekdays)
+    return {name: {f'{day:{DATE_FORMAT}}': m.schedule[day].name for day in weekdays if day in m.schedule}
+            for name, m in monitor_dict.items()}
+
+
+def save_schedule_json(monitor_dict: dict, weekdays, path: str = None) -> None:
+    """
+    作成したスケジュールをJSONで出力する。
+
+    :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :param weekdays: 営業日のIterable
+    :param path: 保存先のパス(Noneの場合は標準出力に出力する)
+    """
+    s = json.dumps(schedule_to_dict(monitor_dict, weekdays), ensure_ascii=False, indent=2)
+    if path is None:
+        print(s)
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(s)
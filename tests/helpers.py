@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import openpyxl
+
+from filters import MonitorFilterManager, RemoteFilterManager
+from monitors import ERole, Monitor
+
+MONITOR_FILTER_NAMES = ['MANUAL_INPUT', 'MONITORING_MAX', 'AM_AM_IN_A_ROW', 'PM_AM_IN_A_ROW']
+REMOTE_FILTER_NAMES = ['MUST_WORK_AT_OFFICE_GROUP', 'REMOTE_MAX', 'REMOTE_2DAYS_IN_A_ROW']
+
+
+def create_filters_ws(monitor_filter_names=None, remote_filter_names=None):
+    """filtersシートと同じレイアウトのワークシートを作成する"""
+    ws = openpyxl.Workbook().active
+    names = MONITOR_FILTER_NAMES if monitor_filter_names is None else monitor_filter_names
+    for row_idx, name in enumerate(names, 7):
+        ws.cell(row=row_idx, column=3, value=name)
+    names = REMOTE_FILTER_NAMES if remote_filter_names is None else remote_filter_names
+    for row_idx, name in enumerate(names, 7):
+        ws.cell(row=row_idx, column=9, value=name)
+    return ws
+
+
+def create_weekdays(st=datetime(2020, 8, 3), weeks=4):
+    return [st + timedelta(days=d) for d in range(weeks * 7) if (st + timedelta(days=d)).weekday() < 5]
+
+
+def create_scenario(weeks=4, max_num_of_remotes_per_day=2):
+    from scheduler import Scenario
+
+    monitor_dict = {
+        'A': Monitor('A', True),
+        'B': Monitor('B', True),
+        'C': Monitor('C', True),
+        'D': Monitor('D', False),
+        'E': Monitor('E', True),
+        'F': Monitor('F', False),
+        'G': Monitor('G', False),
+    }
+    weekdays = create_weekdays(weeks=weeks)
+    monitor_dict['D'].schedule[weekdays[4]] = ERole.OTHER
+    monitor_dict['A'].schedule[weekdays[6]] = ERole.AM1
+    must_work_at_office_groups = [{'A', 'B'}, {'F', 'G'}]
+    ws = create_filters_ws()
+    return Scenario(monitor_dict, must_work_at_office_groups,
+                    {row_idx: day for row_idx, day in enumerate(weekdays, 8)},
+                    MonitorFilterManager(ws), RemoteFilterManager(ws, must_work_at_office_groups),
+                    max_num_of_remotes_per_day)
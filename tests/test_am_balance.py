@@ -0,0 +1,84 @@
+import unittest
+from datetime import datetime, timedelta
+
+from monitors import ERole, MONITOR_ROLES_AM, Monitor
+
+DAYS = [datetime(2020, 8, 3) + timedelta(days=d) for d in range(4)]
+
+
+def _create_monitor_dict(am_pairs: list, role_maxes: dict) -> dict:
+    monitor_dict = {name: Monitor(name, True) for name in role_maxes}
+    for name, (am1_max, am2_max) in role_maxes.items():
+        monitor_dict[name].role_max = {role: count for role, count in ((ERole.AM1, am1_max), (ERole.AM2, am2_max))
+                                       if count is not None}
+    for day, (am1, am2) in zip(DAYS, am_pairs):
+        monitor_dict[am1].schedule[day] = ERole.AM1
+        monitor_dict[am2].schedule[day] = ERole.AM2
+    return monitor_dict
+
+
+class BalanceAmRolesTest(unittest.TestCase):
+    def test_balance(self):
+        from am_balance import balance_am_roles
+
+        # A is on AM every day, so it must take AM1 on two days
+        monitor_dict = _create_monitor_dict([('A', 'B'), ('A', 'B'), ('A', 'C'), ('A', 'C')],
+                                            {'A': (2, 2), 'B': (1, 1), 'C': (1, 1)})
+        base_monitor_dict = {name: Monitor(name, True) for name in monitor_dict}
+        # B is manually assigned AM1 on the first day
+        base_monitor_dict['B'].schedule[DAYS[0]] = ERole.AM1
+        self.assertEqual(0, balance_am_roles(monitor_dict, base_monitor_dict, DAYS))
+        self.assertEqual(ERole.AM1, monitor_dict['B'].schedule[DAYS[0]])
+        self.assertEqual(ERole.AM2, monitor_dict['A'].schedule[DAYS[0]])
+        for monitor in monitor_dict.values():
+            for role in MONITOR_ROLES_AM:
+                self.assertLessEqual(monitor.get_role_count(role), monitor.role_max[role])
+        for day in DAYS:
+            self.assertCountEqual(MONITOR_ROLES_AM, [m.schedule[day] for m in monitor_dict.values()
+                                                     if day in m.schedule])
+
+    def test_unlimited_role(self):
+        from am_balance import balance_am_roles
+
+        # None means no max
+        monitor_dict = _create_monitor_dict([('A', 'B')] * 3, {'A': (None, 1), 'B': (1, None)})
+        base_monitor_dict = {name: Monitor(name, True) for name in monitor_dict}
+        self.assertEqual(0, balance_am_roles(monitor_dict, base_monitor_dict, DAYS[:3]))
+        self.assertLessEqual(monitor_dict['A'].get_role_count(ERole.AM2), 1)
+        self.assertLessEqual(monitor_dict['B'].get_role_count(ERole.AM1), 1)
+
+    def test_impossible(self):
+        from am_balance import balance_am_roles
+
+        # only two of the three days can have AM1 within the maxes
+        monitor_dict = _create_monitor_dict([('A', 'B')] * 3, {'A': (1, 5), 'B': (1, 5)})
+        base_monitor_dict = {name: Monitor(name, True) for name in monitor_dict}
+        schedules = {name: dict(m.schedule) for name, m in monitor_dict.items()}
+        self.assertEqual(1, balance_am_roles(monitor_dict, base_monitor_dict, DAYS[:3]))
+        # nothing is changed when balancing fails
+        self.assertEqual(schedules, {name: m.schedule for name, m in monitor_dict.items()})
+
+        # A needs at least two AM1 days to stay within the AM2 max
+        monitor_dict['A'].role_max = {ERole.AM1: 1, ERole.AM2: 1}
+        self.assertEqual(3, balance_am_roles(monitor_dict, base_monitor_dict, DAYS[:3]))
+
+
+class AmPairFilterManagerTest(unittest.TestCase):
+    def test_monitoring_max(self):
+        from filters import AmPairFilterManager, EMonitorComboFilters, MonitorFilterManager
+
+        fm = AmPairFilterManager(MonitorFilterManager(None, filters=[EMonitorComboFilters.MONITORING_MAX]))
+        monitor = Monitor('A', True)
+        monitor.role_max = {ERole.AM1: 1, ERole.AM2: 1, ERole.PM: 1}
+        monitor.schedule[DAYS[0]] = ERole.AM1
+        combo = {ERole.AM1: 'A', ERole.AM2: 'B', ERole.PM: 'C'}
+        # A can still be AM2
+        self.assertTrue(all([f(combo) for f in fm.get_filters([monitor], DAYS[1], static=False)]))
+        monitor.schedule[DAYS[1]] = ERole.AM1
+        self.assertFalse(all([f(combo) for f in fm.get_filters([monitor], DAYS[2], static=False)]))
+        self.assertTrue(all([f({ERole.AM1: 'B', ERole.AM2: 'C', ERole.PM: 'A'})
+                             for f in fm.get_filters([monitor], DAYS[2], static=False)]))
+
+
+if __name__ == '__main__':
+    unittest.main()
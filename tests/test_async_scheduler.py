@@ -0,0 +1,130 @@
+import asyncio
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+import threading
+import unittest
+
+from monitors import ERole, MONITOR_ROLES_ALL
+from tests.helpers import create_scenario
+
+
+# keeps the futures so that a test can check how the solver ended
+class _RecordingExecutor(ThreadPoolExecutor):
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.futures = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = super().submit(fn, *args, **kwargs)
+        self.futures.append(future)
+        return future
+
+
+# marks each call as running as soon as it is submitted, but holds it until the gate is opened
+class _GatedExecutor(Executor):
+    def __init__(self):
+        self.gate = threading.Event()
+        self.futures = []
+        self._threads = []
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            self.gate.wait()
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        self.futures.append(future)
+        self._threads.append(thread)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.gate.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class ScheduleAsync(unittest.TestCase):
+    def test_solve_scenario(self):
+        from async_scheduler import schedule_async
+        from progress import PHASE_DONE, PHASE_MONITOR
+
+        scenario = create_scenario()
+
+        async def run():
+            queue = asyncio.Queue()
+            monitor_dict = await schedule_async(scenario, progress_queue=queue)
+            await asyncio.sleep(0)
+            phases = []
+            while not queue.empty():
+                phases.append(queue.get_nowait().phase)
+            return monitor_dict, phases
+
+        monitor_dict, phases = asyncio.run(run())
+        self.assertIn(PHASE_MONITOR, phases)
+        self.assertEqual(PHASE_DONE, phases[-1])
+        for day in scenario.weekdays:
+            roles = [m.schedule[day] for m in monitor_dict.values()]
+            self.assertEqual(3, len([r for r in roles if r in MONITOR_ROLES_ALL]))
+        # the scenario itself is left untouched so that it can be reused
+        self.assertEqual(1, len(scenario.monitor_dict['A'].schedule))
+        self.assertEqual(ERole.AM1, monitor_dict['A'].schedule[scenario.weekdays[6]])
+
+    def test_timeout_cancels_solver(self):
+        from async_scheduler import schedule_async
+        from progress import ScheduleCancelledException
+
+        scenario = create_scenario()
+        # the solver is not started at all
+        executor = _RecordingExecutor()
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(schedule_async(scenario, timeout=0, executor=executor))
+        executor.shutdown(wait=True)
+        self.assertEqual([], executor.futures)
+
+        # the solver is running when the timeout expires, and stops as soon as it resumes
+        executor = _GatedExecutor()
+        queue = None
+
+        async def run():
+            nonlocal queue
+            queue = asyncio.Queue()
+            await schedule_async(scenario, timeout=0.01, progress_queue=queue, executor=executor)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(run())
+        executor.shutdown(wait=True)
+        self.assertEqual(1, len(executor.futures))
+        self.assertIsInstance(executor.futures[0].exception(), ScheduleCancelledException)
+        # events sent after the loop was closed are dropped
+        self.assertTrue(queue.empty())
+
+    def test_cancel_from_progress(self):
+        from progress import (PHASE_MONITOR, PHASE_REMOTE, STATUS_CANCELLED, STATUS_STARTED, CancelToken,
+                              ScheduleCancelledException)
+        from scheduler import solve_schedule
+
+        scenario = create_scenario()
+        cancel_token = CancelToken()
+        events = []
+
+        def on_progress(event):
+            events.append(event)
+            if event.phase == PHASE_REMOTE and event.status == STATUS_STARTED:
+                cancel_token.cancel()
+
+        with self.assertRaises(ScheduleCancelledException):
+            solve_schedule(scenario, cancel_token=cancel_token, on_progress=on_progress)
+        self.assertIn(PHASE_MONITOR, [e.phase for e in events])
+        self.assertEqual((PHASE_REMOTE, STATUS_STARTED), (events[-2].phase, events[-2].status))
+        self.assertEqual((PHASE_REMOTE, STATUS_CANCELLED), (events[-1].phase, events[-1].status))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+from monitors import ERole
+from tests.helpers import create_scenario
+
+
+class SearchDiagnosticsTest(unittest.TestCase):
+    def test_filter_candidates(self):
+        from datetime import datetime
+        from diagnostics import SearchDiagnostics
+        from filters import EMonitorComboFilters, ERemoteFilters
+
+        diagnostics = SearchDiagnostics()
+        day = datetime(2020, 8, 3)
+        filters_by_enum = {
+            EMonitorComboFilters.MANUAL_INPUT: [lambda c: c != 1],
+            EMonitorComboFilters.MONITORING_MAX: [lambda c: c < 3, lambda c: c != 0],
+        }
+        passed = diagnostics.filter_candidates('MONITOR', day, range(5), filters_by_enum)
+        self.assertEqual([2], passed)
+        self.assertEqual(1, diagnostics.pruned_counts[('MONITOR', 'MANUAL_INPUT')])
+        self.assertEqual(3, diagnostics.pruned_counts[('MONITOR', 'MONITORING_MAX')])
+
+        diagnostics.filter_candidates('MONITOR', day, [1], filters_by_enum)
+        diagnostics.filter_candidates('REMOTE', day, [1], {ERemoteFilters.REMOTE_MAX: []}, is_static=True)
+        d = diagnostics.to_dict()
+        self.assertEqual([{'phase': 'MONITOR', 'day': '2020-08-03', 'samples': 2, 'avg_candidates': 0.5,
+                           'min_candidates': 0, 'failures': 1}], d['days'])
+
+    def test_solve_schedule(self):
+        from diagnostics import PHASE_REMOTE_FLOW, SearchDiagnostics
+        from progress import PHASE_MONITOR, PHASE_REMOTE
+        from scheduler import solve_schedule
+
+        scenario = create_scenario()
+        diagnostics = SearchDiagnostics()
+        solve_schedule(scenario, diagnostics=diagnostics)
+        d = diagnostics.to_dict()
+        days = [r['day'] for r in d['days'] if r['phase'] == PHASE_MONITOR]
+        self.assertEqual([f'{day:%Y-%m-%d}' for day in scenario.weekdays], days)
+        # remotes are sampled only when the max-flow assignment falls back to random search
+        days = [r['day'] for r in d['days'] if r['phase'] == PHASE_REMOTE]
+        self.assertLessEqual(set(days), {f'{day:%Y-%m-%d}' for day in scenario.weekdays})
+        # A has a manual AM1 that rules out every other combo on that day.
+        self.assertIn(('MONITOR', 'MANUAL_INPUT'), diagnostics.pruned_counts)
+        # the max-flow assignment runs first, so its edges are recorded for every day
+        days = [r['day'] for r in d['days'] if r['phase'] == PHASE_REMOTE_FLOW]
+        self.assertEqual([f'{day:%Y-%m-%d}' for day in scenario.weekdays], days)
+
+    def test_static_pruning_is_counted_once(self):
+        from diagnostics import SearchDiagnostics
+        from scheduler import MonitorSearchSpace
+
+        scenario = create_scenario()
+        diagnostics = SearchDiagnostics()
+        MonitorSearchSpace(scenario.monitor_dict, scenario.weekdays, scenario.monitor_filter_manager, diagnostics)
+        # 180 combos a day. D's OTHER rules out the 68 combos with D, A's AM1 the 150 combos without A as AM1.
+        self.assertEqual({('MONITOR', 'MANUAL_INPUT'): 68 + 150}, dict(diagnostics.pruned_counts))
+
+    def test_remote_flow(self):
+        from diagnostics import PHASE_REMOTE_FLOW, SearchDiagnostics
+        from filters import FILTER_PRIORITY1
+        from remote_flow import assign_remotes_by_flow
+        from scheduler import copy_monitor_dict
+
+        scenario = create_scenario()
+        weekdays = scenario.weekdays[:4]
+        monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+        for name in 'ABCDE':
+            monitor_dict[name].role_max[ERole.R] = 0
+        diagnostics = SearchDiagnostics()
+        _, num_of_unassigned_days = assign_remotes_by_flow(
+            monitor_dict, weekdays, scenario.remote_filter_manager, 2, FILTER_PRIORITY1, diagnostics)
+        self.assertEqual(4, num_of_unassigned_days)
+        # only F and G can be remote, but not on the same day
+        self.assertEqual([2] * 4, [r['min_candidates'] for r in diagnostics.to_dict()['days']])
+        self.assertEqual({(PHASE_REMOTE_FLOW, 'REMOTE_MAX'): 5 * 4,
+                          (PHASE_REMOTE_FLOW, 'MUST_WORK_AT_OFFICE_GROUP'): 4}, dict(diagnostics.pruned_counts))
+
+    def test_json_cli(self):
+        import json
+        import os
+        import tempfile
+        from progress import PHASE_MONITOR
+        from scheduler import main
+        from snapshot import save_snapshot
+
+        scenario = create_scenario()
+        with tempfile.TemporaryDirectory() as dir_path:
+            snapshot_path = os.path.join(dir_path, 'scenario.json')
+            output_path = os.path.join(dir_path, 'schedule.json')
+            diagnostics_path = os.path.join(dir_path, 'diagnostics.json')
+            save_snapshot(scenario, snapshot_path)
+            main(['--json', snapshot_path, '-o', output_path, '--diagnostics-json', diagnostics_path])
+            with open(diagnostics_path, encoding='utf-8') as f:
+                d = json.load(f)
+            with open(output_path, encoding='utf-8') as f:
+                schedule = json.load(f)
+        days = [r['day'] for r in d['days'] if r['phase'] == PHASE_MONITOR]
+        self.assertEqual([f'{day:%Y-%m-%d}' for day in scenario.weekdays], days)
+        self.assertIn({'phase': PHASE_MONITOR, 'filter': 'MANUAL_INPUT'},
+                      [{'phase': r['phase'], 'filter': r['filter']} for r in d['filters']])
+        # the schedule JSON keeps its format
+        self.assertEqual(set(scenario.monitor_dict), set(schedule))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+from datetime import datetime, timedelta
+
+from monitors import ERole, Monitor
+
+DAY = datetime(2020, 8, 4)
+
+
+def _is_passed(filter_enum, monitor: Monitor, monitor_combo: dict) -> bool:
+    from filters import MonitorFilterManager
+
+    fm = MonitorFilterManager(None, filters=[filter_enum])
+    return all([f(monitor_combo) for f in fm.get_filters([monitor], DAY, static=False)])
+
+
+class PmAmInARowTest(unittest.TestCase):
+    def test_pm_before_am(self):
+        from filters import EMonitorComboFilters
+
+        pm_combo = {ERole.AM1: 'B', ERole.AM2: 'C', ERole.PM: 'A'}
+        am_combo = {ERole.AM1: 'A', ERole.AM2: 'C', ERole.PM: 'B'}
+        monitor = Monitor('A', True)
+        # A is on AM the next day, so A cannot be on PM today
+        monitor.schedule[DAY + timedelta(days=1)] = ERole.AM2
+        self.assertFalse(_is_passed(EMonitorComboFilters.PM_AM_IN_A_ROW, monitor, pm_combo))
+        self.assertTrue(_is_passed(EMonitorComboFilters.PM_AM_IN_A_ROW, monitor, am_combo))
+
+        # PM on both days is left to PM_PM_IN_A_ROW
+        monitor.schedule[DAY + timedelta(days=1)] = ERole.PM
+        self.assertTrue(_is_passed(EMonitorComboFilters.PM_AM_IN_A_ROW, monitor, pm_combo))
+        self.assertFalse(_is_passed(EMonitorComboFilters.PM_PM_IN_A_ROW, monitor, pm_combo))
+
+        # A was on PM the day before, so A cannot be on AM today
+        monitor.schedule = {DAY - timedelta(days=1): ERole.PM}
+        self.assertFalse(_is_passed(EMonitorComboFilters.PM_AM_IN_A_ROW, monitor, am_combo))
+        self.assertTrue(_is_passed(EMonitorComboFilters.PM_AM_IN_A_ROW, monitor, pm_combo))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from monitors import ERole, Monitor
+
+
+def _create_monitor_dict(schedules: dict) -> dict:
+    monitor_dict = {}
+    for name, schedule in schedules.items():
+        monitor_dict[name] = Monitor(name, True)
+        monitor_dict[name].schedule = schedule
+    return monitor_dict
+
+
+class ScheduleHistoryTest(unittest.TestCase):
+    def test_append_and_count(self):
+        from history import ScheduleHistory
+
+        d1, d2, d3 = datetime(2020, 6, 30), datetime(2020, 7, 1), datetime(2020, 8, 3)
+        with tempfile.TemporaryDirectory() as directory:
+            history = ScheduleHistory(directory)
+            self.assertEqual({}, history.get_role_counts())
+            monitor_dict = _create_monitor_dict({
+                'A': {d1: ERole.AM1, d2: ERole.AM1, d3: ERole.R},
+                'B': {d1: ERole.PM, d2: ERole.N},
+            })
+            self.assertEqual(5, history.append(monitor_dict, [d1, d2, d3]))
+
+            # reopen and overwrite A's role on d2
+            history = ScheduleHistory(directory)
+            history.append(_create_monitor_dict({'A': {d2: ERole.PM}, 'C': {d2: ERole.AM2}}), [d2])
+            self.assertEqual(7, len(history))
+            counts = history.get_role_counts(roles=(ERole.AM1, ERole.PM))
+            self.assertEqual({'A': {ERole.AM1: 1, ERole.PM: 1}, 'B': {ERole.AM1: 0, ERole.PM: 1},
+                              'C': {ERole.AM1: 0, ERole.PM: 0}}, counts)
+            counts = history.get_recent_role_counts(d3, 1)
+            self.assertEqual(1, counts['A'][ERole.PM])
+            self.assertEqual(0, counts['A'][ERole.AM1])
+            self.assertEqual(0, counts['A'][ERole.R])
+
+    def test_interrupted_append(self):
+        from history import COLUMNS, ScheduleHistory
+
+        d1, d2 = datetime(2020, 7, 1), datetime(2020, 7, 2)
+        with tempfile.TemporaryDirectory() as directory:
+            history = ScheduleHistory(directory)
+            history.append(_create_monitor_dict({'A': {d1: ERole.AM1}}), [d1])
+            # only the day column of the next row was written
+            with open(os.path.join(directory, COLUMNS['day'][0]), 'ab') as f:
+                f.write(b'\x01\x02')
+            self.assertEqual(1, len(history))
+            self.assertEqual(1, history.get_role_counts()['A'][ERole.AM1])
+
+            history.append(_create_monitor_dict({'A': {d2: ERole.AM1}}), [d2])
+            self.assertEqual(2, len(history))
+            self.assertEqual(2, history.get_role_counts()['A'][ERole.AM1])
+
+
+class LoadHistoryCounts(unittest.TestCase):
+    def test_load_history_counts(self):
+        from history import ScheduleHistory
+        from scheduler import CARRIED_ROLES, load_history_counts, solve_schedule
+        from tests.helpers import create_scenario
+
+        scenario = create_scenario()
+        with tempfile.TemporaryDirectory() as directory:
+            ScheduleHistory(directory).append(_create_monitor_dict({'A': {datetime(2020, 7, 31): ERole.AM2}}),
+                                              [datetime(2020, 7, 31)])
+            carried_counts = load_history_counts(directory, scenario)
+            self.assertEqual(set(scenario.monitor_dict), set(carried_counts))
+            self.assertEqual(1, carried_counts['A'][ERole.AM2])
+            self.assertEqual({role: 0 for role in CARRIED_ROLES}, carried_counts['G'])
+
+            monitor_dict = solve_schedule(scenario, carried_counts=carried_counts)
+            ScheduleHistory(directory).append(monitor_dict, scenario.weekdays)
+            # the schedule of this month is not counted for this month
+            self.assertEqual(carried_counts, load_history_counts(directory, scenario))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from monitors import ERole, MONITOR_ROLES_ALL
+from tests.helpers import create_scenario
+
+
+class AssignRoleMaxes(unittest.TestCase):
+    def test_even_quotas(self):
+        from monitors import assign_role_maxes
+        from scheduler import copy_monitor_dict
+
+        scenario = create_scenario()
+        monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+        assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, len(scenario.weekdays))
+        for role in MONITOR_ROLES_ALL:
+            self.assertEqual(len(scenario.weekdays), sum([m.role_max[role] for m in monitor_dict.values()]))
+        totals = [m.sum_max_monitor_count for m in monitor_dict.values()]
+        self.assertLessEqual(max(totals) - min(totals), 1)
+
+    def test_available_days(self):
+        from monitors import assign_role_maxes
+        from scheduler import copy_monitor_dict
+
+        scenario = create_scenario()
+        weekdays = scenario.weekdays
+        monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+        # E is on leave for the first half of the month and has 2 manual PMs.
+        for day in weekdays[:10]:
+            monitor_dict['E'].schedule[day] = ERole.OTHER
+        for day in weekdays[10:12]:
+            monitor_dict['E'].schedule[day] = ERole.PM
+        assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, len(weekdays), weekdays=weekdays)
+
+        for role in MONITOR_ROLES_ALL:
+            self.assertEqual(len(weekdays), sum([m.role_max[role] for m in monitor_dict.values()]))
+        totals = {name: m.sum_max_monitor_count for name, m in monitor_dict.items()}
+        self.assertLess(totals['E'], min([t for name, t in totals.items() if name != 'E']))
+        self.assertGreaterEqual(monitor_dict['E'].role_max[ERole.PM], 2)
+        self.assertGreaterEqual(monitor_dict['A'].role_max[ERole.AM1], 1)
+
+    def test_quotas_are_jointly_satisfiable(self):
+        from monitors import assign_role_maxes
+        from scheduler import copy_monitor_dict
+
+        scenario = create_scenario()
+        weekdays = scenario.weekdays[:5]
+        monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+        # only A, B and C can work on the first day, and they cannot work on the other days.
+        for name, monitor in monitor_dict.items():
+            monitor.schedule.clear()
+            for day in (weekdays[1:] if name in ('A', 'B', 'C') else weekdays[:1]):
+                monitor.schedule[day] = ERole.OTHER
+        assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, len(weekdays), weekdays=weekdays)
+
+        for name in ('A', 'B', 'C'):
+            self.assertEqual(1, monitor_dict[name].sum_max_monitor_count)
+        for role in MONITOR_ROLES_ALL:
+            self.assertEqual(len(weekdays), sum([m.role_max[role] for m in monitor_dict.values()]))
+
+    def test_zero_quota_is_enforced(self):
+        import random
+        from scheduler import solve_schedule
+
+        # D is absent on 16 of the 20 days, so some of its quotas are 0.
+        scenario = create_scenario()
+        for day in scenario.weekdays[4:]:
+            scenario.monitor_dict['D'].schedule[day] = ERole.OTHER
+        for seed in range(2):
+            random.seed(seed)
+            monitor_dict = solve_schedule(scenario)
+            self.assertIn(0, monitor_dict['D'].role_max.values())
+            for monitor in monitor_dict.values():
+                for role, max_count in monitor.role_max.items():
+                    self.assertLessEqual(monitor.get_role_count(role), max_count, (seed, monitor.name, role))
+
+
+if __name__ == '__main__':
+    unittest.main()
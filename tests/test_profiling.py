@@ -0,0 +1,84 @@
+import os
+import tempfile
+import time
+import unittest
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+
+
+def _busy(seconds):
+    st = time.perf_counter()
+    while time.perf_counter() - st < seconds:
+        pass
+
+
+class PhaseProfilerTest(unittest.TestCase):
+    def test_deterministic(self):
+        from profiling import PhaseProfiler
+
+        profiler = PhaseProfiler()
+        for _ in range(2):
+            with profiler.phase('LOAD'):
+                _sleep(0.01)
+        stacks = profiler.stacks['LOAD']
+        # microseconds spent in time.sleep called from _sleep
+        self.assertGreaterEqual(stacks[('test_profiling.py:_sleep', 'time.sleep')], 15000)
+        self.assertGreaterEqual(profiler.elapsed_times['LOAD'], 0.02)
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = profiler.write(directory)
+            self.assertEqual([os.path.join(directory, 'LOAD.collapsed')], paths)
+            with open(paths[0], encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        self.assertIn('LOAD;test_profiling.py:_sleep;time.sleep', [line.rsplit(' ', 1)[0] for line in lines])
+
+    def test_sampling(self):
+        from profiling import PROFILE_SAMPLING, PhaseProfiler
+
+        profiler = PhaseProfiler(PROFILE_SAMPLING, interval=0.001)
+        with profiler.phase('MONITOR'):
+            _busy(0.1)
+        stacks = profiler.stacks['MONITOR']
+        self.assertGreater(sum([n for stack, n in stacks.items() if stack[0] == 'test_profiling.py:_busy']), 3)
+        # frames above the with statement are not sampled
+        self.assertFalse([stack for stack in stacks if 'PhaseProfilerTest' in stack[0]])
+
+    def test_previous_profile_is_restored(self):
+        import sys
+        from profiling import PhaseProfiler
+
+        def outer_profile(frame, event, arg):
+            pass
+
+        profiler = PhaseProfiler()
+        sys.setprofile(outer_profile)
+        try:
+            with profiler.phase('LOAD'):
+                _sleep(0)
+            restored = sys.getprofile()
+        finally:
+            sys.setprofile(None)
+        self.assertIs(outer_profile, restored)
+
+    def test_invalid_mode(self):
+        from profiling import PhaseProfiler
+
+        with self.assertRaises(ValueError):
+            PhaseProfiler('unknown')
+
+    def test_solve_schedule(self):
+        from profiling import PHASE_REMOTE_MAX, PROFILE_SAMPLING, PhaseProfiler
+        from progress import PHASE_MONITOR, PHASE_ROLE_MAX
+        from scheduler import solve_schedule
+        from tests.helpers import create_scenario
+
+        profiler = PhaseProfiler(PROFILE_SAMPLING)
+        solve_schedule(create_scenario(), profiler=profiler)
+        self.assertLessEqual({PHASE_ROLE_MAX, PHASE_MONITOR, PHASE_REMOTE_MAX, 'REMOTE2'},
+                             set(profiler.elapsed_times))
+
+
+if __name__ == '__main__':
+    unittest.main()
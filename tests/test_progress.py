@@ -0,0 +1,90 @@
+import unittest
+
+from tests.helpers import create_scenario
+
+
+class ProgressReporterTest(unittest.TestCase):
+    def test_best_num_of_unassigned_days(self):
+        from progress import PHASE_REMOTE, ProgressReporter
+
+        events = []
+        reporter = ProgressReporter(events.append)
+        reporter.report(PHASE_REMOTE, attempt=1, num_of_unassigned_days=3, max_num_of_remotes_per_day=2)
+        reporter.report(PHASE_REMOTE, attempt=2, num_of_unassigned_days=1, max_num_of_remotes_per_day=2)
+        reporter.report(PHASE_REMOTE, attempt=3, num_of_unassigned_days=2, max_num_of_remotes_per_day=2)
+        reporter.report(PHASE_REMOTE, attempt=1, num_of_unassigned_days=4, max_num_of_remotes_per_day=1)
+        self.assertEqual([3, 1, 1, 4], [e.best_num_of_unassigned_days for e in events])
+        self.assertEqual([1, 2, 3, 1], [e.attempt for e in events])
+
+    def test_cancel(self):
+        from progress import PHASE_MONITOR, CancelToken, ProgressReporter, ScheduleCancelledException
+
+        cancel_token = CancelToken()
+        reporter = ProgressReporter(cancel_token=cancel_token)
+        reporter.report(PHASE_MONITOR, attempt=1)
+        cancel_token.cancel()
+        with self.assertRaises(ScheduleCancelledException):
+            reporter.report(PHASE_MONITOR, attempt=2)
+
+    def test_cancel_in_precompute_loops(self):
+        from filters import FILTER_PRIORITY1
+        from progress import (PHASE_MONITOR, PHASE_REMOTE, STATUS_CANCELLED, CancelToken, ProgressReporter,
+                              ScheduleCancelledException)
+        from repair import repair_monitors
+        from scheduler import MonitorSearchSpace, copy_monitor_dict, create_day_remote_groups
+
+        scenario = create_scenario()
+        weekdays = scenario.weekdays
+        monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+        fm = scenario.monitor_filter_manager
+        day_monitor_combos = MonitorSearchSpace(monitor_dict, weekdays, fm).day_monitor_combos[FILTER_PRIORITY1]
+        cancel_token = CancelToken()
+        cancel_token.cancel()
+        events = []
+        reporter = ProgressReporter(events.append, cancel_token)
+        with self.assertRaises(ScheduleCancelledException):
+            MonitorSearchSpace(monitor_dict, weekdays, fm, reporter=reporter)
+        with self.assertRaises(ScheduleCancelledException):
+            create_day_remote_groups(monitor_dict, weekdays, scenario.remote_filter_manager, 2, FILTER_PRIORITY1,
+                                     reporter=reporter)
+        with self.assertRaises(ScheduleCancelledException):
+            repair_monitors(monitor_dict, scenario.monitor_dict, weekdays, fm, day_monitor_combos, reporter=reporter)
+        self.assertEqual([(PHASE_MONITOR, STATUS_CANCELLED), (PHASE_REMOTE, STATUS_CANCELLED),
+                          (PHASE_MONITOR, STATUS_CANCELLED)], [(e.phase, e.status) for e in events])
+
+
+class ProgressStreamTest(unittest.TestCase):
+    def test_events_and_result(self):
+        from progress import PHASE_MONITOR, PHASE_REMOTE, STATUS_FOUND, ProgressStream
+        from scheduler import solve_schedule
+
+        scenario = create_scenario()
+        with ProgressStream(solve_schedule, scenario) as stream:
+            events = list(stream)
+        self.assertIn((PHASE_MONITOR, STATUS_FOUND), [(e.phase, e.status) for e in events])
+        self.assertTrue(any(e.phase == PHASE_REMOTE and e.max_num_of_remotes_per_day for e in events))
+        self.assertEqual(sorted(e.elapsed for e in events), [e.elapsed for e in events])
+        self.assertEqual(set(scenario.monitor_dict), set(stream.result))
+
+    def test_stop_returns_partial_result(self):
+        from progress import ProgressStream
+        from scheduler import solve_schedule
+
+        scenario = create_scenario()
+        with ProgressStream(solve_schedule, scenario) as stream:
+            for _ in stream:
+                stream.cancel_token.stop()
+        self.assertIsNotNone(stream.result)
+
+    def test_leaving_block_cancels(self):
+        from progress import ProgressStream, ScheduleCancelledException
+        from scheduler import solve_schedule
+
+        scenario = create_scenario()
+        with ProgressStream(solve_schedule, scenario) as stream:
+            next(iter(stream))
+        self.assertIsInstance(stream.exception, ScheduleCancelledException)
+
+
+if __name__ == '__main__':
+    unittest.main()
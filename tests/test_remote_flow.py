@@ -0,0 +1,124 @@
+import unittest
+
+from monitors import ERole, MONITOR_ROLES_ALL, NOT_AT_OFFICE_ROLES
+from tests.helpers import create_scenario
+
+
+def _create_monitor_schedule(scenario, max_num_of_remotes_per_day):
+    from monitors import assign_role_maxes, assign_remote_max
+    from scheduler import assign_monitors, copy_monitor_dict
+
+    weekdays = scenario.weekdays
+    monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+    assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, len(weekdays))
+    assign_monitors(monitor_dict, weekdays, scenario.monitor_filter_manager)
+    assign_remote_max(monitor_dict, len(weekdays), max_num_of_remotes_per_day)
+    return monitor_dict
+
+
+class MaxFlowTest(unittest.TestCase):
+    def test_max_flow(self):
+        from flow import MaxFlow
+
+        flow = MaxFlow(4)
+        e1 = flow.add_edge(0, 1, 2)
+        flow.add_edge(0, 2, 1)
+        flow.add_edge(1, 2, 1)
+        flow.add_edge(1, 3, 1)
+        e2 = flow.add_edge(2, 3, 2)
+        self.assertEqual(3, flow.max_flow(0, 3))
+        self.assertEqual(2, flow.get_flow(e1))
+        self.assertEqual(2, flow.get_flow(e2))
+        self.assertEqual(0, flow.max_flow(0, 3))
+
+    def test_cancel_flow_and_augment_again(self):
+        from flow import MaxFlow
+
+        flow = MaxFlow(4)
+        e1 = flow.add_edge(0, 1, 1)
+        e2 = flow.add_edge(1, 3, 1)
+        flow.add_edge(0, 2, 1)
+        flow.add_edge(2, 3, 1)
+        e3 = flow.add_edge(1, 2, 1)
+        self.assertEqual(2, flow.max_flow(0, 3))
+        for e in (e1, e2):
+            flow.cancel_flow(e)
+        flow.set_capacity(e2, 0)
+        self.assertEqual(0, flow.max_flow(0, 3))
+        self.assertEqual(0, flow.get_flow(e3))
+        with self.assertRaises(ValueError):
+            flow.set_capacity(e1, -1)
+
+
+class RemoteFlow(unittest.TestCase):
+    def test_assign_remotes_by_flow(self):
+        from filters import FILTER_PRIORITY1
+        from remote_flow import assign_remotes_by_flow
+
+        scenario = create_scenario()
+        monitor_dict = _create_monitor_schedule(scenario, 1)
+        cp_md, num_of_unassigned_days = assign_remotes_by_flow(
+            monitor_dict, scenario.weekdays, scenario.remote_filter_manager, 1, FILTER_PRIORITY1)
+        self.assertEqual(0, num_of_unassigned_days)
+        for day in scenario.weekdays:
+            not_at_office = {name for name, m in cp_md.items() if m.schedule.get(day) in NOT_AT_OFFICE_ROLES}
+            self.assertEqual(1, len(not_at_office))
+            for group in scenario.must_work_at_office_groups:
+                self.assertFalse(not_at_office >= group)
+        for monitor in cp_md.values():
+            if max_count := monitor.role_max.get(ERole.R):
+                self.assertLessEqual(monitor.get_role_count(ERole.R), max_count)
+        # the input is left untouched
+        self.assertFalse(any([ERole.R in m.schedule.values() for m in monitor_dict.values()]))
+
+    def test_deterministic(self):
+        import random
+        from filters import FILTER_PRIORITY1
+        from remote_flow import assign_remotes_by_flow
+
+        scenario = create_scenario()
+        monitor_dict = _create_monitor_schedule(scenario, 2)
+        schedules = []
+        for seed in (0, 1):
+            random.seed(seed)
+            cp_md, _ = assign_remotes_by_flow(
+                monitor_dict, scenario.weekdays, scenario.remote_filter_manager, 2, FILTER_PRIORITY1)
+            schedules.append({name: m.schedule for name, m in cp_md.items()})
+        self.assertEqual(schedules[0], schedules[1])
+        # an explicit random generator gives the same result for the same seed
+        schedules = []
+        for _ in range(2):
+            cp_md, _ = assign_remotes_by_flow(monitor_dict, scenario.weekdays, scenario.remote_filter_manager, 2,
+                                              FILTER_PRIORITY1, rng=random.Random(3))
+            schedules.append({name: m.schedule for name, m in cp_md.items()})
+        self.assertEqual(schedules[0], schedules[1])
+
+    def test_network_is_shared_with_cap_check(self):
+        from diagnostics import PHASE_REMOTE_FLOW, SearchDiagnostics
+        from scheduler import assign_remotes
+
+        scenario = create_scenario()
+        monitor_dict = _create_monitor_schedule(scenario, 2)
+        for monitor in monitor_dict.values():
+            monitor.role_max[ERole.R] = 1
+        diagnostics = SearchDiagnostics()
+        assign_remotes(monitor_dict, scenario.weekdays, scenario.remote_filter_manager, 2, diagnostics=diagnostics)
+        # the cap check and the flow assignment use one network, so each day is sampled once
+        samples = [r['samples'] for r in diagnostics.to_dict()['days'] if r['phase'] == PHASE_REMOTE_FLOW]
+        self.assertEqual([1] * len(scenario.weekdays), samples)
+
+    def test_cap_infeasible(self):
+        from remote_flow import is_remote_cap_feasible
+
+        scenario = create_scenario()
+        monitor_dict = _create_monitor_schedule(scenario, 2)
+        fm = scenario.remote_filter_manager
+        self.assertTrue(is_remote_cap_feasible(monitor_dict, scenario.weekdays, fm, 2))
+        for monitor in monitor_dict.values():
+            monitor.role_max[ERole.R] = 1
+        # 7 remote days in total cannot cover 2 remotes on each of 20 days.
+        self.assertFalse(is_remote_cap_feasible(monitor_dict, scenario.weekdays, fm, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()
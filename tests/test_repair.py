@@ -0,0 +1,134 @@
+import random
+import unittest
+
+from monitors import ERole, MONITOR_ROLES_ALL
+from tests.helpers import create_scenario
+
+
+def _find_violated_days(monitor_dict, weekdays, fm, filter_priority):
+    violated_days = []
+    for day in weekdays:
+        assigned = {name: m.schedule.pop(day) for name, m in monitor_dict.items()
+                    if m.schedule.get(day) in MONITOR_ROLES_ALL}
+        filters = fm.get_filters(monitor_dict.values(), day, filter_priority, static=False)
+        for name, role in assigned.items():
+            monitor_dict[name].schedule[day] = role
+        if not all([f({role: name for name, role in assigned.items()}) for f in filters]):
+            violated_days.append(day)
+    return violated_days
+
+
+class RepairMonitors(unittest.TestCase):
+    def test_fill_unassigned_days(self):
+        from filters import FILTER_PRIORITY1
+        from monitors import assign_role_maxes
+        from repair import repair_monitors
+        from scheduler import MonitorSearchSpace, _assign_monitors, copy_monitor_dict
+
+        random.seed(0)
+        scenario = create_scenario()
+        weekdays = scenario.weekdays
+        fm = scenario.monitor_filter_manager
+        for _ in range(5):
+            monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+            assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, len(weekdays))
+            base_monitor_dict = copy_monitor_dict(monitor_dict)
+            search_space = MonitorSearchSpace(monitor_dict, weekdays, fm)
+            day_monitor_combos = search_space.day_monitor_combos[FILTER_PRIORITY1]
+            _assign_monitors(monitor_dict, day_monitor_combos, search_space.sorted_weekdays, fm, FILTER_PRIORITY1,
+                             force_exec=True)
+
+            num_of_unassigned_days = repair_monitors(
+                monitor_dict, base_monitor_dict, weekdays, fm, day_monitor_combos, FILTER_PRIORITY1)
+            self.assertEqual(0, num_of_unassigned_days)
+            for day in weekdays:
+                roles = [m.schedule.get(day) for m in monitor_dict.values()]
+                self.assertEqual(3, len([r for r in roles if r in MONITOR_ROLES_ALL]))
+            self.assertEqual([], _find_violated_days(monitor_dict, weekdays, fm, FILTER_PRIORITY1))
+            self.assertEqual(ERole.AM1, monitor_dict['A'].schedule[weekdays[6]])
+            self.assertEqual(ERole.OTHER, monitor_dict['D'].schedule[weekdays[4]])
+
+    def test_tight_schedule(self):
+        from filters import FILTER_PRIORITY1
+        from monitors import assign_role_maxes
+        from repair import repair_monitors
+        from scheduler import MonitorSearchSpace, _assign_monitors, copy_monitor_dict
+        from validator import RULE_MONITOR_ROLES, validate_schedule
+
+        def count_monitor_roles_violations(monitor_dict):
+            violations = validate_schedule(monitor_dict, weekdays, fm, scenario.remote_filter_manager,
+                                           scenario.monitor_dict, FILTER_PRIORITY1)
+            return len([v for v in violations if v.rule == RULE_MONITOR_ROLES])
+
+        random.seed(0)
+        scenario = create_scenario()
+        weekdays = scenario.weekdays
+        fm = scenario.monitor_filter_manager
+        # three of the seven monitors are out every day, so only four are left for the three roles
+        names = list(scenario.monitor_dict)
+        for idx, day in enumerate(weekdays):
+            for k in range(3):
+                scenario.monitor_dict[names[(idx * 2 + k) % len(names)]].schedule.setdefault(day, ERole.OTHER)
+        for _ in range(5):
+            monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+            assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, len(weekdays))
+            base_monitor_dict = copy_monitor_dict(monitor_dict)
+            search_space = MonitorSearchSpace(monitor_dict, weekdays, fm)
+            day_monitor_combos = search_space.day_monitor_combos[FILTER_PRIORITY1]
+            num_of_unassigned_days = _assign_monitors(monitor_dict, day_monitor_combos, search_space.sorted_weekdays,
+                                                      fm, FILTER_PRIORITY1, force_exec=True)
+            self.assertGreater(num_of_unassigned_days, 0)
+            self.assertEqual(num_of_unassigned_days, count_monitor_roles_violations(monitor_dict))
+
+            self.assertEqual(0, repair_monitors(monitor_dict, base_monitor_dict, weekdays, fm, day_monitor_combos,
+                                                FILTER_PRIORITY1))
+            self.assertEqual(0, count_monitor_roles_violations(monitor_dict))
+            self.assertEqual([], _find_violated_days(monitor_dict, weekdays, fm, FILTER_PRIORITY1))
+
+    def test_impossible_days_are_counted(self):
+        from filters import FILTER_PRIORITY1
+        from repair import repair_monitors
+        from scheduler import copy_monitor_dict
+
+        scenario = create_scenario()
+        weekdays = scenario.weekdays
+        monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+        day_monitor_combos = {day: [] for day in weekdays}
+        num_of_unassigned_days = repair_monitors(
+            monitor_dict, scenario.monitor_dict, weekdays, scenario.monitor_filter_manager, day_monitor_combos,
+            FILTER_PRIORITY1)
+        self.assertEqual(len(weekdays), num_of_unassigned_days)
+
+
+class RepairRemotes(unittest.TestCase):
+    def test_fill_unassigned_days(self):
+        from filters import FILTER_PRIORITY1
+        from monitors import assign_role_maxes, assign_remote_max
+        from repair import repair_remotes
+        from scheduler import _assign_remotes, assign_monitors, copy_monitor_dict, create_day_remote_groups
+
+        random.seed(0)
+        scenario = create_scenario()
+        weekdays = scenario.weekdays
+        fm = scenario.remote_filter_manager
+        monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+        assign_role_maxes(monitor_dict, MONITOR_ROLES_ALL, len(weekdays))
+        assign_monitors(monitor_dict, weekdays, scenario.monitor_filter_manager)
+        assign_remote_max(monitor_dict, len(weekdays), 1)
+        day_remote_groups = create_day_remote_groups(monitor_dict, weekdays, fm, 1, FILTER_PRIORITY1)
+        cp_md, _ = _assign_remotes(monitor_dict, weekdays, fm, 1, FILTER_PRIORITY1, day_remote_groups,
+                                   force_exec=True)
+
+        num_of_unassigned_days = repair_remotes(cp_md, monitor_dict, weekdays, fm, day_remote_groups,
+                                                FILTER_PRIORITY1)
+        self.assertEqual(0, num_of_unassigned_days)
+        for day in weekdays:
+            if day_remote_groups[day] is not None:
+                self.assertEqual(1, len([m for m in cp_md.values() if m.schedule.get(day) == ERole.R]))
+        for monitor in cp_md.values():
+            if max_count := monitor.role_max.get(ERole.R):
+                self.assertLessEqual(monitor.get_role_count(ERole.R), max_count)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import csv
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from monitors import ERole, Monitor
+
+D1, D2 = datetime(2020, 8, 3), datetime(2020, 8, 4)
+
+
+def _create_monitor_dict() -> dict:
+    schedules = {
+        'A': {D1: ERole.AM1, D2: ERole.AM2, D1 - timedelta(days=3): ERole.PM},
+        'B': {D1: ERole.AM2, D2: ERole.AM1},
+        'C': {D1: ERole.PM, D2: ERole.R},
+        'D': {D1: ERole.N, D2: ERole.PM},
+    }
+    monitor_dict = {}
+    for name, schedule in schedules.items():
+        monitor_dict[name] = Monitor(name, True)
+        monitor_dict[name].schedule = schedule
+    monitor_dict['A'].role_max = {ERole.AM1: 1, ERole.AM2: 1, ERole.PM: 2, ERole.R: 1}
+    return monitor_dict
+
+
+class ScheduleReportTest(unittest.TestCase):
+    def test_report(self):
+        from report import ScheduleReport
+
+        report = ScheduleReport(_create_monitor_dict(), [D2, D1])
+        self.assertEqual([D1, D2], list(report.rosters))
+        self.assertEqual({ERole.AM1: ['B'], ERole.AM2: ['A'], ERole.PM: ['D'], ERole.R: ['C']}, report.rosters[D2])
+        # days outside the weekdays are counted like Monitor.get_role_count
+        self.assertEqual({'AM1': 1, 'AM2': 1, 'PM': 1, 'SUM': 3, 'R': 0}, report.role_counts['A'])
+        self.assertEqual({'AM1': 1, 'AM2': 1, 'PM': 2, 'SUM': 4, 'R': 1}, report.role_maxes['A'])
+        self.assertEqual({'AM1': None, 'AM2': None, 'PM': None, 'SUM': None, 'R': None}, report.role_maxes['B'])
+        self.assertEqual({'AM1': 1, 'AM2': 1, 'PM': 1, 'SUM': 2, 'R': 1}, report.spreads)
+        self.assertEqual(6, report.fairness_score)
+
+        d = report.to_dict()
+        self.assertEqual({'day': '2020-08-03', 'AM1': 'A', 'AM2': 'B', 'PM': 'C', 'N': ['D'], 'R': []},
+                         d['rosters'][0])
+        self.assertEqual(6, d['fairness_score'])
+
+    def test_fairness_score(self):
+        from scheduler import calc_fairness_score, solve_schedule
+        from tests.helpers import create_scenario
+
+        monitor_dict = solve_schedule(create_scenario(weeks=2))
+        expected = 0
+        for roles in ((ERole.AM1,), (ERole.AM2,), (ERole.PM,), (ERole.AM1, ERole.AM2, ERole.PM), (ERole.R,)):
+            counts = [monitor.get_role_count(*roles) for monitor in monitor_dict.values()]
+            expected += max(counts) - min(counts)
+        self.assertEqual(expected, calc_fairness_score(monitor_dict))
+
+    def test_write(self):
+        from openpyxl import Workbook
+        from report import REPORT_SHEET_NAME, ScheduleReport
+
+        report = ScheduleReport(_create_monitor_dict(), [D1, D2])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.csv')
+            report.write_csv(path)
+            with open(path, encoding='utf-8', newline='') as f:
+                rows = list(csv.reader(f))
+        self.assertEqual(['Name', 'AM1', 'AM2', 'PM', 'SUM', 'R'], rows[0][:6])
+        self.assertEqual(['A', '1', '1', '1', '3', '0', '1', '1', '2', '4', '1'], rows[1])
+        self.assertEqual(5, len(rows))
+
+        wb = Workbook()
+        report.write_sheet(wb)
+        report.write_sheet(wb)
+        self.assertEqual(1, wb.sheetnames.count(REPORT_SHEET_NAME))
+        self.assertEqual('A', wb[REPORT_SHEET_NAME].cell(2, 1).value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+from datetime import timedelta
 import unittest
 
 from monitors import ERole, Monitor
@@ -72,6 +73,140 @@ class GetMonitorCombos(unittest.TestCase):
         self.assertCountEqual(expected, actual)
 
 
+class MonitorSearchSpaceTest(unittest.TestCase):
+    def test_static_filters_applied(self):
+        from filters import FILTER_PRIORITY1, FILTER_PRIORITY2
+        from scheduler import MonitorSearchSpace
+        from tests.helpers import create_scenario
+
+        scenario = create_scenario()
+        search_space = MonitorSearchSpace(
+            scenario.monitor_dict, scenario.weekdays, scenario.monitor_filter_manager)
+        for filter_priority in (FILTER_PRIORITY1, FILTER_PRIORITY2):
+            day_monitor_combos = search_space.day_monitor_combos[filter_priority]
+            # D is absent on the 5th weekday and A is manually assigned AM1 on the 7th weekday
+            self.assertTrue(all('D' not in mc.values() for mc in day_monitor_combos[scenario.weekdays[4]]))
+            self.assertTrue(all(mc[ERole.AM1] == 'A' for mc in day_monitor_combos[scenario.weekdays[6]]))
+            self.assertEqual(len(search_space.all_monitor_combo),
+                             len(day_monitor_combos[scenario.weekdays[0]]))
+        # days with manual inputs are assigned first
+        self.assertEqual({scenario.weekdays[4], scenario.weekdays[6]}, set(search_space.sorted_weekdays[:2]))
+
+    def test_am_pair_combos(self):
+        from filters import FILTER_PRIORITY1
+        from scheduler import MonitorSearchSpace
+        from tests.helpers import create_scenario
+
+        scenario = create_scenario()
+        search_space = MonitorSearchSpace(
+            scenario.monitor_dict, scenario.weekdays, scenario.monitor_filter_manager)
+        day_monitor_combos = search_space.day_monitor_combos[FILTER_PRIORITY1]
+        day_am_pair_combos = search_space.day_am_pair_combos[FILTER_PRIORITY1]
+        day = scenario.weekdays[0]
+        self.assertEqual(len(day_monitor_combos[day]), 2 * len(day_am_pair_combos[day]))
+        names = list(scenario.monitor_dict)
+        self.assertTrue(all(names.index(mc[ERole.AM1]) < names.index(mc[ERole.AM2])
+                            for mc in day_am_pair_combos[day]))
+        # A is manually assigned AM1 on the 7th weekday, which is settled after the search
+        day = scenario.weekdays[6]
+        self.assertEqual(len(day_monitor_combos[day]), len(day_am_pair_combos[day]))
+        self.assertTrue(all('A' in (mc[ERole.AM1], mc[ERole.AM2]) for mc in day_am_pair_combos[day]))
+
+
+class SolveSchedules(unittest.TestCase):
+    def test_distinct_solutions(self):
+        from scheduler import calc_fairness_score, solve_schedules
+        from tests.helpers import create_scenario
+
+        scenario = create_scenario(weeks=2)
+        solutions = solve_schedules(scenario, 3)
+        self.assertEqual(3, len(solutions))
+        schedules = [[m.schedule for m in monitor_dict.values()] for monitor_dict, _ in solutions]
+        self.assertNotEqual(schedules[0], schedules[1])
+        self.assertNotEqual(schedules[1], schedules[2])
+        self.assertNotEqual(schedules[0], schedules[2])
+        scores = [fairness_score for _, fairness_score in solutions]
+        self.assertEqual(sorted(scores), scores)
+        self.assertEqual(scores[0], calc_fairness_score(solutions[0][0]))
+
+    def test_violating_solutions_are_dropped(self):
+        import contextlib
+        import io
+        import random
+        from scheduler import ScheduleViolationException, copy_monitor_dict, select_valid_solutions, solve_schedules
+        from tests.helpers import create_scenario
+
+        random.seed(0)
+        scenario = create_scenario(weeks=2)
+        solutions = solve_schedules(scenario, 2)
+        # the second candidate loses its PM on the first day
+        broken_md = copy_monitor_dict(solutions[1][0])
+        day = scenario.weekdays[0]
+        pm_name = next(name for name, m in broken_md.items() if m.schedule[day] == ERole.PM)
+        broken_md[pm_name].schedule[day] = ERole.N
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            valid_solutions = select_valid_solutions(scenario, [solutions[0], (broken_md, solutions[1][1])])
+        self.assertEqual([solutions[0]], valid_solutions)
+        self.assertIn('Candidate 2 is not saved', stderr.getvalue())
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(2, len(select_valid_solutions(scenario, [solutions[0], (broken_md, 0)], force=True)))
+            with self.assertRaises(ScheduleViolationException):
+                select_valid_solutions(scenario, [(broken_md, 0)])
+
+
+class SolveHorizon(unittest.TestCase):
+    def test_split_into_windows(self):
+        from scheduler import split_into_windows
+        from tests.helpers import create_weekdays
+
+        weekdays = create_weekdays(weeks=13)
+        windows = split_into_windows(weekdays)
+        self.assertEqual([8, 9, 10], [w[0].month for w in windows])
+        self.assertEqual(weekdays, [day for w in windows for day in w])
+        windows = split_into_windows(weekdays, window_months=2)
+        self.assertEqual([(8, 9), (10, 10)], [(w[0].month, w[-1].month) for w in windows])
+
+    def test_solve_horizon(self):
+        import random
+        from scheduler import solve_horizon, split_into_windows
+        from tests.helpers import create_scenario
+        from validator import validate_schedule
+
+        random.seed(0)
+        scenario = create_scenario(weeks=6)
+        monitor_dict = solve_horizon(scenario)
+        for monitor in monitor_dict.values():
+            self.assertEqual(set(scenario.weekdays), set(monitor.schedule))
+            # the quotas of the windows are kept, so the validator can check them
+            self.assertEqual({ERole.AM1, ERole.AM2, ERole.PM, ERole.R}, set(monitor.role_max))
+        # the schedule holds across the boundary between the two windows as well
+        self.assertEqual(2, len(split_into_windows(scenario.weekdays)))
+        violations = validate_schedule(monitor_dict, scenario.weekdays, scenario.monitor_filter_manager,
+                                       scenario.remote_filter_manager, scenario.monitor_dict)
+        self.assertEqual([], violations)
+        self.assertEqual(ERole.OTHER, monitor_dict['D'].schedule[scenario.weekdays[4]])
+        self.assertEqual(ERole.AM1, monitor_dict['A'].schedule[scenario.weekdays[6]])
+        # the scenario itself is left untouched
+        self.assertEqual(1, len(scenario.monitor_dict['A'].schedule))
+
+    def test_outside_days_are_not_counted(self):
+        from monitors import MONITOR_ROLES_ALL
+        from scheduler import _exclude_outside_role_counts
+        from tests.helpers import create_weekdays
+
+        weekdays = create_weekdays(weeks=1)
+        monitor = Monitor('A', True)
+        monitor.role_max = {ERole.AM1: 1, ERole.AM2: 0}
+        monitor.schedule[weekdays[0] - timedelta(days=3)] = ERole.AM1
+        monitor.schedule[weekdays[0] - timedelta(days=4)] = ERole.AM2
+        monitor.schedule[weekdays[0] - timedelta(days=5)] = ERole.PM
+        monitor.schedule[weekdays[0]] = ERole.PM
+        _exclude_outside_role_counts({'A': monitor}, weekdays, MONITOR_ROLES_ALL)
+        # a max of 0 is a limit as well, and roles without a max stay unlimited
+        self.assertEqual({ERole.AM1: 2, ERole.AM2: 1}, monitor.role_max)
+
+
 def _create_monitor_combo(m1: Monitor, m2: Monitor, m3: Monitor):
     return {ERole.AM1: m1.name, ERole.AM2: m2.name, ERole.PM: m3.name}
 
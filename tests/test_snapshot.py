@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from monitors import ERole, MONITOR_ROLES_ALL
+from tests.helpers import create_scenario
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SnapshotTest(unittest.TestCase):
+    def test_round_trip(self):
+        from snapshot import scenario_from_dict, scenario_to_dict
+
+        scenario = create_scenario()
+        scenario.monitor_dict['B'].role_max[ERole.R] = 3
+        d = json.loads(json.dumps(scenario_to_dict(scenario)))
+        restored = scenario_from_dict(d)
+        self.assertEqual(scenario.weekday_dict, restored.weekday_dict)
+        self.assertEqual(scenario.must_work_at_office_groups, restored.must_work_at_office_groups)
+        self.assertEqual(scenario.monitor_filter_manager.filters, restored.monitor_filter_manager.filters)
+        self.assertEqual(scenario.remote_filter_manager.filters, restored.remote_filter_manager.filters)
+        self.assertEqual(scenario.max_num_of_remotes_per_day, restored.max_num_of_remotes_per_day)
+        for name, monitor in scenario.monitor_dict.items():
+            self.assertEqual(monitor.is_fix_specialist, restored.monitor_dict[name].is_fix_specialist)
+            self.assertEqual(monitor.schedule, restored.monitor_dict[name].schedule)
+            self.assertEqual(monitor.role_max, restored.monitor_dict[name].role_max)
+
+    def test_unsupported_version(self):
+        from snapshot import scenario_from_dict, scenario_to_dict
+
+        d = scenario_to_dict(create_scenario())
+        d['version'] = 0
+        with self.assertRaises(ValueError):
+            scenario_from_dict(d)
+
+
+class JsonCommandLine(unittest.TestCase):
+    def test_solver_core_does_not_import_openpyxl(self):
+        code = 'import sys, scheduler, snapshot; print("openpyxl" in sys.modules)'
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, capture_output=True, text=True,
+                                check=True)
+        self.assertEqual('False', result.stdout.strip())
+
+    def test_json_input(self):
+        from scheduler import main
+        from snapshot import save_snapshot
+
+        scenario = create_scenario()
+        with tempfile.TemporaryDirectory() as dir_path:
+            snapshot_path = os.path.join(dir_path, 'scenario.json')
+            output_path = os.path.join(dir_path, 'schedule.json')
+            save_snapshot(scenario, snapshot_path)
+            main(['--json', snapshot_path, '-o', output_path])
+            with open(output_path, encoding='utf-8') as f:
+                schedule = json.load(f)
+        self.assertEqual(set(scenario.monitor_dict), set(schedule))
+        for day in scenario.weekdays:
+            roles = [schedule[name][f'{day:%Y-%m-%d}'] for name in schedule]
+            self.assertEqual(3, len([r for r in roles if ERole[r] in MONITOR_ROLES_ALL]))
+        self.assertEqual('AM1', schedule['A'][f'{scenario.weekdays[6]:%Y-%m-%d}'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import unittest
+from datetime import timedelta
+
+from monitors import ERole
+
+
+def _validate(scenario, monitor_dict, base_monitor_dict=None):
+    from validator import validate_schedule
+
+    return validate_schedule(monitor_dict, scenario.weekdays, scenario.monitor_filter_manager,
+                             scenario.remote_filter_manager, base_monitor_dict)
+
+
+def _swap_roles(monitor_dict, day, name1, name2):
+    schedule1, schedule2 = monitor_dict[name1].schedule, monitor_dict[name2].schedule
+    schedule1[day], schedule2[day] = schedule2[day], schedule1[day]
+
+
+class ValidateScheduleTest(unittest.TestCase):
+    def setUp(self):
+        import random
+        from scheduler import solve_schedule
+        from tests.helpers import create_scenario
+
+        random.seed(0)
+        self.scenario = create_scenario(weeks=2)
+        self.monitor_dict = solve_schedule(self.scenario)
+
+    def test_solved_schedule(self):
+        from filters import FILTER_PRIORITY1
+
+        violations = _validate(self.scenario, self.monitor_dict, self.scenario.monitor_dict)
+        self.assertEqual([], [v for v in violations if v.priority == FILTER_PRIORITY1])
+
+    def test_monitor_roles(self):
+        from validator import RULE_FIX_SPECIALIST, RULE_MONITOR_ROLES
+
+        day = self.scenario.weekdays[0]
+        pm_name = next(name for name, m in self.monitor_dict.items() if m.schedule[day] == ERole.PM)
+        self.monitor_dict[pm_name].schedule[day] = ERole.N
+        self.assertIn((RULE_MONITOR_ROLES, day), [(v.rule, v.day) for v in _validate(self.scenario, self.monitor_dict)])
+
+        # only D, F and G are not fix specialists
+        day = self.scenario.weekdays[1]
+        for name, monitor in self.monitor_dict.items():
+            monitor.schedule[day] = {'D': ERole.AM1, 'F': ERole.AM2, 'G': ERole.PM}.get(name, ERole.N)
+        actual = [(v.rule, v.day) for v in _validate(self.scenario, self.monitor_dict)]
+        self.assertIn((RULE_FIX_SPECIALIST, day), actual)
+
+    def test_adjacent_days(self):
+        from filters import EMonitorComboFilters, ERemoteFilters
+
+        day1, day2 = self.scenario.weekdays[1], self.scenario.weekdays[2]
+        self.monitor_dict['C'].schedule[day1] = ERole.PM
+        self.monitor_dict['C'].schedule[day2] = ERole.AM2
+        self.monitor_dict['F'].schedule[day1] = ERole.R
+        self.monitor_dict['F'].schedule[day2] = ERole.R
+        actual = [(v.rule, v.day, v.names) for v in _validate(self.scenario, self.monitor_dict)]
+        self.assertIn((EMonitorComboFilters.PM_AM_IN_A_ROW.name, day2, ('C', )), actual)
+        self.assertIn((ERemoteFilters.REMOTE_2DAYS_IN_A_ROW.name, day2, ('F', )), actual)
+
+        # a day before the weekdays (e.g. the previous window) is checked as well
+        pre_day = self.scenario.weekdays[0] - timedelta(days=3)
+        am_name = next(name for name, m in self.monitor_dict.items()
+                       if m.schedule[self.scenario.weekdays[0]] == ERole.AM1)
+        self.monitor_dict[am_name].schedule[pre_day] = ERole.AM2
+        actual = [(v.rule, v.day, v.names) for v in _validate(self.scenario, self.monitor_dict)]
+        self.assertNotIn((EMonitorComboFilters.AM_AM_IN_A_ROW.name, self.scenario.weekdays[0], (am_name, )), actual)
+        self.monitor_dict[am_name].schedule[self.scenario.weekdays[0] - timedelta(days=1)] = ERole.AM2
+        actual = [(v.rule, v.day, v.names) for v in _validate(self.scenario, self.monitor_dict)]
+        self.assertIn((EMonitorComboFilters.AM_AM_IN_A_ROW.name, self.scenario.weekdays[0], (am_name, )), actual)
+
+    def test_must_work_at_office_group(self):
+        from filters import ERemoteFilters
+        from scheduler import copy_monitor_dict
+
+        day = self.scenario.weekdays[3]
+        for name in ('F', 'G'):
+            self.monitor_dict[name].schedule[day] = ERole.R
+        actual = [(v.rule, v.day, v.names) for v in _validate(self.scenario, self.monitor_dict)]
+        self.assertIn((ERemoteFilters.MUST_WORK_AT_OFFICE_GROUP.name, day, ('F', 'G')), actual)
+
+        # the group is out only because of manual inputs, so the remote assignment is not to blame
+        base_monitor_dict = copy_monitor_dict(self.scenario.monitor_dict)
+        base_monitor_dict['F'].schedule[day] = ERole.R
+        self.monitor_dict['G'].schedule[day] = ERole.OTHER
+        base_monitor_dict['G'].schedule[day] = ERole.OTHER
+        actual = [v.rule for v in _validate(self.scenario, self.monitor_dict, base_monitor_dict)]
+        self.assertNotIn(ERemoteFilters.MUST_WORK_AT_OFFICE_GROUP.name, actual)
+        # a remote added by the solver to a group that is otherwise out is still flagged
+        base_monitor_dict['F'].schedule.pop(day)
+        actual = [(v.rule, v.day, v.names) for v in _validate(self.scenario, self.monitor_dict, base_monitor_dict)]
+        self.assertIn((ERemoteFilters.MUST_WORK_AT_OFFICE_GROUP.name, day, ('F', 'G')), actual)
+
+    def test_role_max_and_manual_input(self):
+        from filters import EMonitorComboFilters, FILTER_PRIORITY1
+
+        monitor = max(self.monitor_dict.values(), key=lambda m: m.get_role_count(ERole.PM))
+        monitor.role_max[ERole.PM] = monitor.get_role_count(ERole.PM) - 1
+        day = self.scenario.weekdays[6]
+        _swap_roles(self.monitor_dict, day, 'A',
+                    next(name for name, m in self.monitor_dict.items() if m.schedule[day] == ERole.AM2))
+        violations = _validate(self.scenario, self.monitor_dict, self.scenario.monitor_dict)
+        actual = [(v.rule, v.day, v.names) for v in violations if v.priority == FILTER_PRIORITY1]
+        self.assertIn((EMonitorComboFilters.MONITORING_MAX.name, None, (monitor.name, )), actual)
+        self.assertIn((EMonitorComboFilters.MANUAL_INPUT.name, day, ('A', )), actual)
+        # manual inputs are not checked without the base schedule
+        actual = [v.rule for v in _validate(self.scenario, self.monitor_dict)]
+        self.assertNotIn(EMonitorComboFilters.MANUAL_INPUT.name, actual)
+
+    def test_disabled_filters(self):
+        from filters import EMonitorComboFilters, MonitorFilterManager
+        from validator import validate_schedule
+
+        day1, day2 = self.scenario.weekdays[1], self.scenario.weekdays[2]
+        self.monitor_dict['C'].schedule[day1] = ERole.PM
+        self.monitor_dict['C'].schedule[day2] = ERole.PM
+        fm = MonitorFilterManager(None, filters=[EMonitorComboFilters.PM_PM_IN_A_ROW])
+        violations = validate_schedule(self.monitor_dict, self.scenario.weekdays, fm,
+                                       self.scenario.remote_filter_manager)
+        self.assertIn(EMonitorComboFilters.PM_PM_IN_A_ROW.name, [v.rule for v in violations])
+        # PM_PM_IN_A_ROW is not enabled in the scenario
+        violations = _validate(self.scenario, self.monitor_dict)
+        self.assertNotIn(EMonitorComboFilters.PM_PM_IN_A_ROW.name, [v.rule for v in violations])
+
+
+class SaveGateTest(unittest.TestCase):
+    def test_priority1_violation_is_not_saved(self):
+        import os
+        import tempfile
+        from scheduler import main
+        from snapshot import save_snapshot
+        from tests.helpers import create_scenario
+
+        # only F and G are left for the three monitor roles on that day
+        scenario = create_scenario(weeks=2)
+        for name in 'ABCDE':
+            scenario.monitor_dict[name].schedule[scenario.weekdays[3]] = ERole.OTHER
+        with tempfile.TemporaryDirectory() as dir_path:
+            snapshot_path = os.path.join(dir_path, 'scenario.json')
+            output_path = os.path.join(dir_path, 'schedule.json')
+            save_snapshot(scenario, snapshot_path)
+            self.assertEqual(1, main(['--json', snapshot_path, '-o', output_path]))
+            self.assertFalse(os.path.exists(output_path))
+            self.assertEqual(0, main(['--json', snapshot_path, '-o', output_path, '--force']))
+            self.assertTrue(os.path.exists(output_path))
+
+    def test_validate_only(self):
+        import os
+        import random
+        import tempfile
+        from scheduler import main, solve_schedule
+        from snapshot import save_snapshot
+        from tests.helpers import create_scenario
+
+        random.seed(0)
+        scenario = create_scenario(weeks=2)
+        scenario.monitor_dict = solve_schedule(scenario)
+        with tempfile.TemporaryDirectory() as dir_path:
+            snapshot_path = os.path.join(dir_path, 'scenario.json')
+            save_snapshot(scenario, snapshot_path)
+            self.assertEqual(0, main(['--json', snapshot_path, '--validate-only']))
+
+            # a hand-edited schedule without PM on the first day
+            day = scenario.weekdays[0]
+            pm_name = next(name for name, m in scenario.monitor_dict.items() if m.schedule[day] == ERole.PM)
+            scenario.monitor_dict[pm_name].schedule[day] = ERole.N
+            save_snapshot(scenario, snapshot_path)
+            self.assertEqual(1, main(['--json', snapshot_path, '--validate-only']))
+
+
+if __name__ == '__main__':
+    unittest.main()
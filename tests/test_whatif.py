@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+
+from monitors import ERole
+from tests.helpers import create_scenario
+
+
+class PerturbationTest(unittest.TestCase):
+    def test_apply(self):
+        from filters import EMonitorComboFilters, ERemoteFilters
+        from whatif import Perturbation
+
+        scenario = create_scenario()
+        day = scenario.weekdays[0]
+        perturbation = Perturbation('test', other_days={'B': [day]}, max_num_of_remotes_per_day=3,
+                                    enabled_filters=['PM_PM_IN_A_ROW'], disabled_filters=['REMOTE_MAX'])
+        applied = perturbation.apply(scenario)
+        self.assertEqual(ERole.OTHER, applied.monitor_dict['B'].schedule[day])
+        self.assertNotIn(day, scenario.monitor_dict['B'].schedule)
+        self.assertEqual(3, applied.max_num_of_remotes_per_day)
+        self.assertIn(EMonitorComboFilters.PM_PM_IN_A_ROW, applied.monitor_filter_manager.filters)
+        self.assertNotIn(EMonitorComboFilters.PM_PM_IN_A_ROW, scenario.monitor_filter_manager.filters)
+        self.assertNotIn(ERemoteFilters.REMOTE_MAX, applied.remote_filter_manager.filters)
+        self.assertIn(ERemoteFilters.REMOTE_MAX, scenario.remote_filter_manager.filters)
+
+    def test_unknown_filter(self):
+        from whatif import Perturbation
+
+        with self.assertRaises(ValueError):
+            Perturbation('test', disabled_filters=['UNKNOWN']).apply(create_scenario())
+
+
+class EvaluateWhatIfs(unittest.TestCase):
+    def test_find_infeasible_days(self):
+        from scheduler import MonitorSearchSpace
+        from whatif import Perturbation, find_infeasible_days
+
+        scenario = create_scenario()
+        day = scenario.weekdays[2]
+        scenario = Perturbation('fix_leave', other_days={name: [day] for name in 'ABCE'}).apply(scenario)
+        search_space = MonitorSearchSpace(scenario.monitor_dict, scenario.weekdays, scenario.monitor_filter_manager)
+        self.assertEqual([day], find_infeasible_days(scenario))
+        self.assertEqual([day], find_infeasible_days(scenario, search_space))
+
+    def test_evaluate(self):
+        import random
+        from whatif import Perturbation, evaluate_what_ifs, format_what_if_table
+
+        scenario = create_scenario()
+        day = scenario.weekdays[2]
+        perturbations = [
+            Perturbation('base'),
+            # A, B and C are left and can still cover AM1, AM2 and PM
+            Perturbation('leave', other_days={name: [day] for name in 'DEFG'}),
+            # no fix specialist is left for AM
+            Perturbation('fix_leave', other_days={name: [day] for name in 'ABCE'}),
+        ]
+        # threads share the global random, so the perturbations are evaluated one by one with a fixed seed,
+        # and the time limit is only a safety net
+        random.seed(0)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            results = evaluate_what_ifs(scenario, perturbations, time_limit=60.0, executor=executor)
+        self.assertEqual(['base', 'leave', 'fix_leave'], [r.name for r in results])
+        self.assertTrue(results[0].is_feasible)
+        self.assertEqual(0, results[0].num_of_unassigned_monitor_days)
+        self.assertEqual([], results[1].infeasible_days)
+        self.assertEqual([day], results[2].infeasible_days)
+        self.assertFalse(results[2].is_feasible)
+        self.assertEqual(4, len(format_what_if_table(results).splitlines()))
+
+
+if __name__ == '__main__':
+    unittest.main()
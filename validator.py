@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from filters import FILTER_PRIORITY1, FILTER_PRIORITY2, EMonitorComboFilters, ERemoteFilters
+from filters import MonitorFilterManager, RemoteFilterManager
+from monitors import ERole, MONITOR_ROLES_ALL, MONITOR_ROLES_AM, NOT_AT_OFFICE_ROLES
+
+# 監視当番(AM1, AM2, PM)が1人ずつ割り当てられていること
+RULE_MONITOR_ROLES = 'MONITOR_ROLES'
+# AM1かAM2の少なくとも1人が障害対応者であること
+RULE_FIX_SPECIALIST = 'FIX_SPECIALIST'
+
+# 隣接日のフィルタ(key:=フィルタのEnum, item:=違反となるtuple(1日目の役割のset, 翌日の役割のset))
+_ADJACENT_RULES = {
+    EMonitorComboFilters.AM_AM_IN_A_ROW: (MONITOR_ROLES_AM, MONITOR_ROLES_AM),
+    EMonitorComboFilters.PM_AM_IN_A_ROW: ({ERole.PM}, MONITOR_ROLES_AM),
+    EMonitorComboFilters.PM_PM_IN_A_ROW: ({ERole.PM}, {ERole.PM}),
+    ERemoteFilters.REMOTE_2DAYS_IN_A_ROW: ({ERole.R}, {ERole.R}),
+}
+# 上限のフィルタ(key:=フィルタのEnum, item:=上限を判定する役割のtuple)
+_MAX_RULES = {
+    EMonitorComboFilters.MONITORING_MAX: (ERole.AM1, ERole.AM2, ERole.PM),
+    ERemoteFilters.REMOTE_MAX: (ERole.R, ),
+}
+
+
+class Violation:
+    """スケジュールの制約違反"""
+
+    def __init__(self, rule: str, day, names, priority: int = FILTER_PRIORITY1):
+        # 違反した制約の名前(フィルタのEnumの名前、またはRULE_*)
+        self.rule: str = rule
+        # 違反した日(役割の上限の場合はNone)
+        self.day = day
+        # 違反した監視者名のtuple
+        self.names: tuple = tuple(names)
+        # 制約のフィルタ優先度(FILTER_PRIORITY2の制約は、条件を緩くして割り当てた場合は違反し得る)
+        self.priority: int = priority
+
+    def __repr__(self):
+        day = self.day.strftime('%Y/%m/%d') if self.day else '-'
+        return f'Violation({self.rule}, {day}, {", ".join(self.names)})'
+
+
+def validate_schedule(monitor_dict: dict, weekdays, monitor_filter_manager: MonitorFilterManager,
+                      remote_filter_manager: RemoteFilterManager, base_monitor_dict: dict = None,
+                      filter_priority: int = FILTER_PRIORITY2) -> list:
+    """
+    割り当てが完了したスケジュールが、有効なフィルタと監視当番の構成を満たしているかを検証する。
+    監視者×営業日の役割を1度ずつ走査するため、処理時間はスケジュールの大きさに比例する。
+    役割の上限は、割り当て時と同様にスケジュールの全ての日(営業日以外を含む)の日数とMonitor.role_maxを比較する。
+    隣接日のフィルタは、営業日とその前後の日(前後の期間の割り当て結果等)の組を検証する。
+
+    :param monitor_dict: 割り当てを行った監視者の辞書(key:=name, item:=Monitor)
+    :param weekdays: 検証する営業日のIterable
+    :param monitor_filter_manager: 監視の組み合わせのフィルタ管理クラス
+    :param remote_filter_manager: 在宅勤務のフィルタ管理クラス
+    :param base_monitor_dict: あらかじめ入力された予定のみを持つ監視者の辞書(Noneの場合は手動入力を検証せず、
+                              MUST_WORK_AT_OFFICE_GROUPでは全ての在宅勤務を割り当てによるものとみなす)
+    :param filter_priority: フィルタ優先度(この値以下の優先度のフィルタを検証する)
+    :return: Violationのlist(日付順で、役割の上限の違反は最後。違反が無い場合は空のlist)
+    """
+    filter_enums = {filter_enum for fm in (monitor_filter_manager, remote_filter_manager)
+                    for filter_enum in fm.filters if filter_enum.priority <= filter_priority}
+    adjacent_filter_enums = [filter_enum for filter_enum in _ADJACENT_RULES if filter_enum in filter_enums]
+    weekdays = sorted(weekdays)
+    weekday_set = set(weekdays)
+    violations = []
+    for day in weekdays:
+        # key:=ERole, item:=監視者名のlist
+        role_names = {}
+        for name, monitor in monitor_dict.items():
+            role = monitor.schedule.get(day)
+            role_names.setdefault(role, []).append(name)
+            if base_monitor_dict is not None and EMonitorComboFilters.MANUAL_INPUT in filter_enums:
+                if (base_role := base_monitor_dict[name].schedule.get(day)) and base_role != role:
+                    violations.append(Violation(EMonitorComboFilters.MANUAL_INPUT.name, day, (name, )))
+            # 前日が営業日の場合は前日の検証で確認済み
+            pre_day = day - timedelta(days=1)
+            adjacent_days = [(day, day + timedelta(days=1))]
+            if pre_day not in weekday_set:
+                adjacent_days.append((pre_day, day))
+            for first_day, second_day in adjacent_days:
+                first_role, second_role = monitor.schedule.get(first_day), monitor.schedule.get(second_day)
+                for filter_enum in adjacent_filter_enums:
+                    first_roles, second_roles = _ADJACENT_RULES[filter_enum]
+                    if first_role in first_roles and second_role in second_roles:
+                        violations.append(Violation(filter_enum.name, second_day, (name, ), filter_enum.priority))
+
+        monitor_names = [name for role in MONITOR_ROLES_ALL for name in role_names.get(role, ())]
+        if any([len(role_names.get(role, ())) != 1 for role in MONITOR_ROLES_ALL]):
+            violations.append(Violation(RULE_MONITOR_ROLES, day, monitor_names))
+        elif not any([monitor_dict[role_names[role][0]].is_fix_specialist for role in MONITOR_ROLES_AM]):
+            violations.append(Violation(RULE_FIX_SPECIALIST, day, monitor_names))
+
+        if ERemoteFilters.MUST_WORK_AT_OFFICE_GROUP in filter_enums:
+            # 割り当てで追加された在宅勤務者(手動入力の在宅勤務は除く)
+            remote_names = {name for name in role_names.get(ERole.R, ())
+                            if base_monitor_dict is None or base_monitor_dict[name].schedule.get(day) != ERole.R}
+            not_at_office_names = {name for role in NOT_AT_OFFICE_ROLES for name in role_names.get(role, ())}
+            for group in remote_filter_manager.must_work_at_office_groups:
+                # 手動入力の予定だけで全員が出社しない場合は在宅勤務の割り当てによる違反ではない
+                if group <= not_at_office_names and group & remote_names:
+                    violations.append(Violation(ERemoteFilters.MUST_WORK_AT_OFFICE_GROUP.name, day, sorted(group)))
+
+    for filter_enum in filter_enums & _MAX_RULES.keys():
+        for name, monitor in monitor_dict.items():
+            if any([role in monitor.role_max and monitor.get_role_count(role) > monitor.role_max[role]
+                    for role in _MAX_RULES[filter_enum]]):
+                violations.append(Violation(filter_enum.name, None, (name, ), filter_enum.priority))
+    return violations
+
+
+def format_violations(violations) -> str:
+    """
+    制約違反を1行に1件の文字列にする。
+
+    :param violations: ViolationのIterable
+    :return: 制約違反の文字列
+    """
+    return '\n'.join([f'[P{v.priority}] {v.rule}: {v.day.strftime("%Y/%m/%d") if v.day else "-"} '
+                      f'{", ".join(v.names)}' for v in violations])
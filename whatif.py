@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import threading
+import time
+
+from filters import FILTER_PRIORITY1, EMonitorComboFilters, ERemoteFilters, convert_str_to_filter
+from monitors import ERole, MONITOR_ROLES_ALL
+from progress import PHASE_MONITOR, PHASE_REMOTE, STATUS_FOUND, CancelToken
+from scheduler import MonitorSearchSpace, Scenario, calc_fairness_score, copy_monitor_dict, solve_schedule
+
+
+class Perturbation:
+    """入力情報に対する仮定の変更(What-if)"""
+
+    def __init__(self, name: str, other_days: dict = None, max_num_of_remotes_per_day: int = None,
+                 enabled_filters=None, disabled_filters=None):
+        """
+        :param name: 変更の名前
+        :param other_days: 追加する休暇・不在の日の辞書(key:=monitor name, item:=datetimeのIterable)
+        :param max_num_of_remotes_per_day: 1日の最大の在宅勤務者数(Noneの場合は変更しない)
+        :param enabled_filters: 有効にするフィルタ名(filtersシートのName)のIterable
+        :param disabled_filters: 無効にするフィルタ名(filtersシートのName)のIterable
+        """
+        self.name: str = name
+        self.other_days: dict = other_days or {}
+        self.max_num_of_remotes_per_day: int = max_num_of_remotes_per_day
+        self.enabled_filters: set = set(enabled_filters or ())
+        self.disabled_filters: set = set(disabled_filters or ())
+
+    def apply(self, scenario: Scenario) -> Scenario:
+        """
+        入力情報に変更を適用したコピーを返す。
+        コピーはプロセス間で受け渡しできるよう、workbookを保持しない。
+
+        :param scenario: 変更前の入力情報
+        :return: 変更を適用した入力情報
+        :raises: ValueError: 存在しない監視者名やフィルタ名が指定された場合
+        """
+        monitor_dict = copy_monitor_dict(scenario.monitor_dict)
+        for name, days in self.other_days.items():
+            if name not in monitor_dict:
+                raise ValueError(f'{name} is not in monitors.')
+            for day in days:
+                monitor_dict[name].schedule[day] = ERole.OTHER
+
+        monitor_filter_manager = copy.copy(scenario.monitor_filter_manager)
+        remote_filter_manager = copy.copy(scenario.remote_filter_manager)
+        monitor_filter_manager.filters = set(monitor_filter_manager.filters)
+        remote_filter_manager.filters = set(remote_filter_manager.filters)
+        for filter_names, enable in ((self.enabled_filters, True), (self.disabled_filters, False)):
+            for filter_name in filter_names:
+                filter_enum = _convert_str_to_any_filter(filter_name)
+                fm = monitor_filter_manager if isinstance(filter_enum, EMonitorComboFilters) \
+                    else remote_filter_manager
+                if enable:
+                    fm.filters.add(filter_enum)
+                else:
+                    fm.filters.discard(filter_enum)
+
+        max_num_of_remotes_per_day = scenario.max_num_of_remotes_per_day
+        if self.max_num_of_remotes_per_day is not None:
+            max_num_of_remotes_per_day = self.max_num_of_remotes_per_day
+        return Scenario(monitor_dict, scenario.must_work_at_office_groups, scenario.weekday_dict,
+                        monitor_filter_manager, remote_filter_manager, max_num_of_remotes_per_day,
+                        monitor_column_dict=scenario.monitor_column_dict)
+
+
+def _convert_str_to_any_filter(filter_name: str):
+    for filter_cls in (EMonitorComboFilters, ERemoteFilters):
+        try:
+            return convert_str_to_filter(filter_cls, filter_name)
+        except ValueError:
+            pass
+    raise ValueError(f'{filter_name} is not a filter name.')
+
+
+class WhatIfResult:
+    """What-ifの評価結果"""
+
+    def __init__(self, name: str, infeasible_days: list):
+        # 変更の名前
+        self.name: str = name
+        # 割り当て状況に依存しないフィルタだけで監視の組み合わせが無くなる日のlist
+        self.infeasible_days: list = infeasible_days
+        # 監視当番の割り当てが見つかったフィルタ優先度(見つからなかった場合はNone)
+        self.monitor_filter_priority: int = None
+        # 監視当番が揃わなかった日数
+        self.num_of_unassigned_monitor_days: int = None
+        # 全営業日に在宅勤務を割り当てられた1日の在宅勤務の割り当て人数(割り当てられなかった場合はNone)
+        self.max_num_of_remotes_per_day: int = None
+        # 在宅勤務の割り当てが見つかったフィルタ優先度(見つからなかった場合はNone)
+        self.remote_filter_priority: int = None
+        # 公平性スコア(calc_fairness_score)
+        self.fairness_score: int = None
+        # 評価にかかった秒数
+        self.elapsed: float = 0.0
+
+    @property
+    def is_feasible(self) -> bool:
+        """
+        :return: 全営業日に監視当番を割り当てられた場合はTrue
+        """
+        return not self.infeasible_days and self.num_of_unassigned_monitor_days == 0
+
+    def __repr__(self):
+        return f'WhatIfResult({self.name}, {self.is_feasible})'
+
+
+def find_infeasible_days(scenario: Scenario, search_space: MonitorSearchSpace = None) -> list:
+    """
+    割り当て状況に依存しないフィルタ(手動入力等)だけで監視の組み合わせが無くなる日を返す。
+    この日が存在する場合、どのように割り当てても全営業日に監視当番を割り当てることはできない。
+
+    :param scenario: スケジュール作成の入力情報
+    :param search_space: 入力情報から作成した監視当番の割り当ての事前計算結果(Noneの場合は入力情報から作成する)
+    :return: 監視の組み合わせが無い日のlist(昇順)
+    """
+    if search_space is None:
+        search_space = MonitorSearchSpace(
+            scenario.monitor_dict, scenario.weekdays, scenario.monitor_filter_manager)
+    day_monitor_combos = search_space.day_monitor_combos[FILTER_PRIORITY1]
+    return sorted(day for day, monitor_combos in day_monitor_combos.items() if not monitor_combos)
+
+
+def evaluate_what_if(scenario: Scenario, perturbation: Perturbation, time_limit: float = 2.0) -> WhatIfResult:
+    """
+    変更を適用した入力情報の実現可能性を評価する。
+    まず割り当て状況に依存しないフィルタで実現不可能な日を調べ、存在しなければ時間制限付きでスケジュールを作成する。
+
+    :param scenario: 変更前の入力情報
+    :param perturbation: 変更
+    :param time_limit: スケジュール作成の制限秒数(超過した場合はそれまでの最良の結果で評価する)
+    :return: 評価結果
+    """
+    st = time.perf_counter()
+    scenario = perturbation.apply(scenario)
+    # 実現不可能な日の判定とスケジュール作成で事前計算を共有する
+    search_space = MonitorSearchSpace(scenario.monitor_dict, scenario.weekdays, scenario.monitor_filter_manager)
+    result = WhatIfResult(perturbation.name, find_infeasible_days(scenario, search_space))
+    if result.infeasible_days:
+        result.elapsed = time.perf_counter() - st
+        return result
+
+    def on_progress(event):
+        if event.status != STATUS_FOUND:
+            return
+        if event.phase == PHASE_MONITOR:
+            result.monitor_filter_priority = event.filter_priority
+        elif event.phase == PHASE_REMOTE and result.max_num_of_remotes_per_day is None:
+            result.max_num_of_remotes_per_day = event.max_num_of_remotes_per_day
+            result.remote_filter_priority = event.filter_priority
+
+    cancel_token = CancelToken()
+    timer = threading.Timer(time_limit, cancel_token.stop)
+    timer.start()
+    try:
+        monitor_dict = solve_schedule(scenario, cancel_token, on_progress, search_space)
+    finally:
+        timer.cancel()
+
+    result.num_of_unassigned_monitor_days = len([
+        day for day in scenario.weekdays
+        if len([m for m in monitor_dict.values() if m.schedule.get(day) in MONITOR_ROLES_ALL]) < 3])
+    result.fairness_score = calc_fairness_score(monitor_dict)
+    result.elapsed = time.perf_counter() - st
+    return result
+
+
+def evaluate_what_ifs(scenario: Scenario, perturbations, time_limit: float = 2.0, executor=None) -> list:
+    """
+    複数の変更を並列に評価する。
+
+    :param scenario: 変更前の入力情報
+    :param perturbations: PerturbationのIterable
+    :param time_limit: 1つの変更あたりのスケジュール作成の制限秒数
+    :param executor: 評価を実行するconcurrent.futures.Executor(Noneの場合はProcessPoolExecutorを使用する)
+    :return: WhatIfResultのlist(perturbationsと同じ順)
+    """
+    # workbookはプロセス間で受け渡せないため除いておく
+    base = Scenario(scenario.monitor_dict, scenario.must_work_at_office_groups, scenario.weekday_dict,
+                    scenario.monitor_filter_manager, scenario.remote_filter_manager,
+                    scenario.max_num_of_remotes_per_day, monitor_column_dict=scenario.monitor_column_dict)
+    perturbations = list(perturbations)
+    if executor is None:
+        with ProcessPoolExecutor() as pool:
+            return list(pool.map(evaluate_what_if, [base] * len(perturbations), perturbations,
+                                 [time_limit] * len(perturbations)))
+    return list(executor.map(evaluate_what_if, [base] * len(perturbations), perturbations,
+                             [time_limit] * len(perturbations)))
+
+
+def format_what_if_table(results) -> str:
+    """
+    評価結果を表形式の文字列にする。
+
+    :param results: WhatIfResultのIterable
+    :return: 表形式の文字列
+    """
+    lines = ['name, feasible, infeasible_days, monitor_filter_priority, unassigned_monitor_days, '
+             'remotes_per_day, remote_filter_priority, fairness_score, elapsed']
+    for r in results:
+        infeasible_days = ' & '.join(f'{day:%Y-%m-%d}' for day in r.infeasible_days) or '[]'
+        lines.append(f'{r.name}, {r.is_feasible}, {infeasible_days}, {r.monitor_filter_priority}, '
+                     f'{r.num_of_unassigned_monitor_days}, {r.max_num_of_remotes_per_day}, '
+                     f'{r.remote_filter_priority}, {r.fairness_score}, {r.elapsed:.3f}')
+    return '\n'.join(lines)